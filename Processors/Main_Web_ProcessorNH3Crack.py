@@ -1,17 +1,41 @@
 import pandas as pd
 import numpy as np
-from scipy.interpolate import interp1d
 import json
 import os
+import io
 import sys
+import time
+import pstats
+import cProfile
+import tracemalloc
 from datetime import datetime, timedelta
-import plotly.graph_objects as go
-from plotly.utils import PlotlyJSONEncoder
 
 # Add the parent directory to sys.path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
 
+try:
+    from .report_cache import report_cache
+    from .catalog import get_catalog
+    from .metrics import StepTimer
+    from .json_sanitizer import sanitize_experiment
+    from .plot_regeneration import regenerate_experiment
+    from .stage_aggregates import compute_stage_aggregates
+    from .multipoint import MultipointProfile
+    from .derived import add_derived_columns
+    from .precision import column_values
+except ImportError:
+    # Fallback when imported as a top-level module from the Processors folder
+    from report_cache import report_cache
+    from catalog import get_catalog
+    from metrics import StepTimer
+    from json_sanitizer import sanitize_experiment
+    from plot_regeneration import regenerate_experiment
+    from stage_aggregates import compute_stage_aggregates
+    from multipoint import MultipointProfile
+    from derived import add_derived_columns
+    from precision import column_values
+
 # Custom JSON encoder to handle NaN values
 class CustomJSONEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -26,10 +50,42 @@ class CustomJSONEncoder(json.JSONEncoder):
         return super().default(obj)
 
 class ExperimentalDataProcessor:
-    def __init__(self, input_folder="uploads", output_folder="Reports"):
+    def __init__(self, input_folder="uploads", output_folder="Reports", profile=False):
         self.input_folder = input_folder
         self.output_folder = output_folder
+        # Save a cProfile dump and per-step allocation peaks with every processed experiment
+        self.profile = profile
+        # Wall/CPU time per pipeline step of the current process_file() run
+        self.step_timer = StepTimer()
+        # Optional callable(event) that receives progress events while a file is processed
+        self.progress_callback = None
+        self.bytes_written = 0
         self.ensure_folders_exist()
+    
+    def report_progress(self, step, progress, message, **details):
+        """Send a progress event (step, overall fraction 0-1, message, details) to progress_callback"""
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(dict(details, step=step, progress=progress, message=message))
+        except Exception as e:
+            print(f"Warning: Progress callback failed: {e}")
+    
+    def get_processing_parameters(self):
+        """Return the settings that determine the processing output"""
+        return {
+            'target_interval_minutes': config.INTERPOLATION_TARGET_INTERVAL,
+            'max_gap_minutes': config.MAX_GAP_MINUTES,
+            'derived_columns': config.DERIVED_COLUMNS,
+            'derived_constants': config.DERIVED_CONSTANTS
+        }
+    
+    def _record_written(self, path):
+        """Add the size of a written file to bytes_written"""
+        try:
+            self.bytes_written += os.path.getsize(path)
+        except OSError:
+            pass
         
     def ensure_folders_exist(self):
         """Create folders if they don't exist"""
@@ -104,6 +160,9 @@ class ExperimentalDataProcessor:
     
     def perform_interpolation(self, df, target_interval_minutes=1, max_gap_minutes=5):
         """Perform cubic interpolation for all numeric columns, excluding large gaps"""
+        # scipy is only needed here, keep it out of the module import
+        from scipy.interpolate import interp1d
+        
         # Create target time vector with 1-minute intervals
         time_min = df['Time_Minutes'].min()
         time_max = df['Time_Minutes'].max()
@@ -136,7 +195,14 @@ class ExperimentalDataProcessor:
         numeric_columns = [col for col in numeric_columns if col not in exclude_cols]
         
         # Interpolate each numeric column
-        for col in numeric_columns:
+        report_every = max(1, len(numeric_columns) // 20)
+        for i, col in enumerate(numeric_columns):
+            if i % report_every == 0:
+                self.report_progress(
+                    'interpolate', 0.15 + 0.45 * i / len(numeric_columns),
+                    f"Interpolating columns ({i}/{len(numeric_columns)})",
+                    columns_done=i, columns_total=len(numeric_columns)
+                )
             try:
                 # Remove NaN values for interpolation
                 mask = ~(df['Time_Minutes'].isna() | df[col].isna())
@@ -224,7 +290,7 @@ class ExperimentalDataProcessor:
         
         return column_mapping
     
-    def save_stage_data(self, stages, column_mapping, base_filename):
+    def save_stage_data(self, stages, column_mapping, base_filename, processing_parameters=None):
         """Save stage data in multiple formats with a proper folder structure"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
@@ -238,7 +304,10 @@ class ExperimentalDataProcessor:
                 'processed_at': datetime.now().isoformat(),
                 'total_stages': len(stages),
                 'stage_numbers': list(stages.keys()),
-                'base_filename': base_filename
+                'base_filename': base_filename,
+                'processing_parameters': processing_parameters or {},
+                'processor_version': config.PROCESSOR_VERSION,
+                'aggregate_last_minutes': config.STAGE_AGGREGATE_LAST_MINUTES
             },
             'column_mapping': column_mapping,
             'stages_info': {}
@@ -247,21 +316,23 @@ class ExperimentalDataProcessor:
         # Process each stage
         all_stages_data = {}
         
-        for stage_num, stage_df in stages.items():
+        for stage_index, (stage_num, stage_df) in enumerate(stages.items()):
             stage_info = {
                 'row_count': len(stage_df),
                 'time_range': {
                     'start': float(stage_df['Time_Minutes'].min()),
                     'end': float(stage_df['Time_Minutes'].max()),
                     'duration': float(stage_df['Time_Minutes'].max() - stage_df['Time_Minutes'].min())
-                }
+                },
+                # Per-column statistics for the catalog's stage_aggregates table
+                'aggregates': compute_stage_aggregates(stage_df, config.STAGE_AGGREGATE_LAST_MINUTES)
             }
             summary['stages_info'][stage_num] = stage_info
             
-            # Convert DataFrame to dict for JSON serialization
+            # Convert DataFrame to dict for JSON serialization, rounded to the output precision
             stage_data = {}
             for col in stage_df.columns:
-                stage_data[col] = stage_df[col].tolist()
+                stage_data[col] = column_values(stage_df[col])
             
             all_stages_data[f"stage_{stage_num}"] = stage_data
             
@@ -269,54 +340,88 @@ class ExperimentalDataProcessor:
             stage_dir = os.path.join(exp_dir, f"stage_{stage_num}")
             os.makedirs(stage_dir, exist_ok=True)
             
-            # Save individual stage CSV
-            csv_filename = f"stage_{stage_num}_data.csv"
-            csv_path = os.path.join(stage_dir, csv_filename)
-            stage_df.to_csv(csv_path, index=False)
-            print(f"Saved Stage {stage_num} CSV: {csv_path}")
-            
-            # Save individual stage JSON
-            json_filename = f"stage_{stage_num}_data.json"
-            json_path = os.path.join(stage_dir, json_filename)
-            with open(json_path, 'w') as f:
-                json.dump(stage_data, f, indent=2, cls=CustomJSONEncoder)
-            print(f"Saved Stage {stage_num} JSON: {json_path}")
+            with self.step_timer.step('write'):
+                # Save individual stage CSV
+                csv_filename = f"stage_{stage_num}_data.csv"
+                csv_path = os.path.join(stage_dir, csv_filename)
+                stage_df.to_csv(csv_path, index=False)
+                self._record_written(csv_path)
+                print(f"Saved Stage {stage_num} CSV: {csv_path}")
+                
+                # Save individual stage JSON
+                json_filename = f"stage_{stage_num}_data.json"
+                json_path = os.path.join(stage_dir, json_filename)
+                with open(json_path, 'w') as f:
+                    json.dump(stage_data, f, indent=2, cls=CustomJSONEncoder)
+                self._record_written(json_path)
+                print(f"Saved Stage {stage_num} JSON: {json_path}")
             
             # Create Plotly JSON files for stage with different plots
-            self.create_stage_plotly_json(stage_df, stage_num, base_filename, stage_dir)
+            with self.step_timer.step('plot'):
+                self.create_stage_plotly_json(stage_df, stage_num, base_filename, stage_dir)
             print(f"Saved Stage {stage_num} Plotly JSON files in: {stage_dir}")
-        
-        # Save summary JSON in experiment directory
-        summary_path = os.path.join(exp_dir, "experiment_summary.json")
-        with open(summary_path, 'w') as f:
-            json.dump(summary, f, indent=2, cls=CustomJSONEncoder)
-        print(f"Saved experiment summary: {summary_path}")
-        
-        # Save complete JSON with all stages
-        json_filename = f"{base_filename}_all_stages.json"
-        json_path = os.path.join(exp_dir, json_filename)
-        complete_data = {
-            'summary': summary,
-            'data': all_stages_data
-        }
-        
-        with open(json_path, 'w') as f:
-            json.dump(complete_data, f, indent=2, cls=CustomJSONEncoder)
-        print(f"Saved complete JSON: {json_path}")
-        
-        # Save complete CSV (all stages)
-        complete_csv_filename = f"{base_filename}_complete.csv"
-        complete_csv_path = os.path.join(exp_dir, complete_csv_filename)
-        complete_df = pd.concat([df.assign(Stage_ID=stage) for stage, df in stages.items()])
-        complete_df.to_csv(complete_csv_path, index=False)
-        print(f"Saved complete CSV: {complete_csv_path}")
+            self.report_progress(
+                'write', 0.65 + 0.25 * (stage_index + 1) / len(stages),
+                f"Wrote stage {stage_num} ({stage_index + 1}/{len(stages)})",
+                stages_done=stage_index + 1, stages_total=len(stages), bytes_written=self.bytes_written
+            )
+        
+        with self.step_timer.step('write'):
+            # Save summary JSON in experiment directory
+            summary_path = os.path.join(exp_dir, "experiment_summary.json")
+            with open(summary_path, 'w') as f:
+                json.dump(summary, f, indent=2, cls=CustomJSONEncoder)
+            self._record_written(summary_path)
+            print(f"Saved experiment summary: {summary_path}")
+            
+            # Record the experiment in the catalog used for listing and filtering
+            try:
+                get_catalog(self.output_folder).upsert_experiment(
+                    base_filename, summary, os.stat(summary_path).st_mtime_ns
+                )
+            except Exception as e:
+                print(f"Warning: Could not update experiment catalog: {e}")
+            
+            # Save complete JSON with all stages
+            json_filename = f"{base_filename}_all_stages.json"
+            json_path = os.path.join(exp_dir, json_filename)
+            complete_data = {
+                'summary': summary,
+                'data': all_stages_data
+            }
+            
+            with open(json_path, 'w') as f:
+                json.dump(complete_data, f, indent=2, cls=CustomJSONEncoder)
+            self._record_written(json_path)
+            print(f"Saved complete JSON: {json_path}")
+            
+            # Save complete CSV (all stages)
+            complete_csv_filename = f"{base_filename}_complete.csv"
+            complete_csv_path = os.path.join(exp_dir, complete_csv_filename)
+            complete_df = pd.concat([df.assign(Stage_ID=stage) for stage, df in stages.items()])
+            complete_df.to_csv(complete_csv_path, index=False)
+            self._record_written(complete_csv_path)
+            print(f"Saved complete CSV: {complete_csv_path}")
+        
+        self.report_progress(
+            'plot', 0.92, "Creating overall plots", bytes_written=self.bytes_written
+        )
         
         # Create Plotly-compatible JSON files with different plots for all stages
-        self.create_plotly_json(stages, base_filename, timestamp, exp_dir)
+        with self.step_timer.step('plot'):
+            self.create_plotly_json(stages, base_filename, timestamp, exp_dir)
         print(f"Saved overall Plotly JSON files in: {exp_dir}")
+        self.report_progress('plot', 0.98, "Saved overall plots", bytes_written=self.bytes_written)
+        
+        # Drop cached copies of the files that were just rewritten
+        report_cache.invalidate(exp_dir)
     
-    def create_stage_plotly_json(self, stage_df, stage_num, base_filename, output_dir):
-        """Create multiple Plotly-compatible JSON files for a single stage with focused plots"""
+    def create_stage_plotly_json(self, stage_df, stage_num, base_filename, output_dir, profile=None):
+        """Create multiple Plotly-compatible JSON files for a single stage with focused plots
+        
+        profile, a saved MultipointProfile of the experiment, is used for the
+        heatmap instead of stage_df when given.
+        """
         # Create base title
         base_title = f'Stage {stage_num} - {base_filename}'
         
@@ -334,6 +439,12 @@ class ExperimentalDataProcessor:
                 'yaxis_title': 'Temperature (°C)',
                 'filename': f'stage_{stage_num}_multipoint_temp_plotly.json'
             },
+            'multipoint_heatmap': {
+                'title': f'{base_title} - Multipoint Temperature Profile',
+                'plot_type': 'heatmap',
+                'columns': [col for col in stage_df.columns if col.startswith('R-1/2 T') and col.endswith('\u00b0C')],
+                'filename': f'stage_{stage_num}_multipoint_heatmap_plotly.json'
+            },
             'saturator_temp': {
                 'title': f'{base_title} - Saturator Temperature',
                 'columns': ['Saturator T read [\u00b0C]'],
@@ -363,6 +474,12 @@ class ExperimentalDataProcessor:
                 'columns': ['NH3 out [%]', 'H2 out [%]', 'H2O out [%]'],
                 'yaxis_title': 'Concentration (%)',
                 'filename': f'stage_{stage_num}_outlet_plotly.json'
+            },
+            'derived': {
+                'title': f'{base_title} - Derived Quantities',
+                'columns': list(config.DERIVED_COLUMNS),
+                'yaxis_title': 'Derived value',
+                'filename': f'stage_{stage_num}_derived_plotly.json'
             }
         }
         
@@ -375,6 +492,12 @@ class ExperimentalDataProcessor:
                 print(f"Warning: No columns found for {group_name} plot in stage {stage_num}")
                 continue
             
+            if group_info.get('plot_type') == 'heatmap':
+                stage_profile = profile.stage_profile(stage_num) if profile is not None \
+                    else MultipointProfile.from_stages({stage_num: stage_df})
+                self.write_heatmap_json(stage_profile, group_info, output_dir)
+                continue
+            
             # Create traces for each column
             traces = []
             for col in available_columns:
@@ -382,8 +505,8 @@ class ExperimentalDataProcessor:
                 valid_data = ~stage_df[col].isna()
                 
                 trace = {
-                    'x': stage_df.loc[valid_data, 'Time_Minutes'].tolist(),
-                    'y': stage_df.loc[valid_data, col].tolist(),
+                    'x': column_values(stage_df.loc[valid_data, 'Time_Minutes']),
+                    'y': column_values(stage_df.loc[valid_data, col]),
                     'type': 'scatter',
                     'mode': 'lines',
                     'name': col
@@ -411,10 +534,9 @@ class ExperimentalDataProcessor:
             with open(output_path, 'w') as f:
                 json.dump(plotly_data, f, indent=2, cls=CustomJSONEncoder)
     
-    def create_plotly_json(self, stages, base_filename, timestamp, output_dir):
-        """Create multiple Plotly-compatible JSON files for all stages with focused plots"""
-        # Define column groups for different plots
-        plot_groups = {
+    def overall_plot_groups(self, base_filename):
+        """Column groups of the overall plots, keyed by group name"""
+        return {
             'temperature': {
                 'title': f'Temperature Data - {base_filename}',
                 'columns': ['R1/2 T set [\u00b0C]', 'R1/2 T read [\u00b0C]', 'R1/2 T power [%]', 'Saturator T read [\u00b0C]'],
@@ -427,6 +549,13 @@ class ExperimentalDataProcessor:
                 'yaxis_title': 'Temperature (°C)',
                 'filename': f'{base_filename}_multipoint_temp_plotly_data.json'
             },
+            'multipoint_heatmap': {
+                'title': f'Multipoint Temperature Profile - {base_filename}',
+                'column_pattern': 'R-1/2 T',
+                'plot_type': 'heatmap',
+                'filename': f'{base_filename}_multipoint_heatmap_plotly_data.json',
+                'profile_filename': f'{base_filename}_multipoint_profile.npz'
+            },
             'saturator_temp': {
                 'title': f'Saturator Temperature - {base_filename}',
                 'columns': ['Saturator T read [\u00b0C]'],
@@ -456,8 +585,33 @@ class ExperimentalDataProcessor:
                 'columns': ['NH3 out [%]', 'H2 out [%]', 'H2O out [%]'],
                 'yaxis_title': 'Concentration (%)',
                 'filename': f'{base_filename}_outlet_plotly_data.json'
+            },
+            'derived': {
+                'title': f'Derived Quantities - {base_filename}',
+                'columns': list(config.DERIVED_COLUMNS),
+                'yaxis_title': 'Derived value',
+                'filename': f'{base_filename}_derived_plotly_data.json'
             }
         }
+    
+    def plot_group_columns(self, group_name, group_info, columns):
+        """Columns of an overall plot group that are present in columns"""
+        # Special handling for multipoint temperature columns
+        if 'column_pattern' in group_info:
+            return [col for col in columns if col.startswith('R-1/2 T') and col.endswith('\u00b0C')]
+        # Filter columns that exist in the dataframe
+        return [col for col in group_info['columns'] if col in columns]
+    
+    def create_plotly_json(self, stages, base_filename, timestamp, output_dir, groups=None, keep_profile=False):
+        """Create multiple Plotly-compatible JSON files for all stages with focused plots
+        
+        groups limits the output to the named plot groups (default: all). With
+        keep_profile, an existing multipoint profile file is used for the
+        heatmap instead of being rebuilt from stages (e.g. when they are rounded).
+        """
+        plot_groups = self.overall_plot_groups(base_filename)
+        if groups is not None:
+            plot_groups = {name: info for name, info in plot_groups.items() if name in groups}
         
         # Colors for different stages
         colors = ['red', 'blue', 'green', 'orange', 'purple', 'brown', 'pink', 'gray', 
@@ -465,6 +619,20 @@ class ExperimentalDataProcessor:
         
         # Create a plot for each group
         for group_name, group_info in plot_groups.items():
+            if group_info.get('plot_type') == 'heatmap':
+                profile_path = os.path.join(output_dir, group_info['profile_filename'])
+                if keep_profile and os.path.exists(profile_path):
+                    profile = MultipointProfile.load(profile_path)
+                else:
+                    profile = MultipointProfile.from_stages({
+                        stage_num: stage_df[['Time_Minutes'] + self.plot_group_columns(group_name, group_info, stage_df.columns)]
+                        for stage_num, stage_df in stages.items()
+                    })
+                    if profile is not None:
+                        profile.save(profile_path)
+                self.write_heatmap_json(profile, group_info, output_dir)
+                continue
+            
             plotly_data = {
                 'metadata': {
                     'title': group_info['title'],
@@ -485,13 +653,7 @@ class ExperimentalDataProcessor:
             for i, (stage_num, stage_df) in enumerate(stages.items()):
                 color = colors[i % len(colors)]
                 
-                # Special handling for multipoint temperature columns
-                if group_name == 'multipoint_temp':
-                    available_columns = [col for col in stage_df.columns if 
-                                        col.startswith('R-1/2 T') and col.endswith('\u00b0C')]
-                else:
-                    # Filter columns that exist in the dataframe
-                    available_columns = [col for col in group_info['columns'] if col in stage_df.columns]
+                available_columns = self.plot_group_columns(group_name, group_info, stage_df.columns)
                 
                 if not available_columns:
                     print(f"Warning: No columns found for {group_name} plot in stage {stage_num}")
@@ -503,8 +665,8 @@ class ExperimentalDataProcessor:
                     valid_data = ~stage_df[col].isna()
                     
                     trace = {
-                        'x': stage_df.loc[valid_data, 'Time_Minutes'].tolist(),
-                        'y': stage_df.loc[valid_data, col].tolist(),
+                        'x': column_values(stage_df.loc[valid_data, 'Time_Minutes']),
+                        'y': column_values(stage_df.loc[valid_data, col]),
                         'type': 'scatter',
                         'mode': 'lines',
                         'name': f'Stage {stage_num} - {col}',
@@ -522,6 +684,17 @@ class ExperimentalDataProcessor:
             else:
                 print(f"Warning: No data available for {group_name} plot")
     
+    def write_heatmap_json(self, profile, group_info, output_dir):
+        """Save the heatmap figure of a MultipointProfile (written compactly, the z matrix is large)"""
+        if profile is None:
+            print(f"Warning: No data available for {group_info['filename']}")
+            return
+        plotly_data = profile.heatmap_figure(group_info['title'])
+        plotly_data['metadata']['processed_at'] = datetime.now().isoformat()
+        output_path = os.path.join(output_dir, group_info['filename'])
+        with open(output_path, 'w') as f:
+            json.dump(plotly_data, f, separators=(',', ':'), cls=CustomJSONEncoder)
+    
     def create_category_plotly_jsons(self, stages, base_filename, timestamp, exp_dir):
         """Create specialized Plotly-compatible JSON files for different data categories"""
         # Use data categories defined in the config file
@@ -562,8 +735,8 @@ class ExperimentalDataProcessor:
                     valid_data = ~stage_df[col].isna()
                     
                     trace = {
-                        'x': stage_df.loc[valid_data, 'Time_Minutes'].tolist(),
-                        'y': stage_df.loc[valid_data, col].tolist(),
+                        'x': column_values(stage_df.loc[valid_data, 'Time_Minutes']),
+                        'y': column_values(stage_df.loc[valid_data, col]),
                         'type': 'scatter',
                         'mode': 'lines',
                         'name': f'Stage {stage_num} - {col}',
@@ -620,17 +793,36 @@ class ExperimentalDataProcessor:
         self.create_plotly_json(stages, base_filename, timestamp, os.path.join(exp_dir, f"{base_filename}_plotly_data.json"))
     
     def process_file(self, filename):
-        """Main processing function"""
+        """Main processing function. Returns True on success, False if the file could not be read."""
         print(f"Processing file: {filename}")
-        
+        self.step_timer = StepTimer(trace_memory=self.profile)
+        self.bytes_written = 0
+        if self.profile:
+            return self.process_file_profiled(filename)
+        return self._read_and_process(filename)
+    
+    def _read_and_process(self, filename):
         # Read data
-        df = self.read_data_file(filename)
+        self.report_progress('read', 0.0, f"Reading {filename}")
+        with self.step_timer.step('read'):
+            df = self.read_data_file(filename)
         if df is None:
             print(f"Failed to process file: {filename}")
-            return
+            return False
+        
+        return self.process_dataframe(df, filename)
+    
+    def process_dataframe(self, df, filename):
+        """Run the pipeline on data that has already been read from filename. Returns True."""
+        self.report_progress(
+            'read', 0.1, f"Parsed {len(df)} rows and {len(df.columns)} columns",
+            rows=len(df), columns=len(df.columns)
+        )
         
         # Create time vector
-        df = self.create_time_vector(df)
+        with self.step_timer.step('time_vector'):
+            df = self.create_time_vector(df)
+        self.report_progress('time_vector', 0.15, "Created time vector", rows=len(df))
         
         # Ensure Stage column exists (should be the second column)
         if 'Stage' not in df.columns and len(df.columns) > 1:
@@ -644,27 +836,120 @@ class ExperimentalDataProcessor:
         
         # Perform interpolation
         print("Performing cubic interpolation with gap filtering...")
-        interpolated_df = self.perform_interpolation(
-            df, 
-            target_interval_minutes=config.INTERPOLATION_TARGET_INTERVAL,
-            max_gap_minutes=config.MAX_GAP_MINUTES
-        )
+        processing_parameters = self.get_processing_parameters()
+        with self.step_timer.step('interpolate'):
+            interpolated_df = self.perform_interpolation(
+                df, 
+                target_interval_minutes=processing_parameters['target_interval_minutes'],
+                max_gap_minutes=processing_parameters['max_gap_minutes']
+            )
+        
+        # Derived columns (conversion, yield, ...) from the interpolated measurements
+        with self.step_timer.step('derive'):
+            derived_columns = add_derived_columns(interpolated_df)
+        if derived_columns:
+            print(f"Added derived columns: {', '.join(derived_columns)}")
         
         # Create column mapping
-        column_mapping = self.create_column_mapping(interpolated_df)
+        with self.step_timer.step('column_mapping'):
+            column_mapping = self.create_column_mapping(interpolated_df)
         
         # Slice by stages
         print("Slicing data by stages using the Stage column...")
-        stages = self.slice_by_stages(interpolated_df)
+        self.report_progress(
+            'interpolate', 0.6, f"Interpolated to {len(interpolated_df)} points",
+            rows=len(interpolated_df)
+        )
+        with self.step_timer.step('slice'):
+            stages = self.slice_by_stages(interpolated_df)
+        self.report_progress('slice', 0.65, f"Found {len(stages)} stages", stages_total=len(stages))
         
-        # Save data
+        # Save data (timed as 'write' and 'plot' inside save_stage_data)
         base_filename = os.path.splitext(filename)[0]
-        self.save_stage_data(stages, column_mapping, base_filename)
+        self.save_stage_data(stages, column_mapping, base_filename, processing_parameters)
         
+        self.step_timer.record()
+        self.report_progress('done', 1.0, "Processing completed", bytes_written=self.bytes_written)
         print("Processing completed successfully!")
+        return True
         
-    def fix_plotly_json_files(self, experiment_name):
-        """Fix existing Plotly JSON files by removing NaN values"""
+    def process_file_profiled(self, filename):
+        """Run the pipeline under cProfile and tracemalloc and save the results with the experiment"""
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        profiler = cProfile.Profile()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        profiler.enable()
+        try:
+            success = self._read_and_process(filename)
+        finally:
+            profiler.disable()
+            wall_seconds = time.perf_counter() - wall_start
+            cpu_seconds = time.process_time() - cpu_start
+            peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+        
+        if success:
+            self.save_profile(os.path.splitext(filename)[0], profiler, {
+                'profiled_at': datetime.now().isoformat(),
+                'wall_seconds': wall_seconds,
+                'cpu_seconds': cpu_seconds,
+                'peak_traced_bytes': peak_traced_bytes,
+                'bytes_written': self.bytes_written,
+                'steps': self.step_timer.steps
+            })
+        return success
+    
+    def save_profile(self, experiment_name, profiler, profile_summary):
+        """Write the cProfile dump and a text report, and add the summary to experiment_summary.json"""
+        exp_dir = os.path.join(self.output_folder, experiment_name)
+        profile_dir = os.path.join(exp_dir, config.PROFILE_DIRNAME)
+        os.makedirs(profile_dir, exist_ok=True)
+        
+        # Binary dump for pstats/snakeviz, plus a readable report sorted by cumulative time
+        dump_path = os.path.join(profile_dir, "process_file.prof")
+        profiler.dump_stats(dump_path)
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats('cumulative').print_stats(100)
+        with open(os.path.join(profile_dir, "process_file_stats.txt"), 'w') as f:
+            f.write(report.getvalue())
+        
+        top_functions = []
+        for (path, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            top_functions.append({
+                'function': f"{os.path.basename(path)}:{line}({function})",
+                'calls': calls,
+                'total_seconds': total,
+                'cumulative_seconds': cumulative
+            })
+        top_functions.sort(key=lambda entry: entry['cumulative_seconds'], reverse=True)
+        profile_summary['top_functions'] = top_functions[:config.PROFILE_TOP_FUNCTIONS]
+        profile_summary['files'] = [
+            f"{config.PROFILE_DIRNAME}/process_file.prof",
+            f"{config.PROFILE_DIRNAME}/process_file_stats.txt"
+        ]
+        
+        summary_path = os.path.join(exp_dir, "experiment_summary.json")
+        with open(summary_path, 'r') as f:
+            summary = json.load(f)
+        summary['profile'] = profile_summary
+        with open(summary_path, 'w') as f:
+            json.dump(summary, f, indent=2, cls=CustomJSONEncoder)
+        try:
+            get_catalog(self.output_folder).upsert_experiment(
+                experiment_name, summary, os.stat(summary_path).st_mtime_ns
+            )
+        except Exception as e:
+            print(f"Warning: Could not update experiment catalog: {e}")
+        report_cache.invalidate(exp_dir)
+        print(f"Saved profile: {dump_path}")
+    
+    def fix_plotly_json_files(self, experiment_name, use_manifest=True):
+        """Replace bare NaN/Infinity literals with null in an experiment's JSON files"""
         print(f"Fixing Plotly JSON files for {experiment_name}")
         
         # Get experiment directory
@@ -673,48 +958,25 @@ class ExperimentalDataProcessor:
             print(f"Error: Experiment directory not found at {exp_dir}")
             return False
         
-        # Find all JSON files in the experiment directory and its subdirectories
-        json_files = []
-        for root, dirs, files in os.walk(exp_dir):
-            for file in files:
-                if file.endswith('.json'):
-                    json_files.append(os.path.join(root, file))
-        
-        print(f"Found {len(json_files)} JSON files to check")
-        
-        # Process each JSON file
-        fixed_count = 0
-        
-        for file_path in json_files:
-            try:
-                # Read the file as text
-                with open(file_path, 'r') as f:
-                    content = f.read()
-                
-                # Check if file contains NaN
-                if 'NaN' in content or 'nan' in content:
-                    print(f"Fixing {os.path.basename(file_path)}")
-                    
-                    # Replace NaN values with null
-                    fixed_content = content.replace('NaN', 'null').replace('nan', 'null')
-                    fixed_content = fixed_content.replace('Infinity', 'null').replace('infinity', 'null')
-                    fixed_content = fixed_content.replace('-Infinity', 'null').replace('-infinity', 'null')
-                    
-                    # Try to parse the JSON to ensure it's valid
-                    try:
-                        json.loads(fixed_content)
-                    except json.JSONDecodeError as e:
-                        print(f"Warning: Could not parse fixed JSON in {file_path}: {e}")
-                        continue
-                    
-                    # Write the fixed content back to the file
-                    with open(file_path, 'w') as f:
-                        f.write(fixed_content)
-                    
-                    fixed_count += 1
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}")
-        
-        print(f"Fixed {fixed_count} out of {len(json_files)} JSON files")
+        result = sanitize_experiment(exp_dir, use_manifest=use_manifest)
+        for error in result['errors']:
+            print(f"Error processing {error}")
+        print(f"Fixed {result['fixed']} out of {result['files']} JSON files "
+              f"({result['replacements']} values, {result['skipped']} already clean)")
+        report_cache.invalidate(exp_dir)
         return True
 
+    
+    def regenerate_visualizations(self, experiment_name, workers=None, progress=None):
+        """Recreate the stage and overall Plotly JSON files from saved stage data.
+        
+        Each stage is loaded once and stages are handled in parallel, see
+        plot_regeneration.regenerate_experiment. Returns the number of stages
+        found. Raises FileNotFoundError if the experiment or its stage
+        folders don't exist.
+        """
+        result = regenerate_experiment(self.output_folder, experiment_name, self.input_folder,
+                                       workers=workers, progress=progress)
+        for error in result['errors']:
+            print(f"Error generating plots: {error}")
+        return result['stage_count']
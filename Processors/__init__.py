@@ -2,9 +2,18 @@
 NH3 Cracking Processor and Visualizer - Processors Package
 ---------------------------------------------------------
 This package contains data processing modules for the NH3 Cracking application.
+
+The processor is imported on first access, so importing the package (or its
+light modules such as report_cache and catalog) doesn't load pandas, numpy
+and scipy.
 """
 
 __all__ = ['ExperimentalDataProcessor']
 
-# Import main processor for easier access
-from .Main_Web_ProcessorNH3Crack import ExperimentalDataProcessor 
\ No newline at end of file
+
+def __getattr__(name):
+    # Import main processor for easier access, but only when it is used
+    if name == 'ExperimentalDataProcessor':
+        from .Main_Web_ProcessorNH3Crack import ExperimentalDataProcessor
+        return ExperimentalDataProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,611 @@
+"""
+NH3 Cracking Processor and Visualizer - Experiment Catalog
+----------------------------------------------------------
+SQLite catalog with one row per experiment and per stage, stored next to the
+processed reports. It replaces directory scans and full summary parsing when
+listing or filtering experiments.
+
+The processor updates the catalog whenever it writes an experiment summary,
+and sync()/rebuild() reconcile it with what is on disk (see rebuild_catalog.py).
+"""
+import os
+import json
+import sqlite3
+import threading
+
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    name TEXT PRIMARY KEY,
+    base_filename TEXT,
+    processed_at TEXT,
+    total_stages INTEGER NOT NULL DEFAULT 0,
+    total_rows INTEGER NOT NULL DEFAULT 0,
+    start_minutes REAL,
+    end_minutes REAL,
+    duration_minutes REAL,
+    columns TEXT NOT NULL DEFAULT '[]',
+    parameters TEXT NOT NULL DEFAULT '{}',
+    summary_mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_experiments_processed_at ON experiments (processed_at);
+CREATE INDEX IF NOT EXISTS idx_experiments_total_stages ON experiments (total_stages);
+
+CREATE TABLE IF NOT EXISTS stages (
+    experiment TEXT NOT NULL REFERENCES experiments (name) ON DELETE CASCADE,
+    stage_num INTEGER NOT NULL,
+    row_count INTEGER,
+    start_minutes REAL,
+    end_minutes REAL,
+    duration_minutes REAL,
+    PRIMARY KEY (experiment, stage_num)
+);
+
+CREATE TABLE IF NOT EXISTS experiment_columns (
+    experiment TEXT NOT NULL REFERENCES experiments (name) ON DELETE CASCADE,
+    column_name TEXT NOT NULL,
+    PRIMARY KEY (experiment, column_name)
+);
+CREATE INDEX IF NOT EXISTS idx_experiment_columns_name ON experiment_columns (column_name);
+
+CREATE TABLE IF NOT EXISTS stage_aggregates (
+    experiment TEXT NOT NULL REFERENCES experiments (name) ON DELETE CASCADE,
+    stage_num INTEGER NOT NULL,
+    column_name TEXT NOT NULL,
+    mean REAL,
+    min REAL,
+    max REAL,
+    std REAL,
+    count INTEGER,
+    last_mean REAL,
+    last_minutes REAL,
+    PRIMARY KEY (column_name, experiment, stage_num)
+);
+CREATE INDEX IF NOT EXISTS idx_stage_aggregates_experiment ON stage_aggregates (experiment, stage_num);
+
+CREATE TABLE IF NOT EXISTS column_index (
+    column_name TEXT NOT NULL,
+    experiment TEXT NOT NULL REFERENCES experiments (name) ON DELETE CASCADE,
+    dtype TEXT,
+    non_null_count INTEGER,
+    min REAL,
+    max REAL,
+    mean REAL,
+    PRIMARY KEY (column_name, experiment)
+);
+CREATE INDEX IF NOT EXISTS idx_column_index_experiment ON column_index (experiment);
+"""
+
+# Bumped when a table is filled from summaries in a new way; older catalogs re-read every summary on the next sync
+SCHEMA_VERSION = 2
+
+# Statistics stored per stage and column in stage_aggregates
+AGGREGATE_STATS = ('mean', 'min', 'max', 'std', 'count', 'last_mean')
+
+# SQL functions for grouped stage aggregate queries
+AGGREGATE_FUNCTIONS = {'avg': 'AVG', 'min': 'MIN', 'max': 'MAX', 'sum': 'SUM', 'count': 'COUNT'}
+
+# Sort keys accepted by list_experiments() and the SQL expression each one orders by.
+# NULLs are coalesced so keyset pagination can compare values directly.
+SORT_COLUMNS = {
+    'name': 'name',
+    'processed_at': "COALESCE(processed_at, '')",
+    'stages': 'total_stages',
+    'rows': 'total_rows',
+    'duration': 'COALESCE(duration_minutes, -1)'
+}
+
+
+def _number(value, kind=float):
+    """Convert a summary value to a plain int or float for SQLite; None if missing or not finite"""
+    if value is None:
+        return None
+    try:
+        value = kind(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value == value and value not in (float('inf'), float('-inf')) else None
+
+
+def sort_value(row, sort):
+    """Return the value a catalog row is ordered by for a sort key"""
+    if sort == 'processed_at':
+        return row['processed_at'] or ''
+    if sort == 'stages':
+        return row['total_stages']
+    if sort == 'rows':
+        return row['total_rows']
+    if sort == 'duration':
+        return row['duration_minutes'] if row['duration_minutes'] is not None else -1
+    return row['name']
+
+
+class ExperimentCatalog:
+    """SQLite-backed index of the experiments in a reports folder"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def connect(self):
+        """Open a connection with the schema in place. Connections are not shared between threads."""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.execute("PRAGMA journal_mode = WAL")
+                    conn.executescript(SCHEMA)
+                    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                        with conn:
+                            conn.execute("UPDATE experiments SET summary_mtime_ns = NULL")
+                        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                    self._initialized = True
+        return conn
+
+    def upsert_experiment(self, name, summary, summary_mtime_ns=None, conn=None):
+        """Insert or replace an experiment and its stages from an experiment summary"""
+        summary = summary or {}
+        metadata = summary.get('metadata', {})
+        stages_info = summary.get('stages_info', {})
+
+        last_minutes = metadata.get('aggregate_last_minutes')
+        stage_rows = []
+        aggregate_rows = []
+        for stage_num, stage_info in stages_info.items():
+            time_range = stage_info.get('time_range', {})
+            stage_rows.append((
+                name, int(stage_num), stage_info.get('row_count'),
+                time_range.get('start'), time_range.get('end'), time_range.get('duration')
+            ))
+            for col, stats in (stage_info.get('aggregates') or {}).items():
+                aggregate_rows.append(
+                    (name, int(stage_num), col) + tuple(stats.get(stat) for stat in AGGREGATE_STATS) + (last_minutes,)
+                )
+
+        # Stage folders without stages_info still count as stages
+        for stage_num in metadata.get('stage_numbers', []):
+            if str(stage_num) not in {str(key) for key in stages_info}:
+                stage_rows.append((name, int(stage_num), None, None, None, None))
+
+        starts = [row[3] for row in stage_rows if row[3] is not None]
+        ends = [row[4] for row in stage_rows if row[4] is not None]
+        start_minutes = min(starts) if starts else None
+        end_minutes = max(ends) if ends else None
+        column_mapping = summary.get('column_mapping', {})
+        columns = list(column_mapping.keys())
+        column_rows = [
+            (
+                col, name, info.get('dtype'), _number(info.get('non_null_count'), int),
+                _number(info.get('min')), _number(info.get('max')), _number(info.get('mean'))
+            )
+            for col, info in column_mapping.items()
+        ]
+
+        own_conn = conn is None
+        if own_conn:
+            conn = self.connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM experiments WHERE name = ?", (name,))
+                conn.execute(
+                    "INSERT INTO experiments (name, base_filename, processed_at, total_stages, total_rows, "
+                    "start_minutes, end_minutes, duration_minutes, columns, parameters, summary_mtime_ns) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        name,
+                        metadata.get('base_filename', name),
+                        metadata.get('processed_at'),
+                        metadata.get('total_stages', len(stage_rows)),
+                        sum(row[2] or 0 for row in stage_rows),
+                        start_minutes,
+                        end_minutes,
+                        end_minutes - start_minutes if start_minutes is not None and end_minutes is not None else None,
+                        json.dumps(columns),
+                        json.dumps(metadata.get('processing_parameters', {})),
+                        summary_mtime_ns
+                    )
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO stages (experiment, stage_num, row_count, start_minutes, end_minutes, duration_minutes) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    stage_rows
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO experiment_columns (experiment, column_name) VALUES (?, ?)",
+                    [(name, col) for col in columns]
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO column_index (column_name, experiment, dtype, non_null_count, min, max, mean) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    column_rows
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO stage_aggregates (experiment, stage_num, column_name, "
+                    "mean, min, max, std, count, last_mean, last_minutes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    aggregate_rows
+                )
+        finally:
+            if own_conn:
+                conn.close()
+
+    def remove_experiment(self, name):
+        """Remove an experiment and its stages from the catalog"""
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM experiments WHERE name = ?", (name,))
+        finally:
+            conn.close()
+
+    def refresh_experiment(self, reports_folder, name, conn=None):
+        """Re-read one experiment from disk. Returns False if it no longer exists."""
+        exp_dir = os.path.join(reports_folder, name)
+        if not os.path.isdir(exp_dir):
+            if conn is None:
+                self.remove_experiment(name)
+            else:
+                with conn:
+                    conn.execute("DELETE FROM experiments WHERE name = ?", (name,))
+            return False
+
+        summary, mtime_ns = read_summary(exp_dir)
+        if summary is None:
+            # Unprocessed or legacy experiment: only the stage folders are known
+            stage_numbers = []
+            for folder in os.listdir(exp_dir):
+                if folder.startswith('stage_'):
+                    try:
+                        stage_numbers.append(int(folder.split('_')[1]))
+                    except (IndexError, ValueError):
+                        continue
+            summary = {'metadata': {'stage_numbers': sorted(stage_numbers), 'total_stages': len(stage_numbers)}}
+        self.upsert_experiment(name, summary, mtime_ns, conn=conn)
+        return True
+
+    def sync(self, reports_folder):
+        """Bring the catalog in line with the reports folder, re-reading only changed summaries"""
+        counts = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+        if not os.path.isdir(reports_folder):
+            return counts
+
+        conn = self.connect()
+        try:
+            known = {
+                row['name']: row['summary_mtime_ns']
+                for row in conn.execute("SELECT name, summary_mtime_ns FROM experiments")
+            }
+            on_disk = set()
+            for entry in os.scandir(reports_folder):
+                if not entry.is_dir():
+                    continue
+                on_disk.add(entry.name)
+                try:
+                    mtime_ns = os.stat(os.path.join(entry.path, "experiment_summary.json")).st_mtime_ns
+                except OSError:
+                    mtime_ns = None
+                if entry.name in known and known[entry.name] == mtime_ns and mtime_ns is not None:
+                    counts['unchanged'] += 1
+                    continue
+                self.refresh_experiment(reports_folder, entry.name, conn=conn)
+                counts['updated' if entry.name in known else 'added'] += 1
+
+            for name in set(known) - on_disk:
+                with conn:
+                    conn.execute("DELETE FROM experiments WHERE name = ?", (name,))
+                counts['removed'] += 1
+        finally:
+            conn.close()
+        return counts
+
+    def rebuild(self, reports_folder):
+        """Drop every catalog row and re-read all experiments from disk"""
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM experiments")
+        finally:
+            conn.close()
+        return self.sync(reports_folder)
+
+    def _filter_clause(self, name_contains=None, processed_after=None, processed_before=None,
+                       has_columns=None, min_stages=None, max_stages=None):
+        where, params = [], []
+        if name_contains:
+            where.append("name LIKE ? ESCAPE '\\'")
+            escaped = name_contains.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        if processed_after:
+            where.append("processed_at >= ?")
+            params.append(processed_after)
+        if processed_before:
+            where.append("processed_at <= ?")
+            params.append(processed_before)
+        if min_stages is not None:
+            where.append("total_stages >= ?")
+            params.append(int(min_stages))
+        if max_stages is not None:
+            where.append("total_stages <= ?")
+            params.append(int(max_stages))
+        for col in has_columns or []:
+            where.append("name IN (SELECT experiment FROM experiment_columns WHERE column_name = ?)")
+            params.append(col)
+        return where, params
+
+    def count_experiments(self, **filters):
+        """Return the number of experiments matching the list_experiments() filters"""
+        where, params = self._filter_clause(**filters)
+        sql = "SELECT COUNT(*) FROM experiments"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        conn = self.connect()
+        try:
+            return conn.execute(sql, params).fetchone()[0]
+        finally:
+            conn.close()
+
+    def list_experiments(self, sort='name', descending=False, limit=None, offset=0, after=None, **filters):
+        """Return experiment rows matching the filters, using the catalog indexes.
+
+        Filters are name_contains, processed_after, processed_before,
+        has_columns, min_stages and max_stages. Pass after=(sort_value, name)
+        of the last row of a page to continue from it (keyset pagination)
+        instead of using offset.
+        """
+        where, params = self._filter_clause(**filters)
+
+        sort_expr = SORT_COLUMNS.get(sort, 'name')
+        direction = 'DESC' if descending else 'ASC'
+        if after is not None:
+            op = '<' if descending else '>'
+            where.append(f"({sort_expr} {op} ? OR ({sort_expr} = ? AND name {op} ?))")
+            params.extend([after[0], after[0], after[1]])
+
+        sql = "SELECT * FROM experiments"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {sort_expr} {direction}, name {direction}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([int(limit), int(offset)])
+
+        conn = self.connect()
+        try:
+            rows = [dict(row) for row in conn.execute(sql, params)]
+            stage_numbers = self._stage_numbers(conn, [row['name'] for row in rows])
+        finally:
+            conn.close()
+
+        for row in rows:
+            row['columns'] = json.loads(row['columns'])
+            row['parameters'] = json.loads(row['parameters'])
+            row['stage_numbers'] = stage_numbers.get(row['name'], [])
+        return rows
+
+    def get_stages(self, name):
+        """Return the stage rows of one experiment ordered by stage number"""
+        conn = self.connect()
+        try:
+            return [dict(row) for row in conn.execute(
+                "SELECT * FROM stages WHERE experiment = ? ORDER BY stage_num", (name,)
+            )]
+        finally:
+            conn.close()
+
+    def query_stage_aggregates(self, terms, conditions=(), group_by=None, agg='avg', limit=None):
+        """Query the per-stage aggregate table.
+
+        terms is a list of (stat, column) to return. conditions is a list of
+        (field, op, value) where field is (stat, column), 'experiment' (ops
+        =, != and ~ for "contains") or 'stage'. Without group_by there is one
+        row per matching stage; group_by 'experiment', 'stage' or 'all'
+        combines the matching stages with agg (avg, min, max, sum, count).
+        Only stages that have every selected term are included. Returns a
+        dict with the column names and the rows.
+        """
+        joins, join_params, where, where_params = [], [], [], []
+
+        def join_aggregate(alias, stat, col):
+            if stat not in AGGREGATE_STATS:
+                raise ValueError(f"Unknown statistic '{stat}'")
+            joins.append(
+                f"JOIN stage_aggregates {alias} ON {alias}.experiment = s.experiment "
+                f"AND {alias}.stage_num = s.stage_num AND {alias}.column_name = ?"
+            )
+            join_params.append(col)
+            return f"{alias}.{stat}"
+
+        selected = []
+        for i, (stat, col) in enumerate(terms):
+            expr = join_aggregate(f"t{i}", stat, col)
+            where.append(f"{expr} IS NOT NULL")
+            selected.append(expr)
+
+        for i, (field, op, value) in enumerate(conditions):
+            if op not in ('>=', '<=', '!=', '=', '>', '<', '~'):
+                raise ValueError(f"Unknown operator '{op}'")
+            if field == 'experiment' and op == '~':
+                escaped = str(value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                where.append("s.experiment LIKE ? ESCAPE '\\'")
+                where_params.append(f"%{escaped}%")
+                continue
+            if op == '~':
+                raise ValueError("~ only applies to experiment")
+            if field == 'experiment':
+                expr = "s.experiment"
+            elif field == 'stage':
+                expr = "s.stage_num"
+            else:
+                expr = join_aggregate(f"c{i}", *field)
+            where.append(f"{expr} {op} ?")
+            where_params.append(value)
+
+        labels = [f"{stat}({col})" for stat, col in terms]
+        if group_by is None:
+            columns = ['experiment', 'stage'] + labels
+            select_sql = ", ".join(["s.experiment", "s.stage_num"] + selected)
+            group_sql = ""
+            order_sql = " ORDER BY s.experiment, s.stage_num"
+        else:
+            if agg not in AGGREGATE_FUNCTIONS:
+                raise ValueError(f"Unknown aggregate '{agg}'")
+            group_keys = {'experiment': 's.experiment', 'stage': 's.stage_num', 'all': None}
+            if group_by not in group_keys:
+                raise ValueError(f"Unknown group_by '{group_by}'")
+            key = group_keys[group_by]
+            function = AGGREGATE_FUNCTIONS[agg]
+            columns = ([group_by] if key else []) + ['stages'] + [f"{agg}({label})" for label in labels]
+            select_sql = ", ".join(([key] if key else []) + ["COUNT(*)"] + [f"{function}({expr})" for expr in selected])
+            group_sql = f" GROUP BY {key}" if key else ""
+            order_sql = f" ORDER BY {key}" if key else ""
+
+        sql = f"SELECT {select_sql} FROM stages s " + " ".join(joins)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += group_sql + order_sql
+        params = join_params + where_params
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        conn = self.connect()
+        try:
+            rows = [list(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+        if group_by == 'all' and rows and rows[0][0] == 0:
+            rows = []
+        return {'columns': columns, 'rows': rows}
+
+    def list_columns(self, pattern=None):
+        """Return every indexed column with the number of experiments that have it and its overall range.
+
+        pattern is a GLOB pattern over column names.
+        """
+        sql = ("SELECT column_name, COUNT(*) AS experiments, MIN(min) AS min, MAX(max) AS max "
+               "FROM column_index")
+        params = []
+        if pattern:
+            sql += " WHERE column_name GLOB ?"
+            params.append(pattern)
+        sql += " GROUP BY column_name ORDER BY column_name"
+        conn = self.connect()
+        try:
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def find_experiments(self, present=(), conditions=(), limit=None):
+        """Find experiments by the columns they have and the ranges of those columns.
+
+        present is a list of GLOB patterns of which each must match a column
+        of the experiment. conditions is a list of (stat, pattern, op, value)
+        with stat min, max or mean over the whole experiment, e.g.
+        ('max', 'R-1/2 T* °C', '>', 600); some column matching pattern must
+        satisfy it. Returns one dict per experiment with the matched columns
+        and their ranges, and the stages where every condition also holds
+        (from stage_aggregates; None when the experiment has no aggregates).
+        """
+        where, params = [], []
+        for pattern in present:
+            where.append("name IN (SELECT experiment FROM column_index WHERE column_name GLOB ?)")
+            params.append(pattern)
+        for stat, pattern, op, value in conditions:
+            if stat not in ('min', 'max', 'mean'):
+                raise ValueError(f"Unknown statistic '{stat}'")
+            if op not in ('>=', '<=', '!=', '=', '>', '<'):
+                raise ValueError(f"Unknown operator '{op}'")
+            where.append(f"name IN (SELECT experiment FROM column_index WHERE column_name GLOB ? AND {stat} {op} ?)")
+            params.extend([pattern, value])
+
+        sql = "SELECT name FROM experiments"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY name"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        patterns = list(present) + [pattern for _, pattern, _, _ in conditions]
+        conn = self.connect()
+        try:
+            names = [row['name'] for row in conn.execute(sql, params)]
+            results = {name: {'experiment': name, 'columns': {}, 'stages': None} for name in names}
+
+            match_columns = " OR ".join("column_name GLOB ?" for _ in patterns) or "1"
+            for i in range(0, len(names), 500):
+                batch = names[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                for row in conn.execute(
+                    f"SELECT experiment, column_name, min, max FROM column_index "
+                    f"WHERE experiment IN ({placeholders}) AND ({match_columns}) ORDER BY column_name",
+                    batch + patterns
+                ):
+                    results[row['experiment']]['columns'][row['column_name']] = {'min': row['min'], 'max': row['max']}
+
+                if not conditions:
+                    continue
+                with_aggregates = {
+                    row['experiment'] for row in conn.execute(
+                        f"SELECT DISTINCT experiment FROM stage_aggregates WHERE experiment IN ({placeholders})", batch
+                    )
+                }
+                stage_sets = {name: None for name in with_aggregates}
+                for stat, pattern, op, value in conditions:
+                    matched = {}
+                    for row in conn.execute(
+                        f"SELECT DISTINCT experiment, stage_num FROM stage_aggregates "
+                        f"WHERE experiment IN ({placeholders}) AND column_name GLOB ? AND {stat} {op} ?",
+                        batch + [pattern, value]
+                    ):
+                        matched.setdefault(row['experiment'], set()).add(row['stage_num'])
+                    for name in with_aggregates:
+                        found = matched.get(name, set())
+                        stage_sets[name] = found if stage_sets[name] is None else stage_sets[name] & found
+                for name, stages in stage_sets.items():
+                    results[name]['stages'] = sorted(stages)
+        finally:
+            conn.close()
+        return list(results.values())
+
+    def _stage_numbers(self, conn, names):
+        stage_numbers = {}
+        # Stay below SQLite's bound-parameter limit on large archives
+        for i in range(0, len(names), 500):
+            batch = names[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            for row in conn.execute(
+                f"SELECT experiment, stage_num FROM stages WHERE experiment IN ({placeholders}) "
+                "ORDER BY experiment, stage_num", batch
+            ):
+                stage_numbers.setdefault(row['experiment'], []).append(row['stage_num'])
+        return stage_numbers
+
+
+def read_summary(exp_dir):
+    """Read experiment_summary.json. Returns (summary, mtime_ns) or (None, None)."""
+    summary_path = os.path.join(exp_dir, "experiment_summary.json")
+    try:
+        mtime_ns = os.stat(summary_path).st_mtime_ns
+        with open(summary_path, 'r') as f:
+            return json.load(f), mtime_ns
+    except (OSError, ValueError):
+        return None, None
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(reports_folder):
+    """Return the shared catalog for a reports folder"""
+    db_path = os.path.abspath(os.path.join(reports_folder, config.CATALOG_FILENAME))
+    with _catalogs_lock:
+        if db_path not in _catalogs:
+            _catalogs[db_path] = ExperimentCatalog(db_path)
+        return _catalogs[db_path]
@@ -0,0 +1,57 @@
+"""
+NH3 Cracking Processor and Visualizer - Column Index
+----------------------------------------------------
+Find experiments by the channels their loggers recorded and the ranges of
+those channels, e.g. every run with H2O out [%], or with a multipoint
+thermocouple above 600 °C.
+
+The index is the catalog's column_index table: one row per column and
+experiment, filled from the column_mapping of experiment_summary.json
+(create_column_mapping) with the dtype, count, min, max and mean of the
+column. It is updated with the rest of the catalog whenever an experiment
+is processed, and per-stage matches come from the stage_aggregates table.
+
+Column patterns use * and ? as wildcards; everything else, including the
+brackets of unit suffixes like [°C], is matched literally.
+"""
+try:
+    from .catalog import get_catalog
+    from .stage_aggregates import parse_condition
+except ImportError:
+    from catalog import get_catalog
+    from stage_aggregates import parse_condition
+
+INDEX_STATS = ('min', 'max', 'mean')
+
+
+def column_glob(pattern):
+    """Turn a column pattern with * and ? wildcards into an SQLite GLOB pattern"""
+    return pattern.strip().replace('[', '[[]')
+
+
+def parse_range_condition(text):
+    """Parse 'stat(pattern) op value' into (stat, glob, op, value) for find_experiments()"""
+    field, op, value = parse_condition(text)
+    if not isinstance(field, tuple) or field[0] not in INDEX_STATS:
+        raise ValueError(f"Invalid condition '{text}', expected min(column), max(column) or mean(column) "
+                         f"compared with a number")
+    return field[0], column_glob(field[1]), op, value
+
+
+def find_experiments(reports_folder, present=(), where=(), limit=None):
+    """Find experiments that have every column in present and satisfy every condition in where.
+
+    present holds column patterns and where holds text conditions like
+    'max(R-1/2 T* °C)>600'. See ExperimentCatalog.find_experiments() for the result.
+    """
+    if not present and not where:
+        raise ValueError("Give at least one column or condition")
+    conditions = [parse_range_condition(text) for text in where]
+    return get_catalog(reports_folder).find_experiments(
+        [column_glob(pattern) for pattern in present], conditions, limit
+    )
+
+
+def list_columns(reports_folder, pattern=None):
+    """Every indexed column matching pattern, with its experiment count and overall range"""
+    return get_catalog(reports_folder).list_columns(column_glob(pattern) if pattern else None)
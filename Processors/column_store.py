@@ -0,0 +1,342 @@
+"""
+NH3 Cracking Processor and Visualizer - Column Store
+----------------------------------------------------
+Compressed storage for the stage data of archived experiments. Processing
+keeps each stage as CSV and JSON, and the experiment again as a complete CSV
+and an all-stages JSON; archiving replaces these with one
+stage_N_data.colz file per stage.
+
+A .colz file stores every column in blocks of config.COLUMN_STORE_BLOCK_ROWS
+rows. Each block is run through a filter and compressed with zlib:
+
+- shuffle: the bytes of the values are regrouped by byte position, so the
+  sign/exponent bytes of similar values end up next to each other
+- xor_shuffle: every float64 is XORed with the previous one first, which
+  turns the shared leading bits of a slowly changing sensor or a regular time
+  axis into zeros (the choice between the two is made per column, whichever
+  compresses the first block better)
+- delta_shuffle: differences of consecutive integers (e.g. the Stage column)
+- json: other columns, as a JSON list
+
+The header holds the offset of every block and the Time_Minutes range of
+every block, so a read of a time window only decompresses the blocks that
+overlap it. Everything round-trips exactly, NaN included.
+
+File layout: the 8-byte magic, the header length as a little-endian uint64,
+the JSON header, then the compressed blocks.
+"""
+import os
+import json
+import zlib
+import struct
+
+import numpy as np
+import pandas as pd
+
+import config
+
+MAGIC = b'NH3COLS1'
+EXTENSION = 'colz'
+TIME_COLUMN = 'Time_Minutes'
+
+
+def stage_store_path(stage_dir, stage_num):
+    """Path of the column store of a stage"""
+    return os.path.join(stage_dir, f"stage_{stage_num}_data.{EXTENSION}")
+
+
+def _shuffle(values):
+    return np.ascontiguousarray(values).view(np.uint8).reshape(-1, values.dtype.itemsize).T.tobytes()
+
+
+def _unshuffle(data, dtype, rows):
+    dtype = np.dtype(dtype)
+    return np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, rows).T.copy().view(dtype).ravel()
+
+
+def _encode(values, filter_name, level):
+    if filter_name == 'json':
+        payload = json.dumps([None if value is None or value != value else value for value in values.tolist()])
+        return zlib.compress(payload.encode('utf-8'), level)
+    if filter_name == 'xor_shuffle':
+        bits = values.astype(np.float64).view(np.uint64)
+        values = bits.copy()
+        values[1:] ^= bits[:-1]
+    elif filter_name == 'delta_shuffle':
+        values = np.diff(values.astype(np.int64), prepend=np.int64(0))
+    return zlib.compress(_shuffle(values), level)
+
+
+def _decode(data, filter_name, dtype, rows):
+    data = zlib.decompress(data)
+    if filter_name == 'json':
+        return np.array(json.loads(data.decode('utf-8')), dtype=object)
+    if filter_name == 'xor_shuffle':
+        return np.bitwise_xor.accumulate(_unshuffle(data, np.uint64, rows)).view(np.float64)
+    if filter_name == 'delta_shuffle':
+        return np.cumsum(_unshuffle(data, np.int64, rows)).astype(dtype)
+    return _unshuffle(data, dtype, rows)
+
+
+def _column_kind(series):
+    """(dtype name, candidate filters) for a column"""
+    kind = series.dtype.kind
+    if kind == 'f':
+        return 'float64', ('shuffle', 'xor_shuffle')
+    if kind in 'iu':
+        return 'int64', ('delta_shuffle', 'shuffle')
+    if kind == 'b':
+        return 'bool', ('shuffle',)
+    return 'object', ('json',)
+
+
+def write_store(path, df, block_rows=None, level=None):
+    """Write df as a column store at path (atomically). Returns the file size."""
+    block_rows = block_rows or config.COLUMN_STORE_BLOCK_ROWS
+    level = config.COLUMN_STORE_COMPRESSION_LEVEL if level is None else level
+    rows = len(df)
+    starts = list(range(0, rows, block_rows)) or [0]
+
+    header = {'rows': rows, 'block_rows': block_rows, 'columns': [], 'time_index': None}
+    chunks = []
+    offset = 0
+    for name in df.columns:
+        series = df[name]
+        dtype, filters = _column_kind(series)
+        values = series.to_numpy(dtype=None if dtype == 'object' else dtype)
+
+        # Choose the filter that compresses the first block best
+        first = values[:block_rows]
+        filter_name = min(filters, key=lambda candidate: len(_encode(first, candidate, level)))
+
+        blocks = []
+        for start in starts:
+            data = _encode(values[start:start + block_rows], filter_name, level)
+            blocks.append([offset, len(data)])
+            chunks.append(data)
+            offset += len(data)
+        header['columns'].append({'name': name, 'dtype': dtype, 'filter': filter_name, 'blocks': blocks})
+
+    if TIME_COLUMN in df.columns and df[TIME_COLUMN].dtype.kind == 'f':
+        times = df[TIME_COLUMN].to_numpy(dtype=np.float64)
+        index = []
+        for start in starts:
+            block = times[start:start + block_rows]
+            block = block[~np.isnan(block)]
+            index.append([float(block.min()), float(block.max())] if len(block) else None)
+        header['time_index'] = index
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for data in chunks:
+            f.write(data)
+    os.replace(temp_path, path)
+    return os.path.getsize(path)
+
+
+class ColumnStore:
+    """Reader for a .colz file; only the header is read when it is opened"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            if self._file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a column store")
+            (length,) = struct.unpack('<Q', self._file.read(8))
+            self.header = json.loads(self._file.read(length).decode('utf-8'))
+        except Exception:
+            self._file.close()
+            raise
+        self._data_start = len(MAGIC) + 8 + length
+        self._columns = {column['name']: column for column in self.header['columns']}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def rows(self):
+        return self.header['rows']
+
+    def block_range(self, t0=None, t1=None):
+        """Indices of the blocks that can hold rows with t0 <= Time_Minutes <= t1"""
+        count = len(self.header['columns'][0]['blocks']) if self.header['columns'] else 0
+        index = self.header['time_index']
+        if index is None or (t0 is None and t1 is None):
+            return list(range(count))
+        return [
+            i for i, bounds in enumerate(index)
+            if bounds is not None and (t0 is None or bounds[1] >= t0) and (t1 is None or bounds[0] <= t1)
+        ]
+
+    def read_block(self, name, block):
+        """Values of one block of a column"""
+        column = self._columns[name]
+        offset, length = column['blocks'][block]
+        self._file.seek(self._data_start + offset)
+        rows = min(self.header['block_rows'], self.rows - block * self.header['block_rows'])
+        values = _decode(self._file.read(length), column['filter'], column['dtype'], max(rows, 0))
+        return values
+
+    def iter_frames(self, columns=None, t0=None, t1=None):
+        """Yield one DataFrame per block in the window, with the given columns (default all) present in the store"""
+        names = [name for name in (columns or self.columns) if name in self._columns]
+        window = (t0 is not None or t1 is not None) and TIME_COLUMN in self._columns
+        for block in self.block_range(t0, t1):
+            frame = pd.DataFrame({name: self.read_block(name, block) for name in names}, copy=False)
+            if window:
+                times = frame[TIME_COLUMN] if TIME_COLUMN in frame else pd.Series(self.read_block(TIME_COLUMN, block))
+                mask = np.ones(len(frame), dtype=bool)
+                if t0 is not None:
+                    mask &= (times >= t0).to_numpy()
+                if t1 is not None:
+                    mask &= (times <= t1).to_numpy()
+                if not mask.all():
+                    frame = frame[mask].reset_index(drop=True)
+            yield frame
+
+    def read(self, columns=None, t0=None, t1=None):
+        """DataFrame with the given columns (default all) and the rows in the time window"""
+        frames = list(self.iter_frames(columns, t0, t1))
+        if not frames:
+            names = [name for name in (columns or self.columns) if name in self._columns]
+            return pd.DataFrame({name: pd.Series(dtype=self._columns[name]['dtype']) for name in names})
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def read_stage_frame(stage_dir, stage_num, columns=None):
+    """Stage data from the stage CSV file, or from the column store of an archived experiment"""
+    csv_path = os.path.join(stage_dir, f"stage_{stage_num}_data.csv")
+    if os.path.exists(csv_path):
+        return pd.read_csv(csv_path, usecols=lambda name: columns is None or name in columns,
+                           float_precision='round_trip')
+    store_path = stage_store_path(stage_dir, stage_num)
+    if os.path.exists(store_path):
+        with ColumnStore(store_path) as store:
+            return store.read(columns)
+    raise FileNotFoundError(f"No stage data for stage {stage_num} in {stage_dir}")
+
+
+def _stage_numbers(exp_dir):
+    stage_numbers = []
+    for entry in os.scandir(exp_dir):
+        if entry.name.startswith('stage_') and entry.is_dir():
+            try:
+                stage_numbers.append(int(entry.name[len('stage_'):]))
+            except ValueError:
+                continue
+    return sorted(stage_numbers)
+
+
+def _remove(paths):
+    removed = 0
+    for path in paths:
+        if os.path.exists(path):
+            removed += os.path.getsize(path)
+            os.remove(path)
+    return removed
+
+
+def archive_experiment(reports_folder, name, keep_sources=False, block_rows=None):
+    """Move the stage data of an experiment into column stores.
+
+    Each stage is read from its CSV file (full precision), written to
+    stage_N_data.colz and read back for comparison. Unless keep_sources is
+    set, the stage CSV and JSON files and the complete CSV and all-stages JSON
+    are then deleted; plots and the summary stay. Returns a dict with the
+    stages archived and the bytes of data files before and after.
+    """
+    exp_dir = os.path.join(reports_folder, name)
+    if not os.path.isdir(exp_dir):
+        raise FileNotFoundError(f"Experiment '{name}' not found")
+
+    result = {'experiment': name, 'stages': 0, 'bytes_before': 0, 'bytes_after': 0}
+    sources = []
+    for stage_num in _stage_numbers(exp_dir):
+        stage_dir = os.path.join(exp_dir, f"stage_{stage_num}")
+        csv_path = os.path.join(stage_dir, f"stage_{stage_num}_data.csv")
+        json_path = os.path.join(stage_dir, f"stage_{stage_num}_data.json")
+        store_path = stage_store_path(stage_dir, stage_num)
+        if not os.path.exists(csv_path):
+            # Already archived
+            if os.path.exists(store_path):
+                result['bytes_after'] += os.path.getsize(store_path)
+            continue
+
+        df = pd.read_csv(csv_path, float_precision='round_trip')
+        size = write_store(store_path, df, block_rows)
+        with ColumnStore(store_path) as store:
+            if not store.read().equals(df):
+                os.remove(store_path)
+                raise ValueError(f"Stage {stage_num} of '{name}' did not read back identically; left unarchived")
+        result['stages'] += 1
+        result['bytes_after'] += size
+        sources += [csv_path, json_path]
+
+    if sources:
+        sources += [os.path.join(exp_dir, f"{name}_complete.csv"), os.path.join(exp_dir, f"{name}_all_stages.json")]
+    result['bytes_before'] = sum(os.path.getsize(path) for path in sources if os.path.exists(path))
+    if not keep_sources:
+        _remove(sources)
+    return result
+
+
+def restore_experiment(reports_folder, name):
+    """Write the stage CSV and JSON files, the complete CSV and the all-stages JSON back from the column stores.
+
+    The column stores are kept. Returns the number of stages restored.
+    """
+    try:
+        from .Main_Web_ProcessorNH3Crack import CustomJSONEncoder
+        from .precision import column_values
+        from .catalog import read_summary
+    except ImportError:
+        from Main_Web_ProcessorNH3Crack import CustomJSONEncoder
+        from precision import column_values
+        from catalog import read_summary
+
+    exp_dir = os.path.join(reports_folder, name)
+    if not os.path.isdir(exp_dir):
+        raise FileNotFoundError(f"Experiment '{name}' not found")
+
+    stages = {}
+    for stage_num in _stage_numbers(exp_dir):
+        stage_dir = os.path.join(exp_dir, f"stage_{stage_num}")
+        store_path = stage_store_path(stage_dir, stage_num)
+        if not os.path.exists(store_path):
+            continue
+        with ColumnStore(store_path) as store:
+            stages[stage_num] = store.read()
+    if not stages:
+        return 0
+
+    all_stages_data = {}
+    for stage_num, stage_df in stages.items():
+        stage_dir = os.path.join(exp_dir, f"stage_{stage_num}")
+        stage_df.to_csv(os.path.join(stage_dir, f"stage_{stage_num}_data.csv"), index=False)
+        stage_data = {col: column_values(stage_df[col]) for col in stage_df.columns}
+        with open(os.path.join(stage_dir, f"stage_{stage_num}_data.json"), 'w') as f:
+            json.dump(stage_data, f, indent=2, cls=CustomJSONEncoder)
+        all_stages_data[f"stage_{stage_num}"] = stage_data
+
+    pd.concat([df.assign(Stage_ID=stage) for stage, df in stages.items()]).to_csv(
+        os.path.join(exp_dir, f"{name}_complete.csv"), index=False
+    )
+    summary, _ = read_summary(exp_dir)
+    with open(os.path.join(exp_dir, f"{name}_all_stages.json"), 'w') as f:
+        json.dump({'summary': summary or {}, 'data': all_stages_data}, f, indent=2, cls=CustomJSONEncoder)
+    return len(stages)
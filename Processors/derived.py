@@ -0,0 +1,155 @@
+"""
+NH3 Cracking Processor and Visualizer - Derived Columns
+-------------------------------------------------------
+Columns computed from the measured ones, such as NH3 conversion, H2 yield,
+the pressure drop over the reactor and the space velocity. They are defined
+as expressions in config.DERIVED_COLUMNS, with measured (or earlier derived)
+columns written in braces and named constants from config.DERIVED_CONSTANTS:
+
+    'R1/2 ΔP [bar]': '{Pressure reading R1/2 IN [bar]} - {Pressure reading R1/2 OUT [bar]}'
+
+Each expression is parsed once, checked against a whitelist of arithmetic,
+comparisons and numpy functions, and compiled; evaluating it works on whole
+numpy arrays. The processor adds the derived columns to the interpolated data
+before it is split into stages, so they are saved, plotted, aggregated and
+indexed like the measured columns.
+"""
+import ast
+import re
+
+import numpy as np
+
+import config
+
+COLUMN_REFERENCE = re.compile(r'\{([^{}]+)\}')
+
+FUNCTIONS = {
+    'abs': np.abs,
+    'sqrt': np.sqrt,
+    'exp': np.exp,
+    'log': np.log,
+    'log10': np.log10,
+    'minimum': np.minimum,
+    'maximum': np.maximum,
+    'clip': np.clip,
+    'where': np.where
+}
+
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.UAdd, ast.USub,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq, ast.BitAnd, ast.BitOr, ast.Invert
+)
+
+
+class DerivedColumn:
+    """One compiled derived-column expression"""
+
+    def __init__(self, name, expression, constants):
+        self.name = name
+        self.expression = expression
+        self.columns = []
+
+        def reference(match):
+            column = match.group(1).strip()
+            if column not in self.columns:
+                self.columns.append(column)
+            return f"_c{self.columns.index(column)}"
+
+        source = COLUMN_REFERENCE.sub(reference, expression)
+        try:
+            tree = ast.parse(source.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Derived column '{name}': invalid expression ({e.msg})")
+
+        placeholders = {f"_c{i}" for i in range(len(self.columns))}
+        self.constants = {}
+        for node in ast.walk(tree):
+            if not isinstance(node, ALLOWED_NODES):
+                raise ValueError(f"Derived column '{name}': {type(node).__name__} is not allowed")
+            if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+                raise ValueError(f"Derived column '{name}': only numeric constants are allowed")
+            if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS):
+                raise ValueError(f"Derived column '{name}': only {', '.join(FUNCTIONS)} can be called")
+            if isinstance(node, ast.Call) and node.keywords:
+                raise ValueError(f"Derived column '{name}': keyword arguments are not allowed")
+            if isinstance(node, ast.Name) and node.id not in placeholders and node.id not in FUNCTIONS:
+                if node.id not in constants:
+                    raise ValueError(f"Derived column '{name}': unknown name '{node.id}'")
+                self.constants[node.id] = float(constants[node.id])
+        if not self.columns:
+            raise ValueError(f"Derived column '{name}': the expression uses no columns")
+        self.code = compile(tree, f"<derived {name}>", 'eval')
+
+    def evaluate(self, frame):
+        """Compute the column from frame (a DataFrame or dict of arrays) as a float64 array.
+
+        Division by zero and other invalid results become NaN.
+        """
+        namespace = dict(FUNCTIONS, **self.constants)
+        for i, column in enumerate(self.columns):
+            namespace[f"_c{i}"] = np.asarray(frame[column], dtype=np.float64)
+        with np.errstate(all='ignore'):
+            values = eval(self.code, {'__builtins__': {}}, namespace)
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 0:
+            values = np.full(len(namespace['_c0']), float(values))
+        values[~np.isfinite(values)] = np.nan
+        return values
+
+
+def compile_derived_columns(definitions, constants=None):
+    """Compile {name: expression} into a list of DerivedColumn, in definition order"""
+    constants = config.DERIVED_CONSTANTS if constants is None else constants
+    return [DerivedColumn(name, expression, constants) for name, expression in definitions.items()]
+
+
+_compiled = None
+
+
+def get_derived_columns():
+    """The compiled config.DERIVED_COLUMNS, compiled on first use"""
+    global _compiled
+    if _compiled is None:
+        _compiled = compile_derived_columns(config.DERIVED_COLUMNS)
+    return _compiled
+
+
+def derived_column_names():
+    """Names of the configured derived columns"""
+    return list(config.DERIVED_COLUMNS)
+
+
+def add_derived_columns(df, derived=None):
+    """Add every derived column whose inputs are all present to df, in place.
+
+    Derived columns can use the ones defined before them. Returns the names added.
+    """
+    derived = get_derived_columns() if derived is None else derived
+    added = []
+    for column in derived:
+        if all(name in df.columns for name in column.columns):
+            df[column.name] = column.evaluate(df)
+            added.append(column.name)
+    return added
+
+
+def add_missing_derived_columns(df):
+    """Add the derived columns df doesn't have yet, e.g. for data processed before they were defined"""
+    return add_derived_columns(df, [column for column in get_derived_columns() if column.name not in df.columns])
+
+
+def source_columns(names, derived=None):
+    """The measured columns needed to compute names, including the inputs of derived ones they use"""
+    derived = {column.name: column for column in (get_derived_columns() if derived is None else derived)}
+    needed = []
+
+    def visit(name):
+        if name in derived:
+            for dependency in derived[name].columns:
+                visit(dependency)
+        elif name not in needed:
+            needed.append(name)
+    for name in names:
+        visit(name)
+    return needed
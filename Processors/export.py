@@ -0,0 +1,232 @@
+"""
+NH3 Cracking Processor and Visualizer - Data Export
+---------------------------------------------------
+Streams selected columns, stages and a time window of an experiment as CSV
+(optionally gzip-compressed) or Parquet.
+
+Rows are read from the stage CSV files with pandas in chunks of
+config.EXPORT_CHUNK_ROWS, reading only the requested columns, and each chunk
+is encoded and handed out before the next one is read, so memory use is
+bounded by the chunk size rather than the experiment size. Stages outside the
+time window are skipped using the time ranges in the catalog, and reading a
+stage stops at the first chunk past the end of the window. Archived
+experiments are read from their column stores, one block at a time.
+
+Parquet output needs pyarrow, which is optional.
+"""
+import os
+import csv
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import config
+
+try:
+    from .catalog import get_catalog
+    from .derived import get_derived_columns, add_missing_derived_columns, source_columns
+    from .column_store import ColumnStore, stage_store_path
+except ImportError:
+    from catalog import get_catalog
+    from derived import get_derived_columns, add_missing_derived_columns, source_columns
+    from column_store import ColumnStore, stage_store_path
+
+FORMATS = ('csv', 'parquet')
+
+TIME_COLUMN = 'Time_Minutes'
+STAGE_COLUMN = 'Stage_ID'
+
+
+def parquet_available():
+    """Whether pyarrow is installed"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _read_header(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), [])
+
+
+class _DrainableSink:
+    """Write-only file whose contents are taken out with drain() while the position keeps counting,
+    so the Parquet writer's offsets stay valid"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+class ExportRequest:
+    """A validated export: the stage files to read, the output columns and the time window"""
+
+    def __init__(self, reports_folder, experiment_name, columns=None, stages=None, t0=None, t1=None, fmt='csv'):
+        if fmt not in FORMATS:
+            raise ValueError(f"Invalid format '{fmt}', expected one of {', '.join(FORMATS)}")
+        if fmt == 'parquet' and not parquet_available():
+            raise ValueError("Parquet export needs pyarrow, which is not installed")
+        if t0 is not None and t1 is not None and t1 < t0:
+            raise ValueError("t1 must not be before t0")
+
+        exp_dir = os.path.join(reports_folder, experiment_name)
+        if not os.path.isdir(exp_dir):
+            raise FileNotFoundError(f"Experiment '{experiment_name}' not found")
+
+        # Time ranges from the catalog let stages outside the window be skipped unopened
+        ranges = {
+            row['stage_num']: (row['start_minutes'], row['end_minutes'])
+            for row in get_catalog(reports_folder).get_stages(experiment_name)
+        }
+        self.files = []
+        available = []
+        for entry in sorted(os.scandir(exp_dir), key=lambda entry: entry.name):
+            if not (entry.name.startswith('stage_') and entry.is_dir()):
+                continue
+            try:
+                stage_num = int(entry.name[len('stage_'):])
+            except ValueError:
+                continue
+            if stages is not None and stage_num not in stages:
+                continue
+            path = os.path.join(entry.path, f"stage_{stage_num}_data.csv")
+            if os.path.exists(path):
+                header = _read_header(path)
+            else:
+                path = stage_store_path(entry.path, stage_num)
+                if not os.path.exists(path):
+                    continue
+                with ColumnStore(path) as store:
+                    header = store.columns
+            available.extend(col for col in header if col not in available)
+            start, end = ranges.get(stage_num, (None, None))
+            if (t0 is not None and end is not None and end < t0) or (t1 is not None and start is not None and start > t1):
+                continue
+            self.files.append((stage_num, path, header))
+        self.files.sort()
+        # Derived columns missing from older stage files are computed from their inputs
+        for derived in get_derived_columns():
+            if derived.name not in available and all(col in available for col in derived.columns):
+                available.append(derived.name)
+
+        if columns:
+            unknown = [col for col in columns if col not in available and col != STAGE_COLUMN]
+            if unknown:
+                raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+            data_columns = [col for col in columns if col not in (TIME_COLUMN, STAGE_COLUMN)]
+        else:
+            data_columns = [col for col in available if col != TIME_COLUMN]
+        self.columns = [STAGE_COLUMN, TIME_COLUMN] + data_columns
+        self.experiment_name = experiment_name
+        self.t0 = t0
+        self.t1 = t1
+        self.fmt = fmt
+
+    def frames(self, chunk_rows=None):
+        """Yield DataFrames of at most chunk_rows rows with the output columns"""
+        chunk_rows = chunk_rows or config.EXPORT_CHUNK_ROWS
+        sources = set(source_columns(self.columns[2:]))
+        for stage_num, path, header in self.files:
+            wanted = [col for col in header if col in self.columns or col in sources]
+            derive = any(col not in header for col in self.columns[2:])
+            for chunk in self._read_chunks(path, wanted, chunk_rows):
+                if derive:
+                    add_missing_derived_columns(chunk)
+                times = chunk[TIME_COLUMN]
+                mask = np.ones(len(chunk), dtype=bool)
+                if self.t0 is not None:
+                    mask &= (times >= self.t0).to_numpy()
+                if self.t1 is not None:
+                    mask &= (times <= self.t1).to_numpy()
+                if mask.any():
+                    chunk = chunk[mask].assign(**{STAGE_COLUMN: stage_num})
+                    yield chunk.reindex(columns=self.columns)
+                # Stage data is sorted by time, nothing later in this file is in the window
+                if self.t1 is not None and len(times) and times.iloc[-1] > self.t1:
+                    break
+
+    def _read_chunks(self, path, columns, chunk_rows):
+        if not path.endswith('.csv'):
+            # Column store blocks are already bounded in size and only those in the window are read
+            with ColumnStore(path) as store:
+                yield from store.iter_frames(columns, self.t0, self.t1)
+            return
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+
+    def iter_csv(self, compress=False):
+        """Yield the export as CSV bytes, gzip-compressed when compress is set"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        header = True
+        for frame in self.frames():
+            data = frame.to_csv(index=False, header=header).encode('utf-8')
+            header = False
+            if compressor is not None:
+                data = compressor.compress(data)
+            if data:
+                yield data
+        if header:
+            # No rows in the window, still send the header
+            data = pd.DataFrame(columns=self.columns).to_csv(index=False).encode('utf-8')
+            yield compressor.compress(data) if compressor is not None else data
+        if compressor is not None:
+            yield compressor.flush()
+
+    def iter_parquet(self):
+        """Yield the export as a Parquet file, one row group per chunk"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        fields = [pa.field(STAGE_COLUMN, pa.int64())]
+        fields += [pa.field(col, pa.float64()) for col in self.columns[1:]]
+        schema = pa.schema(fields)
+        sink = _DrainableSink()
+        with pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema, compression='snappy') as writer:
+            for frame in self.frames():
+                values = {STAGE_COLUMN: frame[STAGE_COLUMN].astype('int64')}
+                for col in self.columns[1:]:
+                    values[col] = pd.to_numeric(frame[col], errors='coerce').astype('float64')
+                writer.write_table(pa.Table.from_pydict(values, schema=schema))
+                data = sink.drain()
+                if data:
+                    yield data
+        yield sink.drain()
+
+    def iter_bytes(self, compress=False):
+        """Yield the export in the requested format"""
+        if self.fmt == 'parquet':
+            return self.iter_parquet()
+        return self.iter_csv(compress)
+
+    def filename(self, compress=False):
+        """Download filename of the export"""
+        name = f"{self.experiment_name}_export.{self.fmt}"
+        return name + '.gz' if compress and self.fmt == 'csv' else name
+
+    def mimetype(self, compress=False):
+        """Content type of the export"""
+        if self.fmt == 'parquet':
+            return 'application/vnd.apache.parquet'
+        return 'application/gzip' if compress else 'text/csv'
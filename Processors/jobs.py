@@ -0,0 +1,432 @@
+"""
+NH3 Cracking Processor and Visualizer - Background Jobs
+-------------------------------------------------------
+Local job subsystem for the heavy processing routes. Jobs run on a persistent
+pool of worker processes that import numpy, pandas and scipy once at startup,
+so submitting returns immediately and each job starts warm.
+
+Workers report progress through a shared queue that a pump thread in the web
+process folds into the job records. Finished jobs are kept for
+config.JOB_RESULT_TTL_SECONDS so their status and results can still be read.
+"""
+import os
+import sys
+import time
+import uuid
+import atexit
+import logging
+import threading
+import traceback
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Queue that tasks report progress to; set in the web process and in every worker
+_progress_queue = None
+
+# Cap on the progress events kept per job
+MAX_JOB_EVENTS = 5000
+
+
+def _init_worker(progress_queue):
+    """Worker initializer: keep the progress queue and import the numeric stack once"""
+    global _progress_queue
+    _progress_queue = progress_queue
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import scipy.interpolate  # noqa: F401
+
+
+@contextmanager
+def _spawning_workers():
+    """Have processes started in this block import this module as their __main__.
+
+    spawn re-runs the parent's __main__ in every new process. Under
+    `python app.py` that is the web app, which would build its own job and
+    upload managers and log handlers in each worker.
+    """
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = sys.modules[__name__]
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+
+def _noop(job_id=None):
+    """Task used to start and warm up worker processes"""
+    return os.getpid()
+
+
+def report_progress(job_id, **fields):
+    """Publish a progress event for a job from inside a task"""
+    if _progress_queue is not None and job_id is not None:
+        fields.setdefault('time', time.time())
+        _progress_queue.put((job_id, fields))
+
+
+def process_files_task(job_id, upload_folder, reports_folder, filenames, incremental=False):
+    """Run the processing pipeline for a list of uploaded files.
+
+    With incremental=True, files the processing manifest reports as up to date are skipped.
+    """
+    try:
+        from Processors import ExperimentalDataProcessor
+        from Processors.manifest import ProcessingManifest
+    except ImportError:
+        from Main_Web_ProcessorNH3Crack import ExperimentalDataProcessor
+        from manifest import ProcessingManifest
+
+    processor = ExperimentalDataProcessor(input_folder=upload_folder, output_folder=reports_folder)
+    manifest = ProcessingManifest(upload_folder, reports_folder, processor.get_processing_parameters())
+    processed_files = []
+    skipped_files = []
+    errors = []
+    step_times = []
+
+    for i, filename in enumerate(filenames):
+        def forward(event, i=i, filename=filename):
+            # Scale the per-file progress to the whole job
+            report_progress(job_id, **dict(
+                event, state='running', file=filename,
+                progress=(i + event['progress']) / len(filenames),
+                message=f"{filename} ({i + 1}/{len(filenames)}): {event['message']}"
+            ))
+
+        processor.progress_callback = forward
+        report_progress(job_id, state='running', progress=i / len(filenames),
+                        message=f"Processing {filename} ({i + 1}/{len(filenames)})")
+        try:
+            if incremental:
+                needed, reason = manifest.check(filename)
+                if not needed:
+                    skipped_files.append(filename)
+                    continue
+                logger.info(f"Processing {filename}: {reason}")
+            manifest.mark_started(filename)
+            if processor.process_file(filename):
+                manifest.mark_complete(filename)
+                processed_files.append(filename)
+                step_times.append(processor.step_timer.steps)
+            else:
+                manifest.mark_failed(filename, "Could not read file")
+                errors.append({"file": filename, "error": "Could not read file"})
+        except Exception as e:
+            logger.error(f"Error processing {filename}: {e}")
+            errors.append({"file": filename, "error": str(e)})
+            try:
+                manifest.mark_failed(filename, e)
+            except OSError:
+                pass
+
+    return {
+        "processed_files": processed_files,
+        "skipped_files": skipped_files,
+        "errors": errors,
+        "experiments": [os.path.splitext(name)[0] for name in processed_files],
+        "step_times": step_times
+    }
+
+
+def process_upload_task(job_id, upload_folder, reports_folder, filename, parsed_path=None):
+    """Process an uploaded file whose data was parsed while it was being received.
+
+    parsed_path is the pickled DataFrame written by UploadManager.complete; it
+    is removed once loaded. Without it, or if it can't be read, the file is
+    read from the uploads folder as usual.
+    """
+    try:
+        from Processors import ExperimentalDataProcessor
+        from Processors.manifest import ProcessingManifest
+    except ImportError:
+        from Main_Web_ProcessorNH3Crack import ExperimentalDataProcessor
+        from manifest import ProcessingManifest
+
+    df = None
+    if parsed_path is not None:
+        import pandas as pd
+        try:
+            df = pd.read_pickle(parsed_path)
+        except Exception as e:
+            logger.warning(f"Reading {filename} from disk, parsed data unavailable: {e}")
+        finally:
+            try:
+                os.remove(parsed_path)
+            except OSError:
+                pass
+
+    processor = ExperimentalDataProcessor(input_folder=upload_folder, output_folder=reports_folder)
+    processor.progress_callback = lambda event: report_progress(job_id, **dict(event, state='running', file=filename))
+    manifest = ProcessingManifest(upload_folder, reports_folder, processor.get_processing_parameters())
+
+    manifest.mark_started(filename)
+    try:
+        if df is not None:
+            success = processor.process_dataframe(df, filename)
+        else:
+            success = processor.process_file(filename)
+        if not success:
+            raise ValueError(f"Could not read {filename}")
+    except Exception as e:
+        manifest.mark_failed(filename, e)
+        raise
+    manifest.mark_complete(filename)
+
+    return {
+        "processed_files": [filename],
+        "skipped_files": [],
+        "errors": [],
+        "experiments": [os.path.splitext(filename)[0]],
+        "step_times": [processor.step_timer.steps],
+        "streamed": df is not None
+    }
+
+
+def regenerate_visualizations_task(job_id, upload_folder, reports_folder, experiment_name):
+    """Regenerate the Plotly JSON files of one experiment from its stage data.
+
+    Stages are handled one after another in this worker rather than on a
+    pool of its own; parallelism comes from the job pool.
+    """
+    try:
+        from Processors.plot_regeneration import regenerate_experiment
+    except ImportError:
+        from plot_regeneration import regenerate_experiment
+
+    report_progress(job_id, state='running', progress=0.0, message=f"Regenerating plots for {experiment_name}")
+    result = regenerate_experiment(
+        reports_folder, experiment_name, upload_folder, workers=1,
+        progress=lambda done, total, message: report_progress(
+            job_id, state='running', progress=done / total, message=message
+        )
+    )
+    return {
+        "experiments": [experiment_name],
+        "stage_count": result['stage_count'],
+        "stages_loaded": result['stages_loaded'],
+        "overall_plots": result['overall_plots'],
+        "seconds": result['seconds'],
+        "errors": result['errors']
+    }
+
+
+class Job:
+    """State of one submitted job"""
+
+    def __init__(self, kind, description, key=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.description = description
+        self.state = 'queued'
+        self.progress = 0.0
+        self.message = 'Queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self.future = None
+        self.key = key
+
+    @property
+    def finished(self):
+        return self.state in ('succeeded', 'failed')
+
+    def to_dict(self, include_events=False):
+        data = {
+            'id': self.id,
+            'kind': self.kind,
+            'description': self.description,
+            'state': self.state,
+            'progress': self.progress,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if include_events:
+            data['events'] = list(self.events)
+        return data
+
+
+class JobManager:
+    """Submit tasks to a persistent process pool and track their state"""
+
+    def __init__(self, max_workers=2, result_ttl=3600):
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self._jobs = {}
+        self._condition = threading.Condition()
+        self._executor = None
+        self._context = multiprocessing.get_context('spawn')
+        self._queue = self._context.Queue()
+        self._pump = None
+        self._completion_hooks = []
+        atexit.register(self.shutdown)
+
+    def _ensure_started(self):
+        global _progress_queue
+        if self._executor is None:
+            _progress_queue = self._queue
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=self._context,
+                initializer=_init_worker,
+                initargs=(self._queue,)
+            )
+        if self._pump is None:
+            self._pump = threading.Thread(target=self._pump_progress, name='job-progress', daemon=True)
+            self._pump.start()
+
+    def warm_up(self):
+        """Start every worker process now instead of on the first submitted job"""
+        with self._condition:
+            self._ensure_started()
+            executor = self._executor
+        with _spawning_workers():
+            for _ in range(self.max_workers):
+                executor.submit(_noop)
+
+    def on_complete(self, hook):
+        """Register hook(job) to run in the web process when a job finishes"""
+        self._completion_hooks.append(hook)
+
+    def submit(self, kind, description, task, *args):
+        """Submit task(job_id, *args) to the worker pool and return the Job"""
+        # An identical job that hasn't finished yet is returned instead of queuing a duplicate
+        key = (kind, task.__name__, repr(args))
+        job = Job(kind, description, key)
+        with self._condition:
+            self._prune()
+            for existing in self._jobs.values():
+                if existing.key == key and not existing.finished:
+                    return existing
+            self._ensure_started()
+            self._jobs[job.id] = job
+            # The pool starts worker processes on demand while submitting
+            with _spawning_workers():
+                try:
+                    job.future = self._executor.submit(task, job.id, *args)
+                except BrokenProcessPool:
+                    logger.warning("Job worker pool was broken, starting a new one")
+                    self._executor = None
+                    self._ensure_started()
+                    job.future = self._executor.submit(task, job.id, *args)
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    def _finish(self, job, future):
+        with self._condition:
+            try:
+                job.result = future.result()
+                job.state = 'succeeded'
+                job.progress = 1.0
+                job.message = 'Completed'
+            except Exception as e:
+                job.state = 'failed'
+                job.error = ''.join(traceback.format_exception_only(type(e), e)).strip()
+                job.message = f"Failed: {e}"
+            job.finished_at = time.time()
+            if job.started_at is None:
+                job.started_at = job.finished_at
+            job.events.append({'state': job.state, 'progress': job.progress, 'message': job.message,
+                               'time': job.finished_at})
+            self._condition.notify_all()
+
+        for hook in self._completion_hooks:
+            try:
+                hook(job)
+            except Exception as e:
+                logger.error(f"Error in job completion hook for {job.id}: {e}")
+
+    def _pump_progress(self):
+        while True:
+            try:
+                job_id, fields = self._queue.get()
+            except (EOFError, OSError):
+                return
+            with self._condition:
+                job = self._jobs.get(job_id)
+                # Progress can still be queued when the job's final event has been added
+                if job is None or job.finished:
+                    continue
+                if fields.get('state') == 'running' and job.state == 'queued':
+                    job.state = 'running'
+                    job.started_at = fields.get('time', time.time())
+                if 'progress' in fields:
+                    job.progress = fields['progress']
+                if 'message' in fields:
+                    job.message = fields['message']
+                if len(job.events) < MAX_JOB_EVENTS:
+                    job.events.append(fields)
+                self._condition.notify_all()
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Return a Job by id, or None if unknown or expired"""
+        with self._condition:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def list(self):
+        """Return all known jobs, newest first"""
+        with self._condition:
+            self._prune()
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job finishes. Returns the Job."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            job = self._jobs.get(job_id)
+            while job is not None and not job.finished:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return job
+
+    def wait_for_events(self, job_id, start=0, timeout=None):
+        """Block until a job has events after index start, finishes, or timeout passes.
+
+        Returns (events, finished), where finished is True once the job's final
+        event is included. Raises KeyError for unknown or expired jobs.
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            if len(job.events) <= start and not job.finished:
+                self._condition.wait(timeout)
+            return job.events[start:], job.finished
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Return the shared JobManager of this process"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(max_workers=config.JOB_WORKERS, result_ttl=config.JOB_RESULT_TTL_SECONDS)
+        return _manager
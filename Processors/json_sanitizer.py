@@ -0,0 +1,230 @@
+"""
+NH3 Cracking Processor and Visualizer - JSON Sanitizer
+------------------------------------------------------
+Streaming replacement of the bare NaN, Infinity and -Infinity literals that
+Python's json module writes for missing values. JavaScript's JSON.parse
+rejects them, so they are replaced with null.
+
+The scanner is token-aware: it skips over whole JSON strings and only
+replaces literals outside them, so text inside strings (column names like
+"Tonnano" or "NaN count") is never touched. Files are read in blocks; a
+string or literal cut off at the end of a block is held back and completed
+with the next block. Fixed files are written to a temporary file in the same
+folder and moved into place with os.replace, so readers never see a
+half-written file.
+
+Each experiment keeps a small manifest of the files found clean (by size and
+mtime), so repeat runs over an archive skip files that haven't changed.
+Experiments can be sanitized in parallel on a process pool.
+"""
+import os
+import re
+import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import config
+
+BLOCK_SIZE = 1024 * 1024
+
+# Where a JSON string or a bare non-finite literal starts. Searching for these
+# few literal prefixes is much faster than matching whole tokens at every byte.
+TOKEN_START = re.compile(rb'"|Infinity|NaN')
+
+# The rest of a JSON string after its opening quote, up to the closing quote
+STRING_REST = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+# Letters at the end of a block may be the start of a literal continued in the next block
+PARTIAL_LITERAL = re.compile(rb'-?[A-Za-z]*\Z')
+MAX_LITERAL_LENGTH = len(b'-Infinity')
+
+LITERALS = (b'NaN', b'Infinity')
+
+
+def sanitize_block(data, final=False):
+    """Replace the bare literals in data.
+
+    Returns (output, held_back, replacements). Unless final, a trailing
+    unterminated string or possible partial literal is returned as
+    held_back, to be prepended to the next block.
+    """
+    parts = []
+    pos = 0
+    scan = 0
+    replacements = 0
+    hold = None
+    while True:
+        match = TOKEN_START.search(data, scan)
+        if match is None:
+            break
+        if match.group() == b'"':
+            # Skip the whole string, so literals inside it are left alone
+            rest = STRING_REST.match(data, match.end())
+            if rest is None:
+                if not final:
+                    hold = match.start()
+                break
+            scan = rest.end()
+            continue
+        start = match.start()
+        if start > pos and data[start - 1:start] == b'-':
+            start -= 1
+        parts.append(data[pos:start])
+        parts.append(b'null')
+        pos = scan = match.end()
+        replacements += 1
+    if final:
+        hold = len(data)
+    elif hold is None:
+        hold = PARTIAL_LITERAL.search(data, max(pos, len(data) - MAX_LITERAL_LENGTH)).start()
+    parts.append(data[pos:hold])
+    return b''.join(parts), data[hold:], replacements
+
+
+def contains_literals(path, block_size=BLOCK_SIZE):
+    """Quick check whether a file contains NaN or Infinity anywhere, inside strings or not"""
+    overlap = max(len(literal) for literal in LITERALS) - 1
+    tail = b''
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            data = tail + block
+            if any(literal in data for literal in LITERALS):
+                return True
+            tail = data[-overlap:]
+    return False
+
+
+def sanitize_file(path, validate=False, block_size=BLOCK_SIZE):
+    """Sanitize one JSON file in place. Returns the number of literals replaced.
+
+    Files without literals are not rewritten. With validate=True the
+    rewritten file is parsed before it replaces the original; a ValueError
+    leaves the original untouched.
+    """
+    if not contains_literals(path, block_size):
+        return 0
+
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.sanitize-', suffix='.tmp', dir=folder)
+    replacements = 0
+    try:
+        with open(path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            pending = b''
+            for block in iter(lambda: src.read(block_size), b''):
+                output, pending, count = sanitize_block(pending + block)
+                dst.write(output)
+                replacements += count
+            output, _, count = sanitize_block(pending, final=True)
+            dst.write(output)
+            replacements += count
+
+        if replacements:
+            if validate:
+                with open(tmp_path, 'rb') as f:
+                    json.load(f)
+            os.replace(tmp_path, path)
+        else:
+            # The literals were all inside strings
+            os.remove(tmp_path)
+        return replacements
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(path, entries):
+    fd, tmp_path = tempfile.mkstemp(prefix='.manifest-', suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def sanitize_experiment(exp_dir, use_manifest=True, validate=False):
+    """Sanitize every JSON file of an experiment.
+
+    Returns a dict with the number of files found, skipped as already
+    clean, rewritten, the literals replaced and a list of errors.
+    """
+    manifest_path = os.path.join(exp_dir, config.JSON_CLEAN_MANIFEST_FILENAME)
+    manifest = _load_manifest(manifest_path) if use_manifest else {}
+    updated = {}
+    result = {'files': 0, 'skipped': 0, 'fixed': 0, 'replacements': 0, 'errors': []}
+
+    for root, _, files in os.walk(exp_dir):
+        for name in sorted(files):
+            if not name.endswith('.json') or name == config.JSON_CLEAN_MANIFEST_FILENAME:
+                continue
+            path = os.path.join(root, name)
+            relative_path = os.path.relpath(path, exp_dir).replace(os.sep, '/')
+            result['files'] += 1
+            try:
+                stat_result = os.stat(path)
+                fingerprint = [stat_result.st_size, stat_result.st_mtime_ns]
+                if manifest.get(relative_path) == fingerprint:
+                    result['skipped'] += 1
+                    updated[relative_path] = fingerprint
+                    continue
+
+                replacements = sanitize_file(path, validate=validate)
+                if replacements:
+                    result['fixed'] += 1
+                    result['replacements'] += replacements
+                    stat_result = os.stat(path)
+                updated[relative_path] = [stat_result.st_size, stat_result.st_mtime_ns]
+            except (OSError, ValueError) as e:
+                result['errors'].append(f"{relative_path}: {e}")
+
+    if updated != manifest:
+        try:
+            _save_manifest(manifest_path, updated)
+        except OSError as e:
+            result['errors'].append(f"{config.JSON_CLEAN_MANIFEST_FILENAME}: {e}")
+    return result
+
+
+def _sanitize_experiment_task(exp_dir, use_manifest, validate):
+    return os.path.basename(exp_dir), sanitize_experiment(exp_dir, use_manifest, validate)
+
+
+def sanitize_reports(reports_folder, experiments=None, workers=None, use_manifest=True, validate=False):
+    """Sanitize experiments of a reports folder in parallel.
+
+    Yields (experiment_name, result) as experiments finish. experiments
+    defaults to every folder in reports_folder; workers defaults to the
+    CPU count, and 1 runs everything in this process.
+    """
+    if experiments is None:
+        experiments = sorted(
+            entry.name for entry in os.scandir(reports_folder)
+            if entry.is_dir() and not entry.name.startswith('.')
+        )
+    exp_dirs = [os.path.join(reports_folder, name) for name in experiments]
+    workers = min(workers or os.cpu_count() or 1, len(exp_dirs))
+
+    if workers <= 1:
+        for exp_dir in exp_dirs:
+            yield _sanitize_experiment_task(exp_dir, use_manifest, validate)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_sanitize_experiment_task, exp_dir, use_manifest, validate) for exp_dir in exp_dirs]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,177 @@
+"""
+NH3 Cracking Processor and Visualizer - Processing Manifest
+-----------------------------------------------------------
+Record of which input files were processed, from which content and with which
+settings. Batch runs use it to skip inputs whose experiment is up to date and
+to redo only changed, failed or interrupted ones.
+
+Each entry stores the input's SHA-256, size and mtime, the effective processing
+parameters and the processor version. An entry is marked 'started' before
+processing begins and 'complete' afterwards, so a run that crashes leaves the
+file to be picked up again on the next run. The manifest is rewritten
+atomically after every change, with an exclusive lock on a .lock file next to
+it held from reading to writing, so the app's worker processes and
+process_all.py running beside it don't drop each other's entries.
+"""
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+import config
+
+MANIFEST_FORMAT = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """Return the hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _locked(lock_path):
+    """Hold an exclusive lock on lock_path, shared by every process using the same file"""
+    with open(lock_path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after about 10 seconds; keep waiting
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class ProcessingManifest:
+    """Per-input processing records stored as JSON in the reports folder"""
+
+    def __init__(self, input_folder, reports_folder, parameters, processor_version=None):
+        self.input_folder = input_folder
+        self.reports_folder = reports_folder
+        self.path = os.path.join(reports_folder, config.PROCESSING_MANIFEST_FILENAME)
+        self.lock_path = self.path + '.lock'
+        self.parameters = parameters
+        self.processor_version = processor_version or config.PROCESSOR_VERSION
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('format') == MANIFEST_FORMAT:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {'format': MANIFEST_FORMAT, 'entries': {}}
+
+    def _save(self, data):
+        os.makedirs(self.reports_folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.manifest-', suffix='.tmp', dir=self.reports_folder)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _update(self, filename, **fields):
+        # Re-read under the lock so concurrent runs, in this or other processes, don't drop each other's entries
+        os.makedirs(self.reports_folder, exist_ok=True)
+        with self._lock, _locked(self.lock_path):
+            data = self._load()
+            entry = data['entries'].setdefault(filename, {})
+            entry.update(fields)
+            self._save(data)
+            return entry
+
+    @property
+    def entries(self):
+        """All manifest entries keyed by input filename"""
+        return self._load()['entries']
+
+    def get(self, filename):
+        return self.entries.get(filename)
+
+    def check(self, filename):
+        """Decide whether an input needs processing.
+
+        Returns (needs_processing, reason). The content hash is only computed
+        when the recorded size or mtime no longer match.
+        """
+        entry = self.get(filename)
+        if entry is None:
+            return True, 'new'
+        if entry.get('status') != 'complete':
+            return True, entry.get('status', 'incomplete')
+        if entry.get('processor_version') != self.processor_version:
+            return True, 'processor version changed'
+        if entry.get('parameters') != self.parameters:
+            return True, 'parameters changed'
+
+        experiment = os.path.splitext(filename)[0]
+        if not os.path.exists(os.path.join(self.reports_folder, experiment, 'experiment_summary.json')):
+            return True, 'output missing'
+
+        input_path = os.path.join(self.input_folder, filename)
+        stat_result = os.stat(input_path)
+        if stat_result.st_size == entry.get('size') and stat_result.st_mtime_ns == entry.get('mtime_ns'):
+            return False, 'up to date'
+        if stat_result.st_size != entry.get('size') or file_sha256(input_path) != entry.get('sha256'):
+            return True, 'input changed'
+
+        # Same content with a new mtime (copied or touched): remember the new mtime
+        self._update(filename, mtime_ns=stat_result.st_mtime_ns)
+        return False, 'up to date'
+
+    def mark_started(self, filename):
+        """Record the input fingerprint and settings before processing starts"""
+        input_path = os.path.join(self.input_folder, filename)
+        stat_result = os.stat(input_path)
+        return self._update(
+            filename,
+            experiment=os.path.splitext(filename)[0],
+            sha256=file_sha256(input_path),
+            size=stat_result.st_size,
+            mtime_ns=stat_result.st_mtime_ns,
+            parameters=self.parameters,
+            processor_version=self.processor_version,
+            status='started',
+            started_at=datetime.now().isoformat(),
+            error=None
+        )
+
+    def mark_complete(self, filename):
+        return self._update(filename, status='complete', completed_at=datetime.now().isoformat())
+
+    def mark_failed(self, filename, error):
+        return self._update(filename, status='failed', error=str(error))
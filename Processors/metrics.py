@@ -0,0 +1,213 @@
+"""
+NH3 Cracking Processor and Visualizer - Metrics
+-----------------------------------------------
+Lightweight in-process metrics: counters and fixed-bucket histograms that can be
+rendered in the Prometheus text format or as JSON, plus a StepTimer that
+accumulates wall and CPU time per processing step.
+"""
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# Default histogram buckets for durations (seconds) and payload sizes (bytes)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+STEP_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (list(extra) if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in items) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative fixed-bucket histogram"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'buckets': {_format_value(float(bound)): n for bound, n in zip(self.buckets, self.counts)}
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of labelled counters, gauges and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> {'type': ..., 'help': ..., 'buckets': ..., 'series': {label tuple: value or Histogram}}
+        self._metrics = {}
+        self._collectors = []
+
+    def _metric(self, name, metric_type, help_text, buckets=None):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = {'type': metric_type, 'help': help_text or name, 'buckets': buckets, 'series': {}}
+            self._metrics[name] = metric
+        return metric
+
+    def inc(self, name, labels=None, amount=1, help_text=None):
+        """Increment a counter"""
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            series = self._metric(name, 'counter', help_text)['series']
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name, value, labels=None, help_text=None):
+        """Set a gauge"""
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            self._metric(name, 'gauge', help_text)['series'][key] = value
+
+    def observe(self, name, value, labels=None, buckets=LATENCY_BUCKETS, help_text=None):
+        """Record a histogram observation"""
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            metric = self._metric(name, 'histogram', help_text, buckets)
+            histogram = metric['series'].get(key)
+            if histogram is None:
+                histogram = metric['series'][key] = Histogram(metric['buckets'])
+            histogram.observe(value)
+
+    def register_collector(self, collector):
+        """Register collector() -> [(name, type, help, {label tuple: value})] evaluated at render time"""
+        self._collectors.append(collector)
+
+    def _snapshot(self):
+        with self._lock:
+            snapshot = {
+                name: {
+                    'type': metric['type'],
+                    'help': metric['help'],
+                    'series': {
+                        key: (value.as_dict() if isinstance(value, Histogram) else value)
+                        for key, value in metric['series'].items()
+                    },
+                    'histograms': {
+                        key: (list(value.buckets), list(value.counts), value.sum, value.count)
+                        for key, value in metric['series'].items() if isinstance(value, Histogram)
+                    }
+                }
+                for name, metric in self._metrics.items()
+            }
+        for collector in self._collectors:
+            for name, metric_type, help_text, series in collector():
+                snapshot[name] = {'type': metric_type, 'help': help_text, 'series': series, 'histograms': {}}
+        return snapshot
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, metric in sorted(self._snapshot().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            if metric['type'] == 'histogram':
+                for key, (buckets, counts, total, count) in metric['histograms'].items():
+                    for bound, n in zip(buckets, counts):
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', _format_value(float(bound)))])} {n}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(float(total))}")
+                    lines.append(f"{name}_count{_format_labels(key)} {count}")
+            else:
+                for key, value in metric['series'].items():
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def as_dict(self):
+        """Return all metrics as a JSON-serialisable dict"""
+        return {
+            name: {
+                'type': metric['type'],
+                'help': metric['help'],
+                'series': [
+                    {'labels': dict(key), 'value': value}
+                    for key, value in metric['series'].items()
+                ]
+            }
+            for name, metric in sorted(self._snapshot().items())
+        }
+
+    def reset(self):
+        """Drop all recorded values"""
+        with self._lock:
+            self._metrics.clear()
+
+
+class StepTimer:
+    """Accumulate wall-clock and CPU time per named processing step.
+
+    With trace_memory=True (tracemalloc must be tracing) each step also
+    records peak_alloc_bytes, the largest amount of memory allocated on top of
+    what was live when the step started, over all of its calls.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.steps = {}
+        self.trace_memory = trace_memory
+
+    @contextmanager
+    def step(self, name):
+        if self.trace_memory:
+            memory_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            entry = self.steps.setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'calls': 0})
+            entry['wall_seconds'] += time.perf_counter() - wall_start
+            entry['cpu_seconds'] += time.process_time() - cpu_start
+            entry['calls'] += 1
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - memory_start
+                entry['peak_alloc_bytes'] = max(entry.get('peak_alloc_bytes', 0), peak)
+
+    def record(self, metrics_registry=None):
+        """Add the accumulated step times to the pipeline step histograms"""
+        metrics_registry = metrics_registry or registry
+        for name, entry in self.steps.items():
+            metrics_registry.observe(
+                'nh3_pipeline_step_seconds', entry['wall_seconds'], {'step': name},
+                buckets=STEP_BUCKETS, help_text='Wall-clock time per ExperimentalDataProcessor step'
+            )
+            metrics_registry.observe(
+                'nh3_pipeline_step_cpu_seconds', entry['cpu_seconds'], {'step': name},
+                buckets=STEP_BUCKETS, help_text='CPU time per ExperimentalDataProcessor step'
+            )
+
+
+# Shared registry for the web app and the processor
+registry = MetricsRegistry()
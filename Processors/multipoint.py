@@ -0,0 +1,214 @@
+"""
+NH3 Cracking Processor and Visualizer - Multipoint Profiles
+-----------------------------------------------------------
+The multipoint thermocouples (R-1/2 T1 °C ... Tn °C) measure the temperature
+at positions along the catalyst bed. Besides one line trace per thermocouple,
+they are kept as a single dense array of time x position:
+
+- {base}_multipoint_profile.npz holds the full-resolution array (float32), the
+  time axis, the stage of every row and the thermocouple labels
+- the multipoint_heatmap plot shows it as a Plotly heatmap, binned in time to
+  at most config.MULTIPOINT_HEATMAP_MAX_COLUMNS columns, with the hotspot
+  position (the thermocouple reading the highest temperature) drawn on top
+
+MultipointProfile.profile_at() looks up the bed profile at given times and
+hotspot() returns the hotspot position of every row.
+"""
+import re
+
+import numpy as np
+
+import config
+
+try:
+    from .precision import quantize
+except ImportError:
+    from precision import quantize
+
+MULTIPOINT_PATTERN = 'R-1/2 T'
+POSITION_NUMBER = re.compile(r'T\s*(\d+)')
+
+
+def multipoint_columns(columns):
+    """Multipoint thermocouple columns in columns, ordered by position along the bed"""
+    found = [col for col in columns if col.startswith(MULTIPOINT_PATTERN) and col.endswith('°C')]
+
+    def position(col):
+        match = POSITION_NUMBER.search(col[len(MULTIPOINT_PATTERN) - 1:])
+        return int(match.group(1)) if match else float('inf')
+    return sorted(found, key=position)
+
+
+def _binned_means(values, size):
+    """Mean over consecutive groups of size rows, ignoring NaN (NaN where a group has no values)"""
+    rows = len(values)
+    bins = -(-rows // size)
+    padded = np.full((bins * size,) + values.shape[1:], np.nan, dtype=np.float64)
+    padded[:rows] = values
+    padded = padded.reshape((bins, size) + values.shape[1:])
+    valid = ~np.isnan(padded)
+    counts = valid.sum(axis=1)
+    sums = np.where(valid, padded, 0.0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def _hotspot_index(values):
+    """Column index of the maximum of each row, -1 for rows without values"""
+    filled = np.where(np.isnan(values), -np.inf, values)
+    index = filled.argmax(axis=1)
+    return np.where(np.isfinite(filled[np.arange(len(values)), index]), index, -1)
+
+
+class MultipointProfile:
+    """Temperatures of the multipoint thermocouples as a time x position array"""
+
+    def __init__(self, time, stage, labels, values):
+        self.time = np.asarray(time, dtype=np.float64)
+        self.stage = np.asarray(stage, dtype=np.int32)
+        self.labels = [str(label) for label in labels]
+        self.values = np.asarray(values, dtype=np.float32)
+
+    @classmethod
+    def from_stages(cls, stages):
+        """Build the profile from {stage_num: stage DataFrame}; None without multipoint columns"""
+        labels = []
+        for stage_df in stages.values():
+            labels.extend(col for col in multipoint_columns(stage_df.columns) if col not in labels)
+        if not labels:
+            return None
+        labels = multipoint_columns(labels)
+
+        times, stage_ids, blocks = [], [], []
+        for stage_num, stage_df in stages.items():
+            block = np.full((len(stage_df), len(labels)), np.nan, dtype=np.float32)
+            for i, col in enumerate(labels):
+                if col in stage_df.columns:
+                    block[:, i] = stage_df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+            times.append(stage_df['Time_Minutes'].to_numpy(dtype=np.float64))
+            stage_ids.append(np.full(len(stage_df), stage_num, dtype=np.int32))
+            blocks.append(block)
+
+        time = np.concatenate(times)
+        # Stages are normally in time order already; a stable sort keeps equal times in stage order
+        order = np.argsort(time, kind='stable')
+        return cls(time[order], np.concatenate(stage_ids)[order], labels, np.concatenate(blocks)[order])
+
+    @classmethod
+    def load(cls, path):
+        """Load a profile written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['time'], data['stage'], data['labels'].tolist(), data['values'])
+
+    def save(self, path):
+        """Write the profile as a compressed .npz file"""
+        np.savez_compressed(path, time=self.time, stage=self.stage, labels=np.array(self.labels),
+                            values=self.values)
+
+    def stage_profile(self, stage_num):
+        """The rows of one stage as a profile of their own"""
+        rows = self.stage == stage_num
+        return MultipointProfile(self.time[rows], self.stage[rows], self.labels, self.values[rows])
+
+    @property
+    def nbytes(self):
+        return self.time.nbytes + self.stage.nbytes + self.values.nbytes
+
+    def profile_at(self, times):
+        """Rows nearest to each of times, as a list of dicts with the time, stage, values and hotspot"""
+        times = np.atleast_1d(np.asarray(times, dtype=np.float64))
+        if not len(self.time):
+            return []
+        right = np.clip(np.searchsorted(self.time, times), 1, len(self.time) - 1) if len(self.time) > 1 \
+            else np.zeros(len(times), dtype=np.intp)
+        left = np.maximum(right - 1, 0)
+        index = np.where(np.abs(self.time[left] - times) <= np.abs(self.time[right] - times), left, right)
+
+        rows = self.values[index]
+        hotspot = _hotspot_index(rows)
+        rounded = quantize(rows, self.labels[0])
+        return [
+            {
+                'requested_time': float(requested),
+                'time': float(self.time[i]),
+                'stage': int(self.stage[i]),
+                'values': [None if np.isnan(value) else value for value in row.tolist()],
+                'hotspot': self.labels[h] if h >= 0 else None
+            }
+            for requested, i, row, h in zip(times, index, rounded, hotspot)
+        ]
+
+    def hotspot(self):
+        """(position index, temperature) of the hottest thermocouple in every row; -1 and NaN without values"""
+        index = _hotspot_index(self.values)
+        temperature = np.where(index >= 0, self.values[np.arange(len(index)), np.maximum(index, 0)], np.nan)
+        return index, temperature
+
+    def heatmap_figure(self, title, max_columns=None):
+        """Plotly figure with the profile as a heatmap (time on x, position on y) and the hotspot position"""
+        max_columns = max_columns or config.MULTIPOINT_HEATMAP_MAX_COLUMNS
+        size = max(1, -(-len(self.time) // max_columns))
+        time = self.time
+        values = self.values
+        if size > 1:
+            time = _binned_means(time, size)
+            values = _binned_means(values, size)
+        else:
+            values = values.astype(np.float64)
+
+        # A null column in every long gap keeps the neighbouring cells from being stretched across it
+        gaps = np.flatnonzero(np.diff(time) > max(config.MAX_GAP_MINUTES, size))
+        if len(gaps):
+            time = np.insert(time, gaps + 1, (time[gaps] + time[gaps + 1]) / 2)
+            values = np.insert(values, gaps + 1, np.nan, axis=0)
+
+        index = _hotspot_index(values)
+        positions = np.arange(1, len(self.labels) + 1)
+        hotspot_t = np.where(index >= 0, values[np.arange(len(index)), np.maximum(index, 0)], np.nan)
+
+        def to_list(array, column):
+            return [None if np.isnan(value) else value for value in quantize(array, column).tolist()]
+
+        return {
+            'metadata': {
+                'title': title,
+                'positions': self.labels,
+                'rows': int(len(self.time)),
+                'bin_rows': int(size)
+            },
+            'data': [
+                {
+                    'type': 'heatmap',
+                    'name': 'Temperature',
+                    'x': to_list(time, 'Time_Minutes'),
+                    'y': positions.tolist(),
+                    'z': [to_list(column, label) for column, label in zip(values.T, self.labels)],
+                    'colorscale': 'Inferno',
+                    'colorbar': {'title': 'Temperature (°C)'},
+                    'hovertemplate': 'Time %{x:.1f} min<br>Position %{y}<br>%{z:.1f} °C<extra></extra>'
+                },
+                {
+                    'type': 'scatter',
+                    'mode': 'lines',
+                    'name': 'Hotspot',
+                    'x': to_list(time, 'Time_Minutes'),
+                    'y': [None if h < 0 else int(h) + 1 for h in index.tolist()],
+                    'customdata': to_list(hotspot_t, self.labels[0]),
+                    'line': {'color': '#00e5ff', 'width': 1.5, 'shape': 'hv'},
+                    'hovertemplate': 'Hotspot at position %{y}<br>%{customdata:.1f} °C<extra></extra>'
+                }
+            ],
+            'layout': {
+                'title': title,
+                'xaxis': {'title': 'Time (minutes)'},
+                'yaxis': {
+                    'title': 'Thermocouple position',
+                    'tickmode': 'array',
+                    'tickvals': positions.tolist(),
+                    'ticktext': self.labels
+                },
+                'hovermode': 'closest',
+                'template': config.PLOTLY_THEME,
+                'legend': {'orientation': 'h', 'y': -0.2}
+            }
+        }
@@ -0,0 +1,307 @@
+"""
+NH3 Cracking Processor and Visualizer - Experiment Overlay
+----------------------------------------------------------
+Combines the same channels of several experiments into one Plotly figure.
+
+Series are read from the stage CSV files, reading only the time column and the
+requested columns. They are aligned on a common time reference and resampled
+onto one shared grid with np.interp. Grid points that fall in a gap of the
+source data longer than config.MAX_GAP_MINUTES become null, so lines aren't
+drawn across gaps. The grid is capped at a maximum number of points, so the
+combined figure stays small however long the experiments are.
+
+Time references:
+- absolute: minutes since the experiment's logger started (Time_Minutes)
+- stage_start: minutes since the start of each stage; every stage is its own trace
+- time_on_stream: the selected stages placed back to back, with gaps between
+  stages and inside them longer than config.MAX_GAP_MINUTES removed
+
+Built figures are kept in a small LRU cache keyed by the request and by the
+size and mtime of every source file, so a reprocessed experiment is picked up
+on the next request.
+"""
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import config
+
+try:
+    from .derived import add_missing_derived_columns, source_columns
+    from .precision import quantize
+    from .column_store import ColumnStore
+except ImportError:
+    from derived import add_missing_derived_columns, source_columns
+    from precision import quantize
+    from column_store import ColumnStore
+
+ALIGNMENTS = ('absolute', 'stage_start', 'time_on_stream')
+
+AXIS_TITLES = {
+    'absolute': 'Experiment time (minutes)',
+    'stage_start': 'Time since stage start (minutes)',
+    'time_on_stream': 'Time on stream (minutes)'
+}
+
+TIME_COLUMN = 'Time_Minutes'
+
+
+def stage_files(reports_folder, experiment_name, stages=None):
+    """Return {stage_num: path} of the stage data files to read, preferring CSV, then JSON, then the column store.
+
+    Raises FileNotFoundError if the experiment doesn't exist or the name isn't a plain folder name.
+    """
+    if experiment_name in ('', '.', '..') or os.sep in experiment_name or (os.altsep and os.altsep in experiment_name):
+        raise FileNotFoundError(f"Experiment '{experiment_name}' not found")
+    exp_dir = os.path.join(reports_folder, experiment_name)
+    if not os.path.isdir(exp_dir):
+        raise FileNotFoundError(f"Experiment '{experiment_name}' not found")
+    files = {}
+    for entry in os.scandir(exp_dir):
+        if not (entry.name.startswith('stage_') and entry.is_dir()):
+            continue
+        try:
+            stage_num = int(entry.name[len('stage_'):])
+        except ValueError:
+            continue
+        if stages is not None and stage_num not in stages:
+            continue
+        for extension in ('csv', 'json', 'colz'):
+            path = os.path.join(entry.path, f"stage_{stage_num}_data.{extension}")
+            if os.path.exists(path):
+                files[stage_num] = path
+                break
+    return dict(sorted(files.items()))
+
+
+def read_stage_columns(path, columns):
+    """Read the time column and those of columns present in a stage data file.
+
+    Derived columns the file doesn't have are computed from their inputs.
+    Returns a DataFrame with float64 columns.
+    """
+    wanted = set(columns) | set(source_columns(columns)) | {TIME_COLUMN}
+    if path.endswith('.csv'):
+        frame = pd.read_csv(path, usecols=lambda name: name in wanted)
+    elif path.endswith('.colz'):
+        with ColumnStore(path) as store:
+            frame = store.read(list(wanted))
+    else:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        frame = pd.DataFrame({name: data[name] for name in data if name in wanted})
+    frame = frame.apply(pd.to_numeric, errors='coerce').astype(np.float64)
+    add_missing_derived_columns(frame)
+    return frame
+
+
+def time_on_stream(times, max_gap):
+    """Cumulative time with every step longer than max_gap shortened to the typical step"""
+    if len(times) < 2:
+        return np.zeros(len(times))
+    steps = np.diff(times)
+    regular = steps[steps <= max_gap]
+    typical = float(np.median(regular)) if len(regular) else 0.0
+    steps[steps > max_gap] = typical
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+
+def resample(x, y, grid, max_gap):
+    """Interpolate a series onto grid.
+
+    Points outside the series and inside gaps longer than max_gap are NaN.
+    x must be sorted and free of NaN.
+    """
+    values = np.interp(grid, x, y, left=np.nan, right=np.nan)
+    if len(x) > 1:
+        right = np.clip(np.searchsorted(x, grid, side='right'), 1, len(x) - 1)
+        left = right - 1
+        in_gap = (x[right] - x[left] > max_gap) & (grid != x[left]) & (grid != x[right])
+        values[in_gap] = np.nan
+    return values
+
+
+def make_grid(series, points):
+    """Shared grid over the x range of all series with at most points points.
+
+    The grid is never finer than the finest sampling of the series.
+    """
+    start = min(x[0] for x, _ in series)
+    end = max(x[-1] for x, _ in series)
+    if end <= start:
+        return np.array([start])
+    native = min((float(np.median(np.diff(x))) for x, _ in series if len(x) > 1), default=end - start)
+    step = max((end - start) / max(points - 1, 1), native)
+    return np.arange(start, end + step / 2, step)
+
+
+def build_overlay(reports_folder, experiments, columns, stages=None, align='absolute', points=None):
+    """Build a Plotly figure overlaying columns of several experiments.
+
+    experiments and columns are lists of names; stages optionally restricts
+    the stage numbers read. Returns the figure dict, with a metadata entry
+    listing the grid and the (experiment, column) pairs that had no data.
+    Raises ValueError for bad arguments and FileNotFoundError for an unknown
+    experiment.
+    """
+    if align not in ALIGNMENTS:
+        raise ValueError(f"Invalid alignment '{align}', expected one of {', '.join(ALIGNMENTS)}")
+    if not experiments:
+        raise ValueError("No experiments given")
+    if not columns:
+        raise ValueError("No columns given")
+    if len(experiments) > config.OVERLAY_MAX_EXPERIMENTS:
+        raise ValueError(f"At most {config.OVERLAY_MAX_EXPERIMENTS} experiments can be overlaid")
+    points = config.OVERLAY_MAX_POINTS if points is None else int(points)
+    if not 2 <= points <= config.OVERLAY_MAX_POINTS:
+        raise ValueError(f"points must be between 2 and {config.OVERLAY_MAX_POINTS}")
+    max_gap = config.MAX_GAP_MINUTES
+
+    # (name, experiment index, column index, x, y) of every series, x aligned and sorted
+    series = []
+    missing = []
+    for exp_index, experiment in enumerate(experiments):
+        frames = [
+            (stage_num, read_stage_columns(path, columns))
+            for stage_num, path in stage_files(reports_folder, experiment, stages).items()
+        ]
+        frames = [(stage_num, frame) for stage_num, frame in frames if TIME_COLUMN in frame and len(frame)]
+
+        if align == 'stage_start':
+            parts = [
+                (f" S{stage_num}", frame, frame[TIME_COLUMN].to_numpy() - frame[TIME_COLUMN].iloc[0])
+                for stage_num, frame in frames
+            ]
+        elif frames:
+            whole = pd.concat([frame for _, frame in frames], ignore_index=True).sort_values(TIME_COLUMN)
+            times = whole[TIME_COLUMN].to_numpy()
+            x = time_on_stream(times, max_gap) if align == 'time_on_stream' else times
+            parts = [('', whole, x)]
+        else:
+            parts = []
+
+        for column_index, column in enumerate(columns):
+            found = False
+            for suffix, frame, x in parts:
+                if column not in frame:
+                    continue
+                y = frame[column].to_numpy()
+                valid = ~np.isnan(y) & ~np.isnan(x)
+                if not valid.any():
+                    continue
+                found = True
+                series.append((f"{experiment}{suffix} - {column}", exp_index, column_index, x[valid], y[valid]))
+            if not found:
+                missing.append({'experiment': experiment, 'column': column})
+
+    if series:
+        grid = make_grid([(x, y) for _, _, _, x, y in series], points)
+    else:
+        grid = np.array([])
+
+    colors = config.PLOT_COLORS
+    dashes = ['solid', 'dash', 'dot', 'dashdot', 'longdash', 'longdashdot']
+    traces = []
+    for name, exp_index, column_index, x, y in series:
+        values = quantize(resample(x, y, grid, max_gap), columns[column_index])
+        # Only the part of the grid the series covers
+        first = np.searchsorted(grid, x[0], side='left')
+        last = np.searchsorted(grid, x[-1], side='right')
+        traces.append({
+            'x': quantize(grid[first:last], TIME_COLUMN).tolist(),
+            'y': [None if value != value else value for value in values[first:last].tolist()],
+            'type': 'scatter',
+            'mode': 'lines',
+            'name': name,
+            'line': {'color': colors[exp_index % len(colors)], 'dash': dashes[column_index % len(dashes)]},
+            'legendgroup': experiments[exp_index],
+            'connectgaps': False
+        })
+
+    title = f"{', '.join(columns)} - {len(experiments)} experiments"
+    return {
+        'metadata': {
+            'experiments': list(experiments),
+            'columns': list(columns),
+            'stages': sorted(stages) if stages is not None else None,
+            'align': align,
+            'points': len(grid),
+            'grid_step': float(grid[1] - grid[0]) if len(grid) > 1 else None,
+            'missing': missing
+        },
+        'data': traces,
+        'layout': {
+            'title': title,
+            'xaxis': {'title': AXIS_TITLES[align]},
+            'yaxis': {'title': columns[0] if len(columns) == 1 else 'Value'},
+            'hovermode': 'closest',
+            'template': config.PLOTLY_THEME,
+            'legend': {'orientation': 'h', 'y': -0.2}
+        }
+    }
+
+
+class OverlayCache:
+    """LRU cache of serialized overlay figures keyed by request signature"""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def signature(reports_folder, experiments, columns, stages, align, points):
+        """Hash of the request and of the size and mtime of every file it reads"""
+        sources = []
+        for experiment in experiments:
+            for stage_num, path in stage_files(reports_folder, experiment, stages).items():
+                stat_result = os.stat(path)
+                sources.append([experiment, stage_num, stat_result.st_size, stat_result.st_mtime_ns])
+        key = json.dumps([
+            os.path.abspath(reports_folder), list(experiments), list(columns),
+            sorted(stages) if stages is not None else None, align, points, sources
+        ])
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def get(self, reports_folder, experiments, columns, stages=None, align='absolute', points=None):
+        """Return (etag, json_bytes) of an overlay, building it on a cache miss"""
+        etag = self.signature(reports_folder, experiments, columns, stages, align, points)
+        with self._lock:
+            data = self._entries.get(etag)
+            if data is not None:
+                self._entries.move_to_end(etag)
+                self.hits += 1
+                return etag, data
+            self.misses += 1
+
+        figure = build_overlay(reports_folder, experiments, columns, stages, align, points)
+        data = json.dumps(figure, separators=(',', ':')).encode()
+        with self._lock:
+            self._entries[etag] = data
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag, data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(len(data) for data in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Shared cache used by the web app
+overlay_cache = OverlayCache(max_entries=config.OVERLAY_CACHE_ENTRIES)
@@ -0,0 +1,300 @@
+"""
+NH3 Cracking Processor and Visualizer - Plot Regeneration
+---------------------------------------------------------
+Rebuilds the stage and overall Plotly JSON files of experiments from their
+saved stage data: the full-precision stage_N_data.csv files, the column
+stores of archived experiments, or, as a last resort, the stage_N_data.json
+files (which are rounded to the output precision).
+
+Each stage file is read once into a typed DataFrame (numeric columns as
+float64 arrays). The task that loads a stage also writes that stage's plots
+and hands back only the columns the overall plots use; each overall plot
+group is then written from those copies. Plot files are written with the
+pure-Python JSON encoder (indent=2), which holds the GIL, so stages and plot
+groups run in parallel on a process pool rather than on threads. When
+regenerating a whole archive the pool is shared by all experiments.
+"""
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import config
+
+try:
+    from .report_cache import report_cache
+    from .derived import add_missing_derived_columns
+    from .column_store import read_stage_frame, stage_store_path
+    from .multipoint import MultipointProfile
+except ImportError:
+    from report_cache import report_cache
+    from derived import add_missing_derived_columns
+    from column_store import read_stage_frame, stage_store_path
+    from multipoint import MultipointProfile
+
+
+def load_stage_frame(path):
+    """Load a column-oriented stage_N_data.json file into a typed DataFrame.
+
+    Numeric columns with nulls become float64 with NaN; text columns stay object.
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+    columns = {}
+    for name, values in data.items():
+        array = np.asarray(values)
+        if array.dtype.kind == 'O':
+            # Numbers mixed with nulls
+            try:
+                array = np.array(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                pass
+        columns[name] = array
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_stage_data(stage_dir, stage_num):
+    """Load a stage from its CSV file or column store, or else from its JSON file.
+
+    Returns (DataFrame, rounded); rounded is True when the data came from the
+    JSON file, whose values are rounded to the output precision.
+    """
+    try:
+        return read_stage_frame(stage_dir, stage_num), False
+    except FileNotFoundError:
+        return load_stage_frame(os.path.join(stage_dir, f"stage_{stage_num}_data.json")), True
+
+
+def has_stage_data(stage_dir, stage_num):
+    """Whether a stage has a CSV file, column store or JSON file to load"""
+    return any(
+        os.path.exists(os.path.join(stage_dir, f"stage_{stage_num}_data.{extension}"))
+        for extension in ('csv', 'json')
+    ) or os.path.exists(stage_store_path(stage_dir, stage_num))
+
+
+def find_stage_numbers(exp_dir):
+    """Sorted stage numbers of the stage_N folders of an experiment"""
+    stage_numbers = []
+    for entry in os.scandir(exp_dir):
+        if entry.name.startswith('stage_') and entry.is_dir():
+            try:
+                stage_numbers.append(int(entry.name[len('stage_'):]))
+            except ValueError:
+                continue
+    return sorted(stage_numbers)
+
+
+def default_workers():
+    """config.PLOT_REGENERATION_WORKERS, capped at the CPU count"""
+    return max(1, min(config.PLOT_REGENERATION_WORKERS or os.cpu_count() or 1, os.cpu_count() or 1))
+
+
+def _get_processor(upload_folder, reports_folder):
+    try:
+        from .Main_Web_ProcessorNH3Crack import ExperimentalDataProcessor
+    except ImportError:
+        from Main_Web_ProcessorNH3Crack import ExperimentalDataProcessor
+    return ExperimentalDataProcessor(input_folder=upload_folder, output_folder=reports_folder)
+
+
+def _stage_task(upload_folder, reports_folder, experiment_name, stage_num):
+    """Load one stage, write its plots and return the columns the overall plots need and whether they are rounded"""
+    processor = _get_processor(upload_folder, reports_folder)
+    stage_dir = os.path.join(reports_folder, experiment_name, f"stage_{stage_num}")
+
+    start = time.perf_counter()
+    stage_df, rounded = load_stage_data(stage_dir, stage_num)
+    # Experiments processed before a derived column was defined get it in their plots too
+    add_missing_derived_columns(stage_df)
+    load_seconds = time.perf_counter() - start
+
+    plot_groups = processor.overall_plot_groups(experiment_name)
+    profile = None
+    if rounded:
+        # The heatmap comes from the saved full-resolution profile rather than rounded values
+        profile_path = os.path.join(reports_folder, experiment_name,
+                                    plot_groups['multipoint_heatmap']['profile_filename'])
+        if os.path.exists(profile_path):
+            profile = MultipointProfile.load(profile_path)
+    processor.create_stage_plotly_json(stage_df, stage_num, experiment_name, stage_dir, profile=profile)
+
+    needed = ['Time_Minutes']
+    for group_name, group_info in plot_groups.items():
+        for col in processor.plot_group_columns(group_name, group_info, stage_df.columns):
+            if col not in needed:
+                needed.append(col)
+    return stage_df[needed], rounded, load_seconds, time.perf_counter() - start
+
+
+def _overall_task(upload_folder, reports_folder, experiment_name, group_name, stages, timestamp, keep_profile=False):
+    """Write one overall plot group from the stage frames"""
+    processor = _get_processor(upload_folder, reports_folder)
+    exp_dir = os.path.join(reports_folder, experiment_name)
+    processor.create_plotly_json(stages, experiment_name, timestamp, exp_dir, groups=[group_name],
+                                 keep_profile=keep_profile)
+    return group_name
+
+
+def _run(pool, fn, *args):
+    """Submit to pool, or run inline without one; returns a future-like object"""
+    if pool is not None:
+        return pool.submit(fn, *args)
+    return _Done(fn, *args)
+
+
+class _Done:
+    """Minimal stand-in for a future of a task run in this process"""
+
+    def __init__(self, fn, *args):
+        self._result = self._error = None
+        try:
+            self._result = fn(*args)
+        except Exception as e:
+            self._error = e
+
+    def result(self):
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def _completed(futures):
+    if futures and isinstance(next(iter(futures)), _Done):
+        return list(futures)
+    return as_completed(futures)
+
+
+def regenerate_experiment(reports_folder, experiment_name, upload_folder=None, workers=None,
+                          pool=None, progress=None):
+    """Recreate the stage and overall Plotly JSON files of one experiment.
+
+    Stages and overall plot groups run on pool if given, otherwise on a pool
+    of workers processes (default config.PLOT_REGENERATION_WORKERS capped at
+    the CPU count; 1 runs everything in this process). progress, if given, is
+    called as progress(done, total, message). Returns a dict with the stage count, the
+    stages loaded, timings and a list of errors. Raises FileNotFoundError if
+    the experiment or its stage folders don't exist.
+    """
+    upload_folder = upload_folder or config.UPLOAD_FOLDER
+    exp_dir = os.path.join(reports_folder, experiment_name)
+    if not os.path.isdir(exp_dir):
+        raise FileNotFoundError(f"Experiment directory not found at {exp_dir}")
+    stage_numbers = find_stage_numbers(exp_dir)
+    if not stage_numbers:
+        raise FileNotFoundError(f"No stage data found for experiment {experiment_name}")
+
+    if pool is None:
+        workers = workers or default_workers()
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as own_pool:
+                return regenerate_experiment(reports_folder, experiment_name, upload_folder, pool=own_pool,
+                                             progress=progress)
+
+    start = time.perf_counter()
+    result = {
+        'experiment': experiment_name,
+        'stage_count': len(stage_numbers),
+        'stages_loaded': 0,
+        'overall_plots': 0,
+        'load_seconds': 0.0,
+        'stage_seconds': 0.0,
+        'seconds': 0.0,
+        'errors': []
+    }
+    group_names = list(_get_processor(upload_folder, reports_folder).overall_plot_groups(experiment_name))
+    total = len(stage_numbers) + len(group_names)
+    done = 0
+
+    def step(message):
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, total, message)
+
+    # Load each stage once and write its plots
+    futures = {}
+    for stage_num in stage_numbers:
+        if not has_stage_data(os.path.join(exp_dir, f"stage_{stage_num}"), stage_num):
+            result['errors'].append(f"stage {stage_num}: stage data file not found")
+            step(f"Skipped stage {stage_num}")
+            continue
+        futures[_run(pool, _stage_task, upload_folder, reports_folder, experiment_name, stage_num)] = stage_num
+
+    stages = {}
+    rounded = False
+    for future in _completed(futures):
+        stage_num = futures[future]
+        try:
+            stages[stage_num], stage_rounded, load_seconds, stage_seconds = future.result()
+            rounded = rounded or stage_rounded
+            result['load_seconds'] += load_seconds
+            result['stage_seconds'] += stage_seconds
+        except Exception as e:
+            result['errors'].append(f"stage {stage_num}: {e}")
+        step(f"Generated plots for stage {stage_num}")
+    result['stages_loaded'] = len(stages)
+
+    # Overall plots, one task per group with only that group's columns
+    if stages:
+        stages = {stage_num: stages[stage_num] for stage_num in sorted(stages)}
+        processor = _get_processor(upload_folder, reports_folder)
+        plot_groups = processor.overall_plot_groups(experiment_name)
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        futures = {}
+        for group_name in group_names:
+            group_stages = {
+                stage_num: stage_df[['Time_Minutes'] + processor.plot_group_columns(
+                    group_name, plot_groups[group_name], stage_df.columns)]
+                for stage_num, stage_df in stages.items()
+            }
+            # A saved multipoint profile holds full-resolution data; rounded stages must not replace it
+            futures[_run(pool, _overall_task, upload_folder, reports_folder, experiment_name,
+                         group_name, group_stages, timestamp, rounded)] = group_name
+        for future in _completed(futures):
+            group_name = futures[future]
+            try:
+                future.result()
+                result['overall_plots'] += 1
+            except Exception as e:
+                result['errors'].append(f"overall {group_name}: {e}")
+            step(f"Generated overall {group_name} plot")
+
+    report_cache.invalidate(exp_dir)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def regenerate_reports(reports_folder, experiments=None, upload_folder=None, workers=None, progress=None):
+    """Recreate the plots of several experiments, sharing one process pool.
+
+    Yields (experiment_name, result) in order. experiments defaults to every
+    folder in reports_folder; an experiment without stage data yields a
+    result with the error instead of raising. progress, if given, is called
+    as progress(experiment_name, done, total, message).
+    """
+    if experiments is None:
+        experiments = sorted(
+            entry.name for entry in os.scandir(reports_folder)
+            if entry.is_dir() and not entry.name.startswith('.')
+        )
+    workers = workers or default_workers()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for experiment_name in experiments:
+            callback = None
+            if progress is not None:
+                callback = lambda done, total, message, name=experiment_name: progress(name, done, total, message)
+            try:
+                result = regenerate_experiment(reports_folder, experiment_name, upload_folder, workers=1,
+                                               pool=pool, progress=callback)
+            except FileNotFoundError as e:
+                result = {'experiment': experiment_name, 'stage_count': 0, 'stages_loaded': 0,
+                          'overall_plots': 0, 'seconds': 0.0, 'errors': [str(e)]}
+            yield experiment_name, result
+    finally:
+        if pool is not None:
+            pool.shutdown()
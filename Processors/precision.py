@@ -0,0 +1,83 @@
+"""
+NH3 Cracking Processor and Visualizer - Output Precision
+--------------------------------------------------------
+Rounds values to the precision of the instrument before they are written to
+the Plotly and stage JSON files, so the files don't carry interpolation noise
+like 549.8723419871234 for a thermocouple read to 0.1 °C. The CSV files keep
+full precision.
+
+Each entry of config.DATA_CATEGORIES can give either a 'resolution' (round to
+a multiple of it, e.g. 0.1) or 'significant_digits'. Columns in no category
+use config.OUTPUT_SIGNIFICANT_DIGITS and Time_Minutes uses
+config.TIME_RESOLUTION_MINUTES. Rounding is done on whole arrays, and the
+results are the doubles closest to the short decimal values, so they
+serialize as e.g. 549.9.
+"""
+from decimal import Decimal
+from functools import lru_cache
+
+import numpy as np
+
+import config
+
+TIME_COLUMN = 'Time_Minutes'
+
+
+@lru_cache(maxsize=None)
+def column_precision(column):
+    """('resolution', step) or ('significant_digits', n) for a column, or None to leave it as is"""
+    if column == TIME_COLUMN:
+        return ('resolution', config.TIME_RESOLUTION_MINUTES) if config.TIME_RESOLUTION_MINUTES else None
+    for category in config.DATA_CATEGORIES.values():
+        if column in category.get('columns', ()) or (
+                'column_pattern' in category and category['column_pattern'] in column and column.endswith('°C')):
+            if category.get('resolution'):
+                return 'resolution', category['resolution']
+            if category.get('significant_digits'):
+                return 'significant_digits', category['significant_digits']
+            break
+    if config.OUTPUT_SIGNIFICANT_DIGITS:
+        return 'significant_digits', config.OUTPUT_SIGNIFICANT_DIGITS
+    return None
+
+
+def round_to_resolution(values, resolution):
+    """Round to the nearest multiple of resolution"""
+    # resolution = units / 10**decimals with both integers, so the result is one exact
+    # integer product and one correctly rounded division
+    decimals = max(0, -Decimal(str(resolution)).normalize().as_tuple().exponent)
+    scale = 10.0 ** decimals
+    units = round(resolution * scale)
+    return np.rint(values / resolution) * units / scale
+
+
+def round_to_significant(values, digits):
+    """Round to digits significant digits"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        magnitude = np.floor(np.log10(np.abs(values)))
+    decimals = np.where(np.isfinite(magnitude), digits - 1 - magnitude, 0)
+    up = 10.0 ** np.maximum(decimals, 0)
+    down = 10.0 ** np.maximum(-decimals, 0)
+    return np.where(decimals >= 0, np.rint(values * up) / up, np.rint(values / down) * down)
+
+
+def quantize(values, column):
+    """values (array-like) as a float64 array rounded to the output precision of column"""
+    values = np.asarray(values, dtype=np.float64)
+    precision = column_precision(column)
+    if precision is None:
+        return values
+    kind, amount = precision
+    if kind == 'resolution':
+        values = round_to_resolution(values, amount)
+    else:
+        values = round_to_significant(values, amount)
+    # Small negative values round to -0.0; adding 0.0 turns it into 0.0
+    return values + 0.0
+
+
+def column_values(series):
+    """Values of a DataFrame column as a list for a JSON writer, rounded if they are floats"""
+    if series.dtype.kind != 'f':
+        return series.tolist()
+    return quantize(series.to_numpy(), series.name).tolist()
@@ -0,0 +1,155 @@
+"""
+NH3 Cracking Processor and Visualizer - Report Cache
+----------------------------------------------------
+Memory-bounded LRU cache for files and directory listings under the reports folder.
+
+Entries are keyed by path and validated against the file's mtime and size, so a
+file rewritten on disk is reloaded on the next access. Processing code calls
+invalidate() for an experiment directory after rewriting it to release the
+stale entries right away.
+"""
+import os
+import json
+import threading
+from collections import OrderedDict
+from zlib import adler32
+
+import config
+
+
+class CachedFile:
+    """Raw bytes of a cached file together with the metadata used to serve it"""
+
+    __slots__ = ('data', 'mtime', 'size', 'etag')
+
+    def __init__(self, path, data, stat_result):
+        self.data = data
+        self.mtime = stat_result.st_mtime
+        self.size = stat_result.st_size
+        # Same format as werkzeug's send_file so ETags stay stable whichever way a file is served
+        check = adler32(path.encode()) & 0xFFFFFFFF
+        self.etag = f"{self.mtime}-{self.size}-{check}"
+
+
+class ReportCache:
+    """Thread-safe LRU cache keyed by path and validated by (mtime, size)"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entry_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes if max_entry_bytes is not None else max_bytes // 4
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        # Set while a ReportWatcher invalidates changed experiments, so lookups can skip os.stat
+        self.trust_entries = False
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key, signature, trust):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (trust or entry[0] == signature):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def _store(self, key, signature, value, cost):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[2]
+            if cost > self.max_entry_bytes:
+                return
+            self._entries[key] = (signature, value, cost)
+            self.current_bytes += cost
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, _, evicted_cost) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_cost
+                self.evictions += 1
+
+    def get(self, kind, path, loader, trust=False):
+        """Return loader(path, stat_result) -> (value, cost), cached by path, mtime and size.
+
+        With trust=True a cached entry is returned without calling os.stat,
+        which is only safe while something else (e.g. a ReportWatcher)
+        invalidates entries when files change. trust_entries turns this on
+        for every lookup.
+        """
+        trust = trust or self.trust_entries
+        key = (kind, os.path.abspath(path))
+        if trust:
+            entry = self._lookup(key, None, True)
+            if entry is not None:
+                return entry[1]
+
+        stat_result = os.stat(path)
+        signature = (stat_result.st_mtime_ns, stat_result.st_size)
+        if not trust:
+            entry = self._lookup(key, signature, False)
+            if entry is not None:
+                return entry[1]
+
+        value, cost = loader(path, stat_result)
+        self._store(key, signature, value, cost)
+        return value
+
+    def get_json(self, path, trust=False):
+        """Load a JSON file through the cache. Callers must not mutate the result."""
+        def load(path, stat_result):
+            with open(path, 'r') as f:
+                return json.load(f), stat_result.st_size
+        return self.get('json', path, load, trust)
+
+    def get_file(self, path, trust=False):
+        """Return a CachedFile for path, or None if the file is too big to cache"""
+        def load(path, stat_result):
+            if stat_result.st_size > self.max_entry_bytes:
+                # Costed at its real size, so _store() doesn't keep it
+                return None, stat_result.st_size
+            with open(path, 'rb') as f:
+                return CachedFile(path, f.read(), stat_result), stat_result.st_size
+        return self.get('file', path, load, trust)
+
+    def list_dir(self, path, trust=False):
+        """Return the sorted entry names of a directory through the cache"""
+        def load(path, stat_result):
+            names = sorted(os.listdir(path))
+            return names, sum(len(name) for name in names) + 64
+        return self.get('listdir', path, load, trust)
+
+    def invalidate(self, path):
+        """Drop every entry for path and anything below it"""
+        path = os.path.abspath(path)
+        prefix = os.path.join(path, '')
+        with self._lock:
+            stale = [key for key in self._entries if key[1] == path or key[1].startswith(prefix)]
+            for key in stale:
+                self.current_bytes -= self._entries.pop(key)[2]
+        return len(stale)
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Return hit/miss counters and memory usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+# Shared cache used by the web app and invalidated by the processor
+report_cache = ReportCache(max_bytes=config.REPORT_CACHE_MAX_BYTES)
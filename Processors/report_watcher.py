@@ -0,0 +1,153 @@
+"""
+NH3 Cracking Processor and Visualizer - Report Watcher
+------------------------------------------------------
+Background poller that notices experiment directories changed on disk by other
+processes (process_all.py, fix_json_nan.py, manual copies) and publishes change
+events so caches and the experiment catalog can refresh only those entries.
+
+Each experiment is summarised by a signature (file count, newest mtime, total
+size) over its directory and stage folders, so in-place rewrites are noticed
+even though they don't touch the directory mtime.
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+def experiment_signature(exp_dir):
+    """Return (file_count, newest_mtime_ns, total_size) for an experiment directory"""
+    count = 0
+    newest = 0
+    total = 0
+    pending = [exp_dir]
+    while pending:
+        current = pending.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # Only the experiment folder and its stage folders hold report files
+                    if current == exp_dir:
+                        pending.append(entry.path)
+                    continue
+                stat_result = entry.stat()
+            except OSError:
+                continue
+            count += 1
+            total += stat_result.st_size
+            if stat_result.st_mtime_ns > newest:
+                newest = stat_result.st_mtime_ns
+    return count, newest, total
+
+
+class ReportWatcher:
+    """Poll a reports folder and publish added/modified/removed events per experiment"""
+
+    def __init__(self, reports_folder, interval=5.0, history=200):
+        self.reports_folder = reports_folder
+        self.interval = interval
+        self.events = deque(maxlen=history)
+        self.last_scan = None
+        self.scan_count = 0
+        self._signatures = None
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Register callback(event) to be called for every change event"""
+        self._listeners.append(callback)
+
+    def _current_signatures(self):
+        signatures = {}
+        try:
+            entries = list(os.scandir(self.reports_folder))
+        except OSError:
+            return signatures
+        for entry in entries:
+            if entry.is_dir():
+                signatures[entry.name] = experiment_signature(entry.path)
+        return signatures
+
+    def scan(self):
+        """Run one polling pass and return the change events it published"""
+        current = self._current_signatures()
+        previous = self._signatures
+        self._signatures = current
+        self.last_scan = time.time()
+        self.scan_count += 1
+
+        # The first pass only records the baseline
+        if previous is None:
+            return []
+
+        events = []
+        for name, signature in current.items():
+            if name not in previous:
+                events.append(self._event('added', name))
+            elif previous[name] != signature:
+                events.append(self._event('modified', name))
+        for name in previous.keys() - current.keys():
+            events.append(self._event('removed', name))
+
+        for event in events:
+            self.events.append(event)
+            for callback in self._listeners:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.error(f"Error in report watcher listener for {event['experiment']}: {e}")
+        return events
+
+    def _event(self, event_type, name):
+        return {
+            'type': event_type,
+            'experiment': name,
+            'path': os.path.join(self.reports_folder, name),
+            'time': time.time()
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.scan()
+            except Exception as e:
+                logger.error(f"Error scanning reports folder: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start polling in a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='report-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the polling thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self):
+        """Return watcher state and the most recent change events"""
+        return {
+            'running': self.running,
+            'reports_folder': self.reports_folder,
+            'interval': self.interval,
+            'last_scan': self.last_scan,
+            'scan_count': self.scan_count,
+            'experiments': len(self._signatures or {}),
+            'recent_events': list(self.events)
+        }
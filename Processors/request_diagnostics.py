@@ -0,0 +1,207 @@
+"""
+NH3 Cracking Processor and Visualizer - Request Diagnostics
+-----------------------------------------------------------
+Tools for finding slow API calls in a running web app:
+
+- ProfileStore keeps cProfile dumps of single requests that an admin asked to
+  profile, together with a summary of the top functions.
+- SlowRequestMonitor tracks in-flight requests. When one runs longer than a
+  threshold, a background thread takes a few stack samples of the thread that
+  is handling it with sys._current_frames(). Finished slow requests are logged
+  and kept in a short history with their samples. The samples are cheap enough
+  to leave on in production.
+"""
+import os
+import sys
+import time
+import uuid
+import json
+import pstats
+import logging
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def profile_summary(profiler, top=25):
+    """Return the top functions of a cProfile run by cumulative and by own time"""
+    stats = pstats.Stats(profiler)
+    functions = []
+    for (path, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+        functions.append({
+            'function': f"{os.path.basename(path)}:{line}({function})",
+            'path': path,
+            'calls': calls,
+            'total_seconds': total,
+            'cumulative_seconds': cumulative
+        })
+    return {
+        'total_calls': stats.total_calls,
+        'total_seconds': stats.total_tt,
+        'by_cumulative': sorted(functions, key=lambda f: f['cumulative_seconds'], reverse=True)[:top],
+        'by_own_time': sorted(functions, key=lambda f: f['total_seconds'], reverse=True)[:top]
+    }
+
+
+class ProfileStore:
+    """Folder of per-request profiles: <id>.prof dumps plus <id>.json summaries"""
+
+    def __init__(self, folder, keep=50):
+        self.folder = folder
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def save(self, profiler, details, top=25):
+        """Store a profile with request details; returns the summary including its id"""
+        profile_id = datetime.now().strftime('%Y%m%d_%H%M%S_') + uuid.uuid4().hex[:8]
+        summary = dict(details, id=profile_id, created_at=datetime.now().isoformat())
+        summary.update(profile_summary(profiler, top))
+        with self._lock:
+            os.makedirs(self.folder, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.folder, f"{profile_id}.prof"))
+            with open(os.path.join(self.folder, f"{profile_id}.json"), 'w') as f:
+                json.dump(summary, f, indent=2)
+            self._prune()
+        return summary
+
+    def _ids(self):
+        try:
+            names = os.listdir(self.folder)
+        except OSError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith('.json'))
+
+    def _prune(self):
+        for profile_id in self._ids()[:-self.keep] if self.keep else []:
+            for suffix in ('.json', '.prof'):
+                try:
+                    os.remove(os.path.join(self.folder, profile_id + suffix))
+                except OSError:
+                    pass
+
+    def list(self):
+        """Newest first: id, route, path, status and duration of each stored profile"""
+        entries = []
+        for profile_id in reversed(self._ids()):
+            summary = self.get(profile_id)
+            if summary is not None:
+                entries.append({key: summary.get(key) for key in
+                                ('id', 'created_at', 'method', 'route', 'path', 'status', 'duration_seconds')})
+        return entries
+
+    def get(self, profile_id):
+        """Return a stored summary, or None if unknown"""
+        if not profile_id.replace('_', '').isalnum():
+            return None
+        try:
+            with open(os.path.join(self.folder, f"{profile_id}.json"), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def dump_path(self, profile_id):
+        """Path of the .prof dump, or None if unknown"""
+        if not profile_id.replace('_', '').isalnum():
+            return None
+        path = os.path.abspath(os.path.join(self.folder, f"{profile_id}.prof"))
+        return path if os.path.exists(path) else None
+
+
+class SlowRequestMonitor:
+    """Take stack samples of requests that run longer than a threshold"""
+
+    def __init__(self, threshold, interval=0.5, max_samples=5, history=100, stack_limit=40):
+        self.threshold = threshold
+        self.interval = interval
+        self.max_samples = max_samples
+        self.stack_limit = stack_limit
+        self.slow_requests = deque(maxlen=history)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='slow-request-monitor', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def begin(self, method, path, route):
+        """Register a request handled by the current thread; returns a token for end()"""
+        token = object()
+        with self._lock:
+            self._inflight[token] = {
+                'thread_id': threading.get_ident(),
+                'method': method,
+                'path': path,
+                'route': route,
+                'start': time.perf_counter(),
+                'started_at': datetime.now().isoformat(),
+                'samples': []
+            }
+        return token
+
+    def end(self, token, status=None):
+        """Unregister a request; returns its record if it was slow, else None"""
+        with self._lock:
+            entry = self._inflight.pop(token, None)
+        if entry is None:
+            return None
+        duration = time.perf_counter() - entry['start']
+        if duration < self.threshold:
+            return None
+
+        record = {
+            'method': entry['method'],
+            'path': entry['path'],
+            'route': entry['route'],
+            'status': status,
+            'started_at': entry['started_at'],
+            'duration_seconds': duration,
+            'samples': entry['samples']
+        }
+        self.slow_requests.append(record)
+        where = ' '.join(entry['samples'][-1]['stack'][-1].split()) if entry['samples'] else 'no stack sample'
+        logger.warning(
+            f"Slow request: {entry['method']} {entry['path']} took {duration:.2f} s "
+            f"(status {status}, {len(entry['samples'])} samples, last in {where})"
+        )
+        return record
+
+    def recent(self):
+        """Slow requests, newest first"""
+        return list(reversed(self.slow_requests))
+
+    def _sample(self):
+        now = time.perf_counter()
+        with self._lock:
+            due = [
+                entry for entry in self._inflight.values()
+                if now - entry['start'] >= self.threshold and len(entry['samples']) < self.max_samples
+            ]
+        if not due:
+            return
+        frames = sys._current_frames()
+        for entry in due:
+            frame = frames.get(entry['thread_id'])
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame, limit=self.stack_limit)
+            entry['samples'].append({
+                'elapsed_seconds': now - entry['start'],
+                'stack': [line.rstrip() for line in stack]
+            })
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception as e:
+                logger.error(f"Slow request sampling failed: {e}")
@@ -0,0 +1,197 @@
+"""
+NH3 Cracking Processor and Visualizer - Stage Aggregates
+--------------------------------------------------------
+Per-stage statistics of every numeric column (mean, min, max, std, count and
+the mean over the last config.STAGE_AGGREGATE_LAST_MINUTES of the stage).
+
+The processor computes them while saving an experiment and stores them in
+experiment_summary.json under stages_info. The catalog copies them into its
+stage_aggregates table, so questions across all experiments are answered
+from one SQLite table without opening any stage data.
+
+Queries are made of terms like mean(NH3 out [%]) and conditions like
+mean(R1/2 T set [°C])>=545, experiment~Exp 011 or stage=2, see
+parse_term() and parse_condition(). Experiments processed before aggregates
+existed can be filled in from their stage CSV files with backfill_experiment().
+"""
+import os
+import re
+import json
+import tempfile
+
+import config
+
+try:
+    from .catalog import get_catalog, read_summary
+    from .report_cache import report_cache
+except ImportError:
+    from catalog import get_catalog, read_summary
+    from report_cache import report_cache
+
+STATS = ('mean', 'min', 'max', 'std', 'count', 'last_mean')
+
+# Comparison operators of conditions; ~ means "contains" for experiment names
+OPERATORS = ('>=', '<=', '!=', '=', '>', '<', '~')
+
+FIELD_CONDITION = re.compile(r'\s*(experiment|stage)\s*(>=|<=|!=|=|>|<|~)(.*)$', re.IGNORECASE)
+
+# Aggregates for grouped queries and the SQL function each one maps to
+GROUP_AGGREGATES = {'avg': 'AVG', 'min': 'MIN', 'max': 'MAX', 'sum': 'SUM', 'count': 'COUNT'}
+
+GROUP_BY = ('experiment', 'stage', 'all')
+
+# Columns that describe the rows rather than measure anything
+SKIP_COLUMNS = ('Time_Minutes', 'Stage', 'Stage_ID')
+
+
+def _finite(value):
+    value = float(value)
+    return value if value == value and value not in (float('inf'), float('-inf')) else None
+
+
+def compute_stage_aggregates(stage_df, last_minutes=None):
+    """Return {column: {stat: value}} for the numeric columns of a stage DataFrame"""
+    if last_minutes is None:
+        last_minutes = config.STAGE_AGGREGATE_LAST_MINUTES
+    numeric = stage_df.select_dtypes('number').drop(columns=list(SKIP_COLUMNS), errors='ignore')
+    if numeric.empty:
+        return {}
+    stats = numeric.agg(['mean', 'min', 'max', 'std', 'count'])
+    if 'Time_Minutes' in stage_df:
+        times = stage_df['Time_Minutes']
+        last = numeric[times >= times.max() - last_minutes].mean()
+    else:
+        last = stats.loc['mean']
+
+    aggregates = {}
+    for column in numeric.columns:
+        values = stats[column]
+        aggregates[column] = {
+            'mean': _finite(values['mean']),
+            'min': _finite(values['min']),
+            'max': _finite(values['max']),
+            'std': _finite(values['std']),
+            'count': int(values['count']),
+            'last_mean': _finite(last[column])
+        }
+    return aggregates
+
+
+def parse_term(text):
+    """Parse 'stat(column)' into (stat, column). Raises ValueError."""
+    text = text.strip()
+    stat, _, rest = text.partition('(')
+    stat = stat.strip()
+    if stat not in STATS or not rest.endswith(')') or not rest[:-1].strip():
+        raise ValueError(f"Invalid term '{text}', expected stat(column) with stat one of {', '.join(STATS)}")
+    return stat, rest[:-1].strip()
+
+
+def parse_condition(text):
+    """Parse a condition into (field, op, value).
+
+    field is (stat, column) for stat(column), or 'experiment' or 'stage'.
+    Numeric fields get float values. Raises ValueError.
+    """
+    text = text.strip()
+    if '(' in text:
+        # The operator follows the term's closing parenthesis; column names may contain anything else
+        close = text.rfind(')')
+        field = parse_term(text[:close + 1])
+        rest = text[close + 1:].strip()
+        op = next((op for op in OPERATORS if rest.startswith(op)), None)
+        value = rest[len(op):].strip() if op else ''
+    else:
+        match = FIELD_CONDITION.match(text)
+        if match is None:
+            raise ValueError(f"Invalid condition '{text}', expected stat(column), experiment or stage "
+                             f"followed by an operator ({' '.join(OPERATORS)}) and a value")
+        field, op, value = match.group(1).lower(), match.group(2), match.group(3).strip()
+    if op is None or not value:
+        raise ValueError(f"Invalid condition '{text}', expected an operator ({' '.join(OPERATORS)}) and a value")
+
+    if field == 'experiment':
+        if op not in ('=', '!=', '~'):
+            raise ValueError(f"Invalid condition '{text}', experiment supports =, != and ~")
+        return field, op, value
+    if op == '~':
+        raise ValueError(f"Invalid condition '{text}', ~ only applies to experiment")
+    try:
+        return field, op, float(value)
+    except ValueError:
+        raise ValueError(f"Invalid condition '{text}', '{value}' is not a number")
+
+
+def query(reports_folder, select, where=(), group_by=None, agg='avg', limit=None):
+    """Run an aggregate query given as text terms and conditions.
+
+    select and where are lists of strings for parse_term() and
+    parse_condition(); group_by is None, 'experiment', 'stage' or 'all'.
+    Returns the result of ExperimentCatalog.query_stage_aggregates().
+    """
+    if not select:
+        raise ValueError("No terms to select")
+    if group_by is not None and group_by not in GROUP_BY:
+        raise ValueError(f"Invalid group_by '{group_by}', expected one of {', '.join(GROUP_BY)}")
+    if agg not in GROUP_AGGREGATES:
+        raise ValueError(f"Invalid aggregate '{agg}', expected one of {', '.join(GROUP_AGGREGATES)}")
+    terms = [parse_term(text) for text in select]
+    conditions = [parse_condition(text) for text in where]
+    return get_catalog(reports_folder).query_stage_aggregates(terms, conditions, group_by, agg, limit)
+
+
+def _write_summary(summary_path, summary):
+    fd, tmp_path = tempfile.mkstemp(prefix='.summary-', suffix='.tmp', dir=os.path.dirname(summary_path))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(summary, f, indent=2)
+        os.replace(tmp_path, summary_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def backfill_experiment(reports_folder, name, force=False):
+    """Compute missing stage aggregates of an experiment from its stage CSV files (or column stores).
+
+    Updates experiment_summary.json and the catalog. Returns the number of
+    stages computed (0 if the experiment already had all aggregates or has
+    no summary).
+    """
+    try:
+        from .derived import add_missing_derived_columns
+        from .column_store import read_stage_frame
+    except ImportError:
+        from derived import add_missing_derived_columns
+        from column_store import read_stage_frame
+
+    exp_dir = os.path.join(reports_folder, name)
+    summary, _ = read_summary(exp_dir)
+    if summary is None:
+        return 0
+    stages_info = summary.setdefault('stages_info', {})
+    last_minutes = config.STAGE_AGGREGATE_LAST_MINUTES
+
+    computed = 0
+    for stage_num in summary.get('metadata', {}).get('stage_numbers', []):
+        stage_info = stages_info.setdefault(str(stage_num), {})
+        if 'aggregates' in stage_info and not force:
+            continue
+        try:
+            stage_df = read_stage_frame(os.path.join(exp_dir, f"stage_{stage_num}"), stage_num)
+        except FileNotFoundError:
+            continue
+        add_missing_derived_columns(stage_df)
+        stage_info['aggregates'] = compute_stage_aggregates(stage_df, last_minutes)
+        computed += 1
+
+    if computed:
+        summary.setdefault('metadata', {})['aggregate_last_minutes'] = last_minutes
+        summary_path = os.path.join(exp_dir, "experiment_summary.json")
+        _write_summary(summary_path, summary)
+        get_catalog(reports_folder).upsert_experiment(name, summary, os.stat(summary_path).st_mtime_ns)
+        report_cache.invalidate(summary_path)
+    return computed
@@ -0,0 +1,174 @@
+"""
+NH3 Cracking Processor and Visualizer - Synthetic Logger Data
+-------------------------------------------------------------
+Generator for realistic tab-separated logger files used by the benchmark. The
+output has the same layout as the plant logger: a datetime column, the Stage
+column, the channels listed in config.DATA_CATEGORIES, the R-1/2 T*
+multipoint thermocouples and optional extra channels.
+
+Files are written in chunks, so 10^7-row files don't need 10^7 rows in memory.
+The same arguments and seed always produce the same file.
+"""
+import numpy as np
+import pandas as pd
+
+import config
+
+# Gap patterns: no gaps, a fixed-length gap at regular intervals, or random gaps
+GAP_PATTERNS = ('none', 'periodic', 'random')
+
+# Stage layouts: equal-length stages, or random lengths between half and twice the mean
+STAGE_LAYOUTS = ('equal', 'random')
+
+# Reactor set-points cycled through by consecutive stages
+STAGE_SETPOINTS = (450.0, 500.0, 550.0, 600.0, 525.0, 475.0)
+
+
+def stage_boundaries(rows, stage_count, layout, rng):
+    """Return the first row index of every stage plus rows as the final bound"""
+    if layout == 'random':
+        weights = rng.uniform(0.5, 2.0, stage_count)
+    else:
+        weights = np.ones(stage_count)
+    bounds = np.round(np.cumsum(weights) / weights.sum() * rows).astype(np.int64)
+    return np.concatenate([[0], bounds])
+
+
+def sample_times(rows, sample_seconds, gap_pattern, gap_minutes, gap_every_minutes, rng):
+    """Return sample times in seconds from the start, with gaps inserted between samples"""
+    steps = np.full(rows, float(sample_seconds))
+    steps[0] = 0.0
+    if gap_pattern == 'periodic':
+        every = max(1, int(gap_every_minutes * 60 / sample_seconds))
+        steps[every::every] += gap_minutes * 60
+    elif gap_pattern == 'random':
+        # On average one gap per gap_every_minutes, with lengths up to twice gap_minutes
+        probability = sample_seconds / (gap_every_minutes * 60)
+        has_gap = rng.random(rows) < probability
+        has_gap[0] = False
+        steps[has_gap] += rng.uniform(0.1, 2.0, has_gap.sum()) * gap_minutes * 60
+    return np.cumsum(steps)
+
+
+def format_timestamps(timestamps):
+    """Format datetime64 values as the logger does (DD/MM/YY HH:MM:SS) without a Python loop"""
+    iso = np.datetime_as_string(timestamps, unit='s').astype('U19')
+    chars = iso.view('U1').reshape(len(iso), 19)
+    out = np.empty((len(iso), 17), dtype='U1')
+    out[:, 0:2] = chars[:, 8:10]
+    out[:, 2] = '/'
+    out[:, 3:5] = chars[:, 5:7]
+    out[:, 5] = '/'
+    out[:, 6:8] = chars[:, 2:4]
+    out[:, 8] = ' '
+    out[:, 9:17] = chars[:, 11:19]
+    return out.view('U17').ravel()
+
+
+def category_columns():
+    """Return the fixed channel names used by the plot categories, in order"""
+    columns = []
+    for category in config.DATA_CATEGORIES.values():
+        for column in category.get('columns', []):
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def _chunk_frame(start, stop, times, stages, setpoints, multipoint_channels, extra_channels, rng, start_time):
+    """Build the DataFrame for rows start..stop"""
+    n = stop - start
+    t = times[start:stop]
+    stage = stages[start:stop]
+    t_set = setpoints[start:stop]
+    minutes = t / 60.0
+
+    # The reactor follows the set-point with a small oscillation and noise
+    t_read = t_set + 2.0 * np.sin(minutes / 17.0) + rng.normal(0, 0.8, n)
+    power = np.clip(20 + (t_set - 400) * 0.25 + rng.normal(0, 1.5, n), 0, 100)
+    saturator = 35 + 0.5 * np.sin(minutes / 45.0) + rng.normal(0, 0.2, n)
+
+    pressure_set = np.full(n, 5.0)
+    pressure_in = pressure_set + rng.normal(0, 0.02, n)
+    pressure_out = pressure_in - 0.15 + rng.normal(0, 0.01, n)
+
+    nh3_flow = np.full(n, 100.0)
+    h2_flow = np.clip((t_set - 400) * 0.6 + rng.normal(0, 1.0, n), 0, None)
+    # Conversion rises with temperature; outlet composition follows from it
+    conversion = np.clip((t_read - 400) / 250.0, 0.02, 0.99)
+    nh3_out = 100 * (1 - conversion) / (1 + conversion) + rng.normal(0, 0.2, n)
+    h2_out = 75 * 2 * conversion / (1 + conversion) + rng.normal(0, 0.2, n)
+
+    values = {
+        "R1/2 T set [°C]": t_set,
+        "R1/2 T read [°C]": t_read,
+        "R1/2 T power [%]": power,
+        "Saturator T read [°C]": saturator,
+        "Pressure SETPOINT [bar]": pressure_set,
+        "Pressure PIC [bar]": pressure_set + rng.normal(0, 0.01, n),
+        "Pressure reading line [bar]": pressure_in + 0.05,
+        "Pressure reading R1/2 IN [bar]": pressure_in,
+        "Pressure reading R1/2 OUT [bar]": pressure_out,
+        "High pressure NH3 line [bar]": 12 + rng.normal(0, 0.05, n),
+        "NH3 Actual Set-Point [Nml/min]": nh3_flow,
+        "H2 Actual Flow [Nml/min]": h2_flow,
+        "Tot flow calc [Nml/min]": nh3_flow + h2_flow,
+        "NH3 in %": np.full(n, 95.0),
+        "Inert in %": np.full(n, 5.0),
+        "H2O in %": np.clip(rng.normal(0.05, 0.01, n), 0, None),
+        "NH3 out [%]": nh3_out,
+        "H2 out [%]": h2_out,
+        "H2O out [%]": np.clip(rng.normal(0.1, 0.02, n), 0, None),
+    }
+
+    frame = {'DateTime': format_timestamps(start_time + (t * 1000).astype('timedelta64[ms]')), 'Stage': stage}
+    for column in category_columns():
+        frame[column] = values.get(column, rng.normal(0, 1, n))
+
+    # Multipoint thermocouples along the bed: a temperature profile around the read-out
+    for i in range(multipoint_channels):
+        position = i / max(1, multipoint_channels - 1)
+        profile = 15 * np.sin(np.pi * position) - 10 * position
+        frame[f"R-1/2 T{i + 1} °C"] = t_read + profile + rng.normal(0, 0.5, n)
+
+    for i in range(extra_channels):
+        frame[f"Aux {i + 1} [-]"] = rng.normal(50, 5, n)
+
+    return pd.DataFrame(frame)
+
+
+def generate_logger_file(path, rows, multipoint_channels=8, extra_channels=0, stage_count=4,
+                         stage_layout='equal', gap_pattern='periodic', gap_minutes=10,
+                         gap_every_minutes=240, sample_seconds=30, seed=0, chunk_rows=200000):
+    """Write a synthetic logger file and return a description of what was generated"""
+    if gap_pattern not in GAP_PATTERNS:
+        raise ValueError(f"gap_pattern must be one of {', '.join(GAP_PATTERNS)}")
+    if stage_layout not in STAGE_LAYOUTS:
+        raise ValueError(f"stage_layout must be one of {', '.join(STAGE_LAYOUTS)}")
+
+    rng = np.random.default_rng(seed)
+    times = sample_times(rows, sample_seconds, gap_pattern, gap_minutes, gap_every_minutes, rng)
+    bounds = stage_boundaries(rows, stage_count, stage_layout, rng)
+    stages = np.repeat(np.arange(1, stage_count + 1), np.diff(bounds))
+    setpoints = np.array(STAGE_SETPOINTS)[(stages - 1) % len(STAGE_SETPOINTS)]
+    start_time = np.datetime64('2025-01-06T08:00:00', 'ms')
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for start in range(0, rows, chunk_rows):
+            stop = min(rows, start + chunk_rows)
+            chunk = _chunk_frame(start, stop, times, stages, setpoints,
+                                 multipoint_channels, extra_channels, rng, start_time)
+            chunk.to_csv(f, sep='\t', index=False, header=(start == 0), float_format='%.4f')
+            columns = len(chunk.columns)
+
+    gaps = np.diff(times) > sample_seconds * 1.5
+    return {
+        'rows': rows,
+        'columns': columns if rows else 0,
+        'stages': stage_count,
+        'stage_layout': stage_layout,
+        'gap_pattern': gap_pattern,
+        'gaps': int(gaps.sum()),
+        'duration_minutes': float(times[-1] / 60.0) if rows else 0.0,
+        'seed': seed
+    }
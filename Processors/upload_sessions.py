@@ -0,0 +1,378 @@
+"""
+NH3 Cracking Processor and Visualizer - Chunked Uploads
+-------------------------------------------------------
+Resumable chunked uploads of logger files, optionally gzip-compressed.
+
+Chunks are appended in order at an explicit byte offset, so an interrupted
+client asks for the current offset and continues from there. Compressed data
+is decompressed as it arrives, and complete lines are handed to a parser
+thread that builds the DataFrame block by block, so parsing is done by the
+time the last chunk lands.
+
+Session state lives in a folder under the uploads folder (meta.json plus the
+received bytes), so a session also survives a server restart: it is restored
+by replaying the bytes received so far.
+"""
+import io
+import os
+import json
+import time
+import uuid
+import zlib
+import queue
+import shutil
+import logging
+import threading
+
+import config
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_DIRNAME = '.partial'
+
+
+class UploadError(ValueError):
+    """Invalid upload request; the message is safe to return to the client"""
+
+
+class OffsetMismatch(UploadError):
+    """A chunk was sent for an offset other than the next expected one"""
+
+    def __init__(self, expected):
+        super().__init__(f"Expected offset {expected}")
+        self.expected = expected
+
+
+class StreamingTableParser:
+    """Parse tab-separated text into DataFrame blocks on a background thread.
+
+    Feed raw text bytes with feed(); close() waits for the remaining
+    blocks and result() returns the concatenated DataFrame. Every block is
+    parsed with the header line prepended, with the encoding and dtypes
+    found for the first block. A later block that doesn't fit them (a
+    non-utf-8 byte, an integer column turning float) stops parsing, so the
+    file is read in one piece after the upload instead.
+    """
+
+    def __init__(self, block_bytes=4 * 1024 * 1024):
+        self.block_bytes = block_bytes
+        self.rows_parsed = 0
+        self.encoding = None
+        self.error = None
+        self._header = None
+        self._dtypes = None
+        self._pending = b''
+        self._blocks = []
+        self._queue = queue.Queue(maxsize=64)
+        self._thread = threading.Thread(target=self._run, name='upload-parser', daemon=True)
+        self._thread.start()
+
+    def feed(self, data):
+        if data:
+            self._queue.put(data)
+
+    def close(self):
+        """Flush the last partial line and wait for the parser thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _decode(self, data):
+        if self.encoding is None:
+            # Same order as read_data_file: latin1 decodes anything
+            try:
+                text = data.decode('utf-8')
+                self.encoding = 'utf-8'
+                return text
+            except UnicodeDecodeError:
+                self.encoding = 'latin1'
+        return data.decode(self.encoding)
+
+    def _parse(self, data):
+        import pandas as pd
+
+        text = self._decode(data)
+        if self._header is None:
+            header, _, text = text.partition('\n')
+            self._header = header.lstrip('\ufeff') + '\n'
+        if not text.strip():
+            return
+        block = pd.read_csv(io.StringIO(self._header + text), sep='\t', dtype=self._dtypes)
+        if self._dtypes is None:
+            self._dtypes = block.dtypes.to_dict()
+        self._blocks.append(block)
+        self.rows_parsed += len(block)
+
+    def _run(self):
+        buffered = []
+        buffered_size = 0
+        while True:
+            data = self._queue.get()
+            if self.error is not None:
+                if data is None:
+                    return
+                continue
+            try:
+                if data is None:
+                    remainder = b''.join(buffered) + self._pending
+                    self._pending = b''
+                    if remainder:
+                        self._parse(remainder)
+                    return
+                # Only parse whole lines; keep the tail for the next chunk
+                data = self._pending + data
+                cut = data.rfind(b'\n') + 1
+                self._pending = data[cut:]
+                if cut:
+                    buffered.append(data[:cut])
+                    buffered_size += cut
+                if buffered_size >= self.block_bytes or (self._header is None and buffered):
+                    self._parse(b''.join(buffered))
+                    buffered = []
+                    buffered_size = 0
+            except Exception as e:
+                logger.warning(f"Streaming parse failed, the file will be read after the upload: {e}")
+                self.error = e
+                if data is None:
+                    return
+
+    def result(self):
+        """Return the parsed DataFrame; raises if parsing failed"""
+        import pandas as pd
+
+        if self.error is not None:
+            raise self.error
+        if not self._blocks:
+            raise ValueError("No data rows received")
+        if len(self._blocks) == 1:
+            return self._blocks[0]
+        return pd.concat(self._blocks, ignore_index=True)
+
+
+class UploadSession:
+    """One chunked upload: received bytes, decompressor and parser state"""
+
+    def __init__(self, session_dir, meta):
+        self.session_dir = session_dir
+        self.meta = meta
+        self.lock = threading.Lock()
+        self.received = 0
+        self.decompressed = 0
+        self._decompressor = zlib.decompressobj(wbits=47) if meta['compressed'] else None
+        self.parser = StreamingTableParser(config.UPLOAD_PARSE_BLOCK_BYTES)
+
+    @property
+    def id(self):
+        return self.meta['id']
+
+    @property
+    def raw_path(self):
+        # Uncompressed uploads are written straight to the data file
+        return os.path.join(self.session_dir, 'raw.gz' if self.meta['compressed'] else 'data.txt')
+
+    @property
+    def data_path(self):
+        return os.path.join(self.session_dir, 'data.txt')
+
+    def _save_meta(self):
+        with open(os.path.join(self.session_dir, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f)
+
+    def _decompress(self, data):
+        out = []
+        while data:
+            out.append(self._decompressor.decompress(data))
+            if self._decompressor.eof:
+                # Concatenated gzip members: continue with a fresh decompressor
+                data = self._decompressor.unused_data
+                if data:
+                    self._decompressor = zlib.decompressobj(wbits=47)
+            else:
+                data = b''
+        return b''.join(out)
+
+    def _consume(self, chunk, write_raw):
+        text = self._decompress(chunk) if self._decompressor is not None else chunk
+        self.decompressed += len(text)
+        if self.decompressed > config.UPLOAD_MAX_DECOMPRESSED_BYTES:
+            raise UploadError("Decompressed upload exceeds the size limit")
+        if write_raw:
+            with open(self.raw_path, 'ab') as f:
+                f.write(chunk)
+        if self._decompressor is not None and text:
+            with open(self.data_path, 'ab') as f:
+                f.write(text)
+        self.parser.feed(text)
+        self.received += len(chunk)
+
+    def append(self, offset, chunk):
+        """Append a chunk that starts at offset; returns the new offset"""
+        with self.lock:
+            if self.meta['state'] != 'receiving':
+                raise UploadError(f"Upload is {self.meta['state']}")
+            if offset != self.received:
+                raise OffsetMismatch(self.received)
+            if self.received + len(chunk) > config.MAX_CONTENT_LENGTH:
+                raise UploadError("Upload exceeds the size limit")
+            try:
+                self._consume(chunk, write_raw=True)
+            except zlib.error as e:
+                raise UploadError(f"Invalid compressed data: {e}")
+            self.meta['updated_at'] = time.time()
+            return self.received
+
+    def replay(self):
+        """Rebuild decompressor and parser state from the bytes already on disk"""
+        if self.meta['compressed'] and os.path.exists(self.data_path):
+            os.remove(self.data_path)
+        if not os.path.exists(self.raw_path):
+            return
+        with open(self.raw_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(config.UPLOAD_CHUNK_SIZE), b''):
+                self._consume(chunk, write_raw=False)
+
+    def finish(self):
+        """Check that the upload is complete and wait for parsing to finish"""
+        with self.lock:
+            if self.meta['state'] != 'receiving':
+                raise UploadError(f"Upload is {self.meta['state']}")
+            expected = self.meta.get('size')
+            if expected is not None and self.received != expected:
+                raise UploadError(f"Received {self.received} of {expected} bytes")
+            if self.received == 0 or not os.path.exists(self.data_path):
+                raise UploadError("Upload is empty")
+            if self._decompressor is not None and not self._decompressor.eof:
+                raise UploadError("Compressed data is truncated")
+            self.meta['state'] = 'complete'
+            self.parser.close()
+
+    def status(self):
+        return {
+            'upload_id': self.id,
+            'filename': self.meta['filename'],
+            'compressed': self.meta['compressed'],
+            'size': self.meta.get('size'),
+            'offset': self.received,
+            'decompressed_bytes': self.decompressed,
+            'rows_parsed': self.parser.rows_parsed,
+            'state': self.meta['state']
+        }
+
+
+class UploadManager:
+    """Create, look up, restore and expire chunked upload sessions"""
+
+    def __init__(self, upload_folder):
+        self.upload_folder = upload_folder
+        self.sessions_folder = os.path.join(upload_folder, SESSIONS_DIRNAME)
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, filename, size=None, compressed=None, process=True):
+        """Start a session for an upload named filename (.txt or .txt.gz)"""
+        compressed = filename.lower().endswith('.gz') if compressed is None else compressed
+        target = filename[:-3] if filename.lower().endswith('.gz') else filename
+        if not target or '.' not in target or target.rsplit('.', 1)[1].lower() not in config.ALLOWED_EXTENSIONS:
+            raise UploadError("File type not allowed")
+        if size is not None and size < 0:
+            raise UploadError("size must not be negative")
+        if size is not None and size > config.MAX_CONTENT_LENGTH:
+            raise UploadError("Upload exceeds the size limit")
+
+        meta = {
+            'id': uuid.uuid4().hex,
+            'filename': target,
+            'compressed': bool(compressed),
+            'size': size,
+            'process': bool(process),
+            'state': 'receiving',
+            'created_at': time.time(),
+            'updated_at': time.time()
+        }
+        session_dir = os.path.join(self.sessions_folder, meta['id'])
+        os.makedirs(session_dir)
+        session = UploadSession(session_dir, meta)
+        session._save_meta()
+        with self._lock:
+            self._expire()
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, upload_id):
+        """Return a session by id, restoring it from disk after a restart. None if unknown."""
+        if not upload_id.isalnum():
+            return None
+        with self._lock:
+            session = self._sessions.get(upload_id)
+            if session is not None:
+                return session
+            session_dir = os.path.join(self.sessions_folder, upload_id)
+            try:
+                with open(os.path.join(session_dir, 'meta.json'), 'r') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return None
+            session = UploadSession(session_dir, meta)
+            try:
+                session.replay()
+            except Exception as e:
+                logger.error(f"Could not restore upload {upload_id}: {e}")
+                self._remove(session)
+                return None
+            self._sessions[upload_id] = session
+            return session
+
+    def complete(self, session):
+        """Finish a session and move its data into the uploads folder.
+
+        Returns (filename, parsed_path). The DataFrame built while receiving
+        is pickled to parsed_path for the processing job; parsed_path is None
+        if streaming parsing failed and the file has to be read from disk instead.
+        """
+        session.finish()
+        destination = os.path.join(self.upload_folder, session.meta['filename'])
+        os.replace(session.data_path, destination)
+        parsed_path = os.path.join(self.sessions_folder, f"{session.id}.pkl")
+        try:
+            session.parser.result().to_pickle(parsed_path)
+        except Exception as e:
+            logger.warning(f"Using file reader for {session.meta['filename']}: {e}")
+            parsed_path = None
+        with self._lock:
+            self._remove(session)
+        return session.meta['filename'], parsed_path
+
+    def abort(self, session):
+        with self._lock:
+            session.meta['state'] = 'aborted'
+            session.parser.close()
+            self._remove(session)
+
+    def _remove(self, session):
+        self._sessions.pop(session.id, None)
+        shutil.rmtree(session.session_dir, ignore_errors=True)
+
+    def _expire(self):
+        """Delete sessions that haven't received data for UPLOAD_SESSION_TTL_SECONDS"""
+        cutoff = time.time() - config.UPLOAD_SESSION_TTL_SECONDS
+        try:
+            entries = list(os.scandir(self.sessions_folder))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    # Appending to the data files doesn't touch the folder mtime
+                    newest = max([entry.stat().st_mtime] + [f.stat().st_mtime for f in os.scandir(entry.path)])
+                else:
+                    # Parsed data of a completed upload whose job never picked it up
+                    newest = entry.stat().st_mtime
+                if newest < cutoff:
+                    session = self._sessions.pop(entry.name, None)
+                    if session is not None:
+                        session.parser.close()
+                    if entry.is_dir():
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    else:
+                        os.remove(entry.path)
+            except OSError:
+                continue
@@ -8,23 +8,46 @@ import os
 import sys
 import glob
 import json
+import time
+import base64
+import cProfile
+import threading
 import traceback
 import urllib.parse
+import multiprocessing
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, url_for
+from flask import Flask, render_template, request, jsonify, send_file, send_from_directory, redirect, url_for, g, stream_with_context
 import logging
 from werkzeug.utils import secure_filename
 
 # Ensure Processors directory is in the path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Import the processor class
+# Import the web-side helpers; the processor and the numeric stack are imported only where needed
 try:
-    from Processors import ExperimentalDataProcessor
+    from Processors.report_cache import report_cache
+    from Processors.catalog import get_catalog, sort_value
+    from Processors.report_watcher import ReportWatcher
+    from Processors.metrics import registry as metrics_registry, SIZE_BUCKETS, StepTimer
+    from Processors.jobs import get_job_manager, process_files_task, process_upload_task, regenerate_visualizations_task
+    from Processors.upload_sessions import UploadManager, UploadError, OffsetMismatch
+    from Processors.request_diagnostics import ProfileStore, SlowRequestMonitor
+    from Processors.json_sanitizer import sanitize_experiment
+    from Processors.stage_aggregates import query as query_stage_aggregates
+    from Processors.column_index import find_experiments, list_columns
 except ImportError:
     # Fallback for backwards compatibility
-    from Main_Web_ProcessorNH3Crack import ExperimentalDataProcessor
+    from report_cache import report_cache
+    from catalog import get_catalog, sort_value
+    from report_watcher import ReportWatcher
+    from metrics import registry as metrics_registry, SIZE_BUCKETS, StepTimer
+    from jobs import get_job_manager, process_files_task, process_upload_task, regenerate_visualizations_task
+    from upload_sessions import UploadManager, UploadError, OffsetMismatch
+    from request_diagnostics import ProfileStore, SlowRequestMonitor
+    from json_sanitizer import sanitize_experiment
+    from stage_aggregates import query as query_stage_aggregates
+    from column_index import find_experiments, list_columns
 
 # Import configuration
 import config
@@ -58,63 +81,343 @@ os.makedirs(app.config['REPORTS_FOLDER'], exist_ok=True)
 # Create static folder if it doesn't exist
 os.makedirs('static', exist_ok=True)
 
+# Refresh only the changed experiments when reports are rewritten by other processes
+def handle_report_change(event):
+    """Invalidate cached files and refresh the catalog row of a changed experiment"""
+    logger.info(f"Experiment {event['type']}: {event['experiment']}")
+    report_cache.invalidate(event['path'])
+    report_cache.invalidate(app.config['REPORTS_FOLDER'])
+    get_catalog(app.config['REPORTS_FOLDER']).refresh_experiment(app.config['REPORTS_FOLDER'], event['experiment'])
+
+# Fold the results of finished background jobs back into this process
+def handle_job_complete(job):
+    """Record worker step times and drop cached reports of the experiments a job wrote"""
+    logger.info(f"Job {job.id} ({job.kind}) {job.state}")
+    if not job.result:
+        return
+    for steps in job.result.get('step_times', []):
+        step_timer = StepTimer()
+        step_timer.steps = steps
+        step_timer.record()
+    for experiment_name in job.result.get('experiments', []):
+        report_cache.invalidate(get_experiment_dir(experiment_name))
+    report_cache.invalidate(app.config['REPORTS_FOLDER'])
+
+job_manager = get_job_manager()
+job_manager.on_complete(handle_job_complete)
+
+upload_manager = UploadManager(app.config['UPLOAD_FOLDER'])
+
+report_watcher = None
+
+profile_store = ProfileStore(config.REQUEST_PROFILE_FOLDER, keep=config.REQUEST_PROFILE_KEEP)
+# cProfile can only profile one request at a time
+profile_lock = threading.Lock()
+
+slow_request_monitor = None
+if config.SLOW_REQUEST_THRESHOLD_SECONDS:
+    slow_request_monitor = SlowRequestMonitor(
+        config.SLOW_REQUEST_THRESHOLD_SECONDS,
+        interval=config.SLOW_REQUEST_SAMPLE_INTERVAL,
+        max_samples=config.SLOW_REQUEST_MAX_SAMPLES,
+        history=config.SLOW_REQUEST_HISTORY
+    )
+
+def start_services():
+    """Start the background services of the process that serves requests.
+
+    Syncs the experiment catalog, then starts the report watcher, the job
+    workers and the slow-request monitor as configured.
+    """
+    global report_watcher
+
+    # Bring the experiment catalog in line with the reports folder
+    try:
+        catalog_changes = get_catalog(app.config['REPORTS_FOLDER']).sync(app.config['REPORTS_FOLDER'])
+        logger.info(f"Experiment catalog synced: {catalog_changes}")
+    except Exception as e:
+        logger.error(f"Error syncing experiment catalog: {e}")
+
+    if config.REPORT_WATCHER_ENABLED:
+        report_watcher = ReportWatcher(app.config['REPORTS_FOLDER'], interval=config.REPORT_WATCHER_INTERVAL)
+        report_watcher.subscribe(handle_report_change)
+        report_watcher.scan()
+        report_watcher.start()
+        report_cache.trust_entries = True
+
+    if config.JOB_PREWARM_WORKERS:
+        job_manager.warm_up()
+
+    if slow_request_monitor is not None:
+        slow_request_monitor.start()
+
+# Imported by a WSGI server: this process serves requests. As a script, __main__ decides below.
+if __name__ != '__main__' and multiprocessing.parent_process() is None:
+    start_services()
+
+# Request timing and payload size metrics
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is None:
+        return response
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    labels = {'route': route, 'method': request.method}
+    metrics_registry.observe(
+        'nh3_http_request_duration_seconds', time.perf_counter() - start, labels,
+        help_text='Time spent handling a request, by route'
+    )
+    metrics_registry.inc(
+        'nh3_http_requests_total', dict(labels, status=str(response.status_code)),
+        help_text='Handled requests, by route and status'
+    )
+    if response.content_length is not None:
+        metrics_registry.observe(
+            'nh3_http_response_size_bytes', response.content_length, labels, buckets=SIZE_BUCKETS,
+            help_text='Response payload size, by route'
+        )
+    return response
+
+def collect_cache_metrics():
+    """Expose report cache counters at scrape time"""
+    stats = report_cache.stats()
+    return [
+        ('nh3_report_cache_hits_total', 'counter', 'Report cache hits', {(): stats['hits']}),
+        ('nh3_report_cache_misses_total', 'counter', 'Report cache misses', {(): stats['misses']}),
+        ('nh3_report_cache_evictions_total', 'counter', 'Report cache evictions', {(): stats['evictions']}),
+        ('nh3_report_cache_bytes', 'gauge', 'Bytes held by the report cache', {(): stats['bytes']}),
+        ('nh3_report_cache_entries', 'gauge', 'Entries held by the report cache', {(): stats['entries']})
+    ]
+
+metrics_registry.register_collector(collect_cache_metrics)
+
+# Request diagnostics: on-demand profiling and the slow-request log
+def is_diagnostics_client():
+    """Whether the client may profile requests and read diagnostics (token, or local clients without one)"""
+    if config.REQUEST_PROFILING_TOKEN:
+        return request.headers.get('X-Profile-Token') == config.REQUEST_PROFILING_TOKEN
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+def profiling_requested():
+    if not config.REQUEST_PROFILING_ENABLED:
+        return False
+    flag = request.args.get('_profile') or request.headers.get('X-Profile') or ''
+    return flag.lower() in ('1', 'true', 'yes')
+
+@app.before_request
+def start_request_diagnostics():
+    if slow_request_monitor is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        g.slow_request_token = slow_request_monitor.begin(request.method, request.full_path.rstrip('?'), route)
+    if profiling_requested() and is_diagnostics_client():
+        if profile_lock.acquire(blocking=False):
+            g.profiler = cProfile.Profile()
+            g.profile_start = time.perf_counter()
+            g.profiler.enable()
+        else:
+            g.profile_skipped = True
+
+@app.after_request
+def finish_request_diagnostics(response):
+    # Like the request timer, measure until the response is ready, not until a stream ends
+    token = g.pop('slow_request_token', None)
+    if token is not None:
+        slow_request_monitor.end(token, response.status_code)
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        profile_lock.release()
+        try:
+            summary = profile_store.save(profiler, {
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'route': request.url_rule.rule if request.url_rule is not None else 'unmatched',
+                'status': response.status_code,
+                'duration_seconds': time.perf_counter() - g.pop('profile_start')
+            }, top=config.REQUEST_PROFILE_TOP)
+            response.headers['X-Profile-Id'] = summary['id']
+            response.headers['X-Profile-Url'] = url_for('api_profile', profile_id=summary['id'])
+        except Exception as e:
+            logger.error(f"Could not save request profile: {e}")
+    elif g.pop('profile_skipped', False):
+        response.headers['X-Profile-Skipped'] = 'another request is being profiled'
+    return response
+
+@app.teardown_request
+def cleanup_request_diagnostics(error=None):
+    # after_request is skipped when a view raises; make sure profiling and tracking still end
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        profile_lock.release()
+    token = g.pop('slow_request_token', None)
+    if token is not None:
+        slow_request_monitor.end(token, 500)
+
 # Helper to check allowed file extensions
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
+# Helper to load an experiment summary through the report cache
+def load_summary(exp_dir, experiment_name):
+    """Load experiment_summary.json for an experiment, or None if missing or unreadable"""
+    summary_path = os.path.join(exp_dir, "experiment_summary.json")
+    try:
+        return report_cache.get_json(summary_path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        app.logger.error(f"Error loading summary for {experiment_name}: {e}")
+        return None
+
+# Helper to list the stage numbers present on disk for an experiment
+def list_stage_numbers(exp_dir):
+    """Return the sorted stage numbers of the stage_* folders in an experiment directory"""
+    stage_numbers = []
+    for folder in report_cache.list_dir(exp_dir):
+        if not folder.startswith('stage_'):
+            continue
+        try:
+            stage_numbers.append(int(folder.split('_')[1]))
+        except (IndexError, ValueError):
+            continue
+    return sorted(stage_numbers)
+
+# Helper to turn a catalog row into the experiment list format
+def catalog_row_to_experiment(row):
+    """Build the experiment list entry for a catalog row"""
+    summary = None
+    if row['summary_mtime_ns'] is not None:
+        summary = {
+            'metadata': {
+                'processed_at': row['processed_at'],
+                'total_stages': row['total_stages'],
+                'stage_numbers': row['stage_numbers'],
+                'base_filename': row['base_filename'],
+                'processing_parameters': row['parameters']
+            }
+        }
+    return {
+        'name': row['name'],
+        'summary': summary,
+        'stages': row['total_stages']
+    }
+
 # Helper to get all processed experiments
 def get_experiments():
-    """Get all processed experiments from Reports folder"""
-    experiments = []
-    
+    """Get all processed experiments from the experiment catalog"""
     try:
-        # List all experiment directories
-        for item in os.listdir(app.config['REPORTS_FOLDER']):
-            exp_dir = os.path.join(app.config['REPORTS_FOLDER'], item)
-            if os.path.isdir(exp_dir):
-                try:
-                    # Attempt to load experiment summary
-                    summary_path = os.path.join(exp_dir, "experiment_summary.json")
-                    summary = None
-                    
-                    if os.path.exists(summary_path):
-                        try:
-                            with open(summary_path, 'r') as f:
-                                summary = json.load(f)
-                        except Exception as e:
-                            app.logger.error(f"Error loading summary for {item}: {e}")
-                    
-                    # Get stage count from directory structure
-                    stage_count = 0
-                    if summary and 'metadata' in summary and 'stage_numbers' in summary['metadata']:
-                        stage_count = len(summary['metadata']['stage_numbers'])
-                    else:
-                        # Count stage subdirectories
-                        stage_dirs = glob.glob(os.path.join(exp_dir, "stage_*"))
-                        stage_count = len(stage_dirs)
-                    
-                    # Add experiment to list
-                    experiments.append({
-                        'name': item,
-                        'summary': summary,
-                        'stages': stage_count
-                    })
-                except Exception as e:
-                    app.logger.error(f"Error processing experiment {item}: {e}")
-                    # Add experiment with error info
-                    experiments.append({
-                        'name': item,
-                        'summary': None,
-                        'stages': 0,
-                        'error': str(e)
-                    })
+        catalog = get_catalog(app.config['REPORTS_FOLDER'])
+        return [catalog_row_to_experiment(row) for row in catalog.list_experiments(sort='name')]
     except Exception as e:
         app.logger.error(f"Error in get_experiments: {e}")
         return []
+
+# Query arguments that switch /api/experiments to the paginated response
+EXPERIMENT_QUERY_ARGS = {
+    'limit', 'offset', 'cursor', 'q', 'processed_after', 'processed_before',
+    'column', 'min_stages', 'max_stages', 'sort', 'fields'
+}
+
+# Fields that can be requested with fields= and how each is read from a catalog row
+EXPERIMENT_FIELDS = {
+    'name': lambda row: row['name'],
+    'stages': lambda row: row['total_stages'],
+    'stage_numbers': lambda row: row['stage_numbers'],
+    'processed_at': lambda row: row['processed_at'],
+    'total_rows': lambda row: row['total_rows'],
+    'start_minutes': lambda row: row['start_minutes'],
+    'end_minutes': lambda row: row['end_minutes'],
+    'duration_minutes': lambda row: row['duration_minutes'],
+    'columns': lambda row: row['columns'],
+    'parameters': lambda row: row['parameters'],
+    'summary': lambda row: catalog_row_to_experiment(row)['summary']
+}
+DEFAULT_EXPERIMENT_FIELDS = ['name', 'stages', 'processed_at', 'total_rows']
+MAX_EXPERIMENTS_PAGE_SIZE = 500
+
+def encode_cursor(sort, descending, row):
+    """Encode the position after a catalog row as an opaque pagination cursor"""
+    payload = json.dumps([sort, descending, sort_value(row, sort), row['name']])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a pagination cursor into (sort, descending, (sort_value, name))"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort, descending, value, name = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort, bool(descending), (value, name)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def parse_int_arg(args, name, default=None):
+    """Integer query argument, or default when it is missing; raises ValueError for anything else"""
+    value = args.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+def query_experiments(args):
+    """Run a filtered, sorted and paginated catalog query from request arguments.
+
+    Raises ValueError for invalid arguments.
+    """
+    processed_before = args.get('processed_before')
+    if processed_before and len(processed_before) == 10:
+        # A bare date includes the whole day
+        processed_before += 'T23:59:59.999999'
+    filters = {
+        'name_contains': args.get('q'),
+        'processed_after': args.get('processed_after'),
+        'processed_before': processed_before,
+        'has_columns': args.getlist('column'),
+        'min_stages': parse_int_arg(args, 'min_stages'),
+        'max_stages': parse_int_arg(args, 'max_stages')
+    }
     
-    # Sort by name
-    experiments.sort(key=lambda x: x['name'])
-    return experiments
+    limit = parse_int_arg(args, 'limit', config.EXPERIMENTS_PAGE_SIZE)
+    if limit < 1 or limit > MAX_EXPERIMENTS_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_EXPERIMENTS_PAGE_SIZE}")
+    offset = parse_int_arg(args, 'offset', 0)
+    if offset < 0:
+        raise ValueError("offset must not be negative")
+    
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()] or DEFAULT_EXPERIMENT_FIELDS
+    unknown_fields = [f for f in fields if f not in EXPERIMENT_FIELDS]
+    if unknown_fields:
+        raise ValueError(f"Unknown fields: {', '.join(unknown_fields)}")
+    
+    after = None
+    if args.get('cursor'):
+        sort, descending, after = decode_cursor(args['cursor'])
+        offset = 0
+    else:
+        sort = args.get('sort', 'name')
+        descending = sort.startswith('-')
+        sort = sort.lstrip('-')
+    if sort not in ('name', 'processed_at', 'stages', 'rows', 'duration'):
+        raise ValueError(f"Invalid sort: {sort}")
+    
+    catalog = get_catalog(app.config['REPORTS_FOLDER'])
+    rows = catalog.list_experiments(
+        sort=sort, descending=descending, limit=limit, offset=offset, after=after, **filters
+    )
+    
+    return {
+        'items': [{field: EXPERIMENT_FIELDS[field](row) for field in fields} for row in rows],
+        'total': catalog.count_experiments(**filters),
+        'limit': limit,
+        'offset': offset,
+        'next_offset': offset + len(rows) if after is None and len(rows) == limit else None,
+        'next_cursor': encode_cursor(sort, descending, rows[-1]) if len(rows) == limit else None
+    }
 
 # Helper to get experiment directory
 def get_experiment_dir(experiment_name):
@@ -126,34 +429,21 @@ def get_experiment_data(experiment_name):
     """Get data for a specific experiment"""
     try:
         exp_dir = os.path.join(app.config['REPORTS_FOLDER'], experiment_name)
-        if not os.path.exists(exp_dir):
+        if experiment_name not in report_cache.list_dir(app.config['REPORTS_FOLDER']):
             return None
         
         # Attempt to load experiment summary
-        summary_path = os.path.join(exp_dir, "experiment_summary.json")
-        summary = None
-        
-        if os.path.exists(summary_path):
-            try:
-                with open(summary_path, 'r') as f:
-                    summary = json.load(f)
-            except Exception as e:
-                app.logger.error(f"Error loading summary for {experiment_name}: {e}")
+        summary = load_summary(exp_dir, experiment_name)
         
         # Get stage information
         stages = []
-        stage_dirs = sorted(glob.glob(os.path.join(exp_dir, "stage_*")))
-        
-        for stage_dir in stage_dirs:
-            stage_num = os.path.basename(stage_dir).split('_')[1]
+        for stage_num in list_stage_numbers(exp_dir):
+            # Check for stage plotly data
+            stage_dir = os.path.join(exp_dir, f"stage_{stage_num}")
             try:
-                stage_num = int(stage_num)
-            except ValueError:
+                has_plotly = f"stage_{stage_num}_plotly.json" in report_cache.list_dir(stage_dir)
+            except OSError:
                 continue
-                
-            # Check for stage plotly data
-            plotly_path = os.path.join(stage_dir, f"stage_{stage_num}_plotly.json")
-            has_plotly = os.path.exists(plotly_path)
             
             stages.append({
                 'number': stage_num,
@@ -167,9 +457,6 @@ def get_experiment_data(experiment_name):
                     if str(stage['number']) == str(stage_num):
                         stage.update(stage_info)
         
-        # Sort stages by number
-        stages.sort(key=lambda x: x['number'])
-        
         return {
             'name': experiment_name,
             'summary': summary,
@@ -184,8 +471,9 @@ def get_experiment_data(experiment_name):
 def index():
     """Main page with list of experiments"""
     try:
-        experiments = get_experiments()
-        return render_template('index.html', experiments=experiments)
+        # Render the first page right away, the rest is fetched from /api/experiments
+        page = query_experiments(request.args)
+        return render_template('index.html', experiments=page['items'], page=page)
     except Exception as e:
         app.logger.error(f"Error in index route: {e}")
         error_details = traceback.format_exc()
@@ -236,33 +524,149 @@ def serve_static(path):
 # API Routes
 @app.route('/api/experiments')
 def api_experiments():
-    """API endpoint to get all experiments"""
+    """API endpoint to list experiments.
+
+    Without query arguments the full list is returned. With any of
+    limit/offset/cursor/q/processed_after/processed_before/column/
+    min_stages/max_stages/sort/fields a page of projected items is returned.
+    """
     try:
-        experiments = get_experiments()
-        return jsonify(experiments)
+        if EXPERIMENT_QUERY_ARGS.isdisjoint(request.args.keys()):
+            return jsonify(get_experiments())
+        return jsonify(query_experiments(request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error in api_experiments: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def send_plot_file(plotly_path):
+    """Send a stored Plotly JSON file without re-parsing it.
+
+    The bytes on disk are already valid Plotly JSON, so they are sent as-is,
+    from the report cache when the file fits its budget and streamed with
+    send_file otherwise. ETag and Last-Modified are derived from the file's
+    mtime and size, and conditional requests are answered with 304.
+    """
+    plotly_path = os.path.abspath(plotly_path)
+    cached = report_cache.get_file(plotly_path)
+    if cached is None:
+        return send_file(plotly_path, mimetype='application/json', conditional=True, etag=True)
+    
+    response = app.response_class(cached.data, mimetype='application/json')
+    response.set_etag(cached.etag)
+    response.last_modified = cached.mtime
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def find_plot_file(plot_dir, plot_type_map, plot_type, legacy_filename):
+    """Locate the plot file for a plot type, falling back to the legacy filename.
+
+    Returns a tuple of (path, available_types). The path is None when the
+    requested plot does not exist, in which case available_types lists the
+    plot types that do exist in plot_dir.
+    """
+    try:
+        files = set(report_cache.list_dir(plot_dir))
+    except OSError:
+        files = set()
+
+    if plot_type_map[plot_type] in files:
+        return os.path.join(plot_dir, plot_type_map[plot_type]), None
+
+    has_legacy = legacy_filename in files
+    if plot_type == 'temperature' and has_legacy:
+        logger.debug(f"Using legacy plot file: {legacy_filename}")
+        return os.path.join(plot_dir, legacy_filename), None
+
+    # The requested plot doesn't exist, list the available ones
+    available_plots = [
+        plot_key for plot_key, plot_name in plot_type_map.items()
+        if plot_name in files
+    ]
+    if has_legacy and 'temperature' not in available_plots:
+        available_plots.append('temperature')
+
+    return None, available_plots
+
+@app.route('/api/cache')
+def api_cache_stats():
+    """API endpoint for report cache hit/miss counters and memory usage"""
+    return jsonify(report_cache.stats())
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics endpoint (add ?format=json for JSON), local clients only unless configured"""
+    if not config.METRICS_ALLOW_REMOTE and request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({"error": "Metrics are only available from localhost"}), 403
+    if request.args.get('format') == 'json':
+        return jsonify(metrics_registry.as_dict())
+    return app.response_class(metrics_registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/watcher')
+def api_watcher_status():
+    """API endpoint for report watcher state and recent change events"""
+    if report_watcher is None:
+        return jsonify({'running': False, 'enabled': False})
+    return jsonify(dict(report_watcher.status(), enabled=True))
+
+@app.route('/api/profiles')
+def api_profiles():
+    """API endpoint listing stored request profiles, newest first"""
+    if not is_diagnostics_client():
+        return jsonify({"error": "Diagnostics are not available to this client"}), 403
+    return jsonify({'enabled': config.REQUEST_PROFILING_ENABLED, 'profiles': profile_store.list()})
+
+@app.route('/api/profiles/<profile_id>')
+def api_profile(profile_id):
+    """API endpoint for one request profile summary; ?format=prof downloads the cProfile dump"""
+    if not is_diagnostics_client():
+        return jsonify({"error": "Diagnostics are not available to this client"}), 403
+    if request.args.get('format') == 'prof':
+        dump_path = profile_store.dump_path(profile_id)
+        if dump_path is None:
+            return jsonify({"error": f"Profile '{profile_id}' not found"}), 404
+        return send_file(dump_path, mimetype='application/octet-stream', as_attachment=True,
+                         download_name=f"{profile_id}.prof")
+    summary = profile_store.get(profile_id)
+    if summary is None:
+        return jsonify({"error": f"Profile '{profile_id}' not found"}), 404
+    return jsonify(summary)
+
+@app.route('/api/slow-requests')
+def api_slow_requests():
+    """API endpoint for recent requests over the slow-request threshold, with their stack samples"""
+    if not is_diagnostics_client():
+        return jsonify({"error": "Diagnostics are not available to this client"}), 403
+    if slow_request_monitor is None:
+        return jsonify({'enabled': False, 'requests': []})
+    return jsonify({
+        'enabled': True,
+        'threshold_seconds': slow_request_monitor.threshold,
+        'requests': slow_request_monitor.recent()
+    })
+
 @app.route('/api/experiment/<experiment_name>/overall')
 def api_experiment_overall(experiment_name):
     """API endpoint for overall experiment plot data"""
     try:
         # URL decode the experiment name
         decoded_name = urllib.parse.unquote(experiment_name)
-        app.logger.info(f"API request for experiment overall plot: {decoded_name}, type: {request.args.get('type', 'temperature')}")
         
         # Get plot type from query parameters (default to 'temperature')
         plot_type = request.args.get('type', 'temperature')
+        logger.debug(f"API request for experiment overall plot: {decoded_name}, type: {plot_type}")
         
         # Map of plot types to filenames
         plot_type_map = {
             'temperature': f"{decoded_name}_temp_plotly_data.json",
             'multipoint': f"{decoded_name}_multipoint_temp_plotly_data.json",
+            'multipoint_heatmap': f"{decoded_name}_multipoint_heatmap_plotly_data.json",
             'saturator': f"{decoded_name}_saturator_temp_plotly_data.json",
             'pressure': f"{decoded_name}_pressure_plotly_data.json",
             'flow': f"{decoded_name}_flow_plotly_data.json",
-            'outlet': f"{decoded_name}_outlet_plotly_data.json"
+            'outlet': f"{decoded_name}_outlet_plotly_data.json",
+            'derived': f"{decoded_name}_derived_plotly_data.json"
         }
         
         # Check if the requested plot type is valid
@@ -270,40 +674,12 @@ def api_experiment_overall(experiment_name):
             app.logger.warning(f"Invalid plot type requested: {plot_type}")
             return jsonify({"error": f"Invalid plot type: {plot_type}", "available_types": list(plot_type_map.keys())}), 400
         
-        # Get the filename for the requested plot type
-        filename = plot_type_map[plot_type]
-        
-        # Check for overall plotly file
         exp_dir = os.path.join(app.config['REPORTS_FOLDER'], decoded_name)
-        plotly_path = os.path.join(exp_dir, filename)
-        
-        app.logger.info(f"Looking for plot file at: {plotly_path}")
-        app.logger.info(f"File exists: {os.path.exists(plotly_path)}")
-        app.logger.info(f"Absolute path: {os.path.abspath(plotly_path)}")
-        
-        # Fall back to legacy filename if the new one doesn't exist
-        if not os.path.exists(plotly_path) and plot_type == 'temperature':
-            legacy_path = os.path.join(exp_dir, f"{decoded_name}_plotly_data.json")
-            app.logger.info(f"Checking legacy path: {legacy_path}")
-            app.logger.info(f"Legacy file exists: {os.path.exists(legacy_path)}")
-            app.logger.info(f"Absolute legacy path: {os.path.abspath(legacy_path)}")
-            if os.path.exists(legacy_path):
-                plotly_path = legacy_path
-                logger.info(f"Using legacy plot file: {legacy_path}")
-        
-        if not os.path.exists(plotly_path):
-            # If the specific plot doesn't exist, list available plots
-            available_plots = []
-            for plot_key, plot_name in plot_type_map.items():
-                test_path = os.path.join(exp_dir, plot_name)
-                if os.path.exists(test_path):
-                    available_plots.append(plot_key)
-            
-            # Also check for legacy plot files
-            legacy_path = os.path.join(exp_dir, f"{decoded_name}_plotly_data.json")
-            if os.path.exists(legacy_path) and 'temperature' not in available_plots:
-                available_plots.append('temperature')
-            
+        plotly_path, available_plots = find_plot_file(
+            exp_dir, plot_type_map, plot_type, f"{decoded_name}_plotly_data.json"
+        )
+        
+        if plotly_path is None:
             if not available_plots:
                 logger.warning(f"No plot data found for experiment {decoded_name}")
                 return jsonify({"error": "No plot data found. Try regenerating visualizations."}), 404
@@ -314,10 +690,7 @@ def api_experiment_overall(experiment_name):
                     "available_types": available_plots
                 }), 404
         
-        with open(plotly_path, 'r') as f:
-            plot_data = json.load(f)
-        
-        return jsonify(plot_data)
+        return send_plot_file(plotly_path)
     except Exception as e:
         logger.error(f"Error in api_experiment_overall: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -328,19 +701,21 @@ def api_experiment_stage(experiment_name, stage_num):
     try:
         # URL decode the experiment name
         decoded_name = urllib.parse.unquote(experiment_name)
-        app.logger.info(f"API request for stage plot: {decoded_name}, stage: {stage_num}, type: {request.args.get('type', 'temperature')}")
         
         # Get plot type from query parameters (default to 'temperature')
         plot_type = request.args.get('type', 'temperature')
+        logger.debug(f"API request for stage plot: {decoded_name}, stage: {stage_num}, type: {plot_type}")
         
         # Map of plot types to filenames
         plot_type_map = {
             'temperature': f"stage_{stage_num}_temp_plotly.json",
             'multipoint': f"stage_{stage_num}_multipoint_temp_plotly.json",
+            'multipoint_heatmap': f"stage_{stage_num}_multipoint_heatmap_plotly.json",
             'saturator': f"stage_{stage_num}_saturator_temp_plotly.json",
             'pressure': f"stage_{stage_num}_pressure_plotly.json",
             'flow': f"stage_{stage_num}_flow_plotly.json",
-            'outlet': f"stage_{stage_num}_outlet_plotly.json"
+            'outlet': f"stage_{stage_num}_outlet_plotly.json",
+            'derived': f"stage_{stage_num}_derived_plotly.json"
         }
         
         # Check if the requested plot type is valid
@@ -348,40 +723,12 @@ def api_experiment_stage(experiment_name, stage_num):
             app.logger.warning(f"Invalid stage plot type requested: {plot_type}")
             return jsonify({"error": f"Invalid plot type: {plot_type}", "available_types": list(plot_type_map.keys())}), 400
         
-        # Get the filename for the requested plot type
-        filename = plot_type_map[plot_type]
-        
-        # Check for stage plotly file
         stage_dir = os.path.join(app.config['REPORTS_FOLDER'], decoded_name, f"stage_{stage_num}")
-        plotly_path = os.path.join(stage_dir, filename)
-        
-        app.logger.info(f"Looking for stage plot file at: {plotly_path}")
-        app.logger.info(f"Stage plot file exists: {os.path.exists(plotly_path)}")
-        app.logger.info(f"Absolute stage path: {os.path.abspath(plotly_path)}")
-        
-        # Fall back to legacy filename if the new one doesn't exist
-        if not os.path.exists(plotly_path) and plot_type == 'temperature':
-            legacy_path = os.path.join(stage_dir, f"stage_{stage_num}_plotly.json")
-            app.logger.info(f"Checking stage legacy path: {legacy_path}")
-            app.logger.info(f"Stage legacy file exists: {os.path.exists(legacy_path)}")
-            app.logger.info(f"Absolute stage legacy path: {os.path.abspath(legacy_path)}")
-            if os.path.exists(legacy_path):
-                plotly_path = legacy_path
-                logger.info(f"Using legacy plot file: {legacy_path}")
-        
-        if not os.path.exists(plotly_path):
-            # If the specific plot doesn't exist, list available plots
-            available_plots = []
-            for plot_key, plot_name in plot_type_map.items():
-                test_path = os.path.join(stage_dir, plot_name)
-                if os.path.exists(test_path):
-                    available_plots.append(plot_key)
-            
-            # Also check for legacy plot files
-            legacy_path = os.path.join(stage_dir, f"stage_{stage_num}_plotly.json")
-            if os.path.exists(legacy_path) and 'temperature' not in available_plots:
-                available_plots.append('temperature')
-            
+        plotly_path, available_plots = find_plot_file(
+            stage_dir, plot_type_map, plot_type, f"stage_{stage_num}_plotly.json"
+        )
+        
+        if plotly_path is None:
             if not available_plots:
                 logger.warning(f"No plot data found for stage {stage_num} in experiment {decoded_name}")
                 return jsonify({"error": f"Stage {stage_num} plot data not found. Try regenerating visualizations."}), 404
@@ -392,27 +739,265 @@ def api_experiment_stage(experiment_name, stage_num):
                     "available_types": available_plots
                 }), 404
         
-        with open(plotly_path, 'r') as f:
-            plot_data = json.load(f)
-        
-        return jsonify(plot_data)
+        return send_plot_file(plotly_path)
     except Exception as e:
         logger.error(f"Error in api_experiment_stage: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/experiment/<experiment_name>/profile')
+def api_experiment_profile(experiment_name):
+    """API endpoint returning the multipoint temperature profile along the bed at given times.
+
+    t (repeatable, minutes) selects the times; each gets the nearest sample
+    with its stage, the value of every thermocouple and the hotspot position.
+    """
+    try:
+        try:
+            from Processors.multipoint import MultipointProfile
+        except ImportError:
+            from multipoint import MultipointProfile
+
+        decoded_name = urllib.parse.unquote(experiment_name)
+        times = request.args.getlist('t')
+        if not times:
+            raise ValueError("Give at least one time t (minutes)")
+        try:
+            times = [float(t) for t in times]
+        except ValueError:
+            raise ValueError("t must be a number of minutes")
+
+        profile_path = os.path.join(get_experiment_dir(decoded_name), f"{decoded_name}_multipoint_profile.npz")
+        if not os.path.exists(profile_path):
+            return jsonify({"error": "No multipoint profile found. Try regenerating visualizations."}), 404
+        def load_profile(path, stat_result):
+            profile = MultipointProfile.load(path)
+            return profile, profile.nbytes
+        profile = report_cache.get('multipoint', profile_path, load_profile)
+        return jsonify({'positions': profile.labels, 'profiles': profile.profile_at(times)})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception(f"Error in api_experiment_profile: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def parse_optional_float(name):
+    """Read an optional numeric query argument, raising ValueError for anything else"""
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number of minutes")
+
+def parse_stage_numbers(values):
+    """Stage numbers from a list of integers or numeric strings (or a single integer), raising ValueError for anything else"""
+    if isinstance(values, int) and not isinstance(values, bool):
+        values = [values]
+    if not isinstance(values, list):
+        raise ValueError("stages must be a list of stage numbers")
+    stages = []
+    for value in values:
+        try:
+            if isinstance(value, bool) or not isinstance(value, (int, str)):
+                raise ValueError
+            stages.append(int(value))
+        except ValueError:
+            raise ValueError(f"Invalid stage number: {value!r}")
+    return stages
+
+@app.route('/api/experiment/<experiment_name>/export')
+def api_experiment_export(experiment_name):
+    """API endpoint streaming selected columns of an experiment as CSV or Parquet.
+
+    cols (comma-separated, repeatable) and stages (comma-separated stage
+    numbers) narrow the export; t0 and t1 are bounds on Time_Minutes. format
+    is csv (default) or parquet, and gzip=1 compresses CSV output on the fly.
+    """
+    try:
+        try:
+            from Processors.export import ExportRequest
+        except ImportError:
+            from export import ExportRequest
+
+        decoded_name = urllib.parse.unquote(experiment_name)
+        if decoded_name in ('.', '..') or os.sep in decoded_name:
+            raise FileNotFoundError(f"Experiment '{decoded_name}' not found")
+        columns = [col.strip() for value in request.args.getlist('cols') for col in value.split(',') if col.strip()]
+        stages = [value for values in request.args.getlist('stages') for value in values.split(',') if value.strip()]
+        try:
+            stages = [int(stage) for stage in stages] or None
+        except ValueError:
+            raise ValueError("stages must be stage numbers")
+        compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+        # Validate everything before the response starts so errors still get a status code
+        export = ExportRequest(
+            app.config['REPORTS_FOLDER'], decoded_name, columns or None, stages,
+            parse_optional_float('t0'), parse_optional_float('t1'),
+            request.args.get('format', 'csv').lower()
+        )
+        response = app.response_class(
+            stream_with_context(export.iter_bytes(compress)), mimetype=export.mimetype(compress)
+        )
+        response.headers.set('Content-Disposition', 'attachment', filename=export.filename(compress))
+        return response
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logger.exception(f"Error in api_experiment_export: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def get_overlay_cache():
+    """Return the overlay cache, importing the overlay module (and numpy/pandas) on first use"""
+    try:
+        from Processors.overlay import overlay_cache
+    except ImportError:
+        from overlay import overlay_cache
+    return overlay_cache
+
+@app.route('/api/overlay', methods=['GET', 'POST'])
+def api_overlay():
+    """API endpoint overlaying columns of several experiments on a shared, downsampled time grid.
+
+    GET takes repeated experiment=, column= and stage= arguments; POST takes a
+    JSON body with experiments, columns and stages lists (stages may also be a
+    single stage number). Both accept align (absolute, stage_start or
+    time_on_stream) and points.
+    """
+    try:
+        if request.method == 'POST':
+            body = request.get_json(silent=True) or {}
+            experiments = body.get('experiments') or []
+            columns = body.get('columns') or []
+            stages = body.get('stages')
+            align = body.get('align', 'absolute')
+            points = body.get('points')
+        else:
+            experiments = request.args.getlist('experiment')
+            columns = request.args.getlist('column')
+            stages = request.args.getlist('stage') or None
+            align = request.args.get('align', 'absolute')
+            points = request.args.get('points')
+
+        if not isinstance(experiments, list) or not isinstance(columns, list):
+            raise ValueError("experiments and columns must be lists")
+        if stages is not None:
+            stages = parse_stage_numbers(stages)
+        if points is not None:
+            if isinstance(points, bool) or not isinstance(points, (int, str)):
+                raise ValueError("points must be an integer")
+            try:
+                points = int(points)
+            except ValueError:
+                raise ValueError("points must be an integer")
+            if not 2 <= points <= config.OVERLAY_MAX_POINTS:
+                raise ValueError(f"points must be between 2 and {config.OVERLAY_MAX_POINTS}")
+
+        etag, data = get_overlay_cache().get(
+            app.config['REPORTS_FOLDER'], [str(name) for name in experiments], [str(name) for name in columns],
+            stages, align, points
+        )
+        response = app.response_class(data, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logger.exception(f"Error in api_overlay: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/stage-aggregates')
+def api_stage_aggregates():
+    """API endpoint querying per-stage aggregates across all experiments.
+
+    select= (repeatable) takes terms like mean(NH3 out [%]), where=
+    (repeatable) conditions like mean(R1/2 T set [°C])>=545, experiment~name
+    or stage=2; group_by (experiment, stage or all), agg and limit are optional.
+    """
+    try:
+        start = time.perf_counter()
+        limit = request.args.get('limit')
+        result = query_stage_aggregates(
+            app.config['REPORTS_FOLDER'],
+            request.args.getlist('select'),
+            request.args.getlist('where'),
+            request.args.get('group_by') or None,
+            request.args.get('agg', 'avg'),
+            int(limit) if limit else None
+        )
+        return jsonify(dict(result, elapsed_ms=(time.perf_counter() - start) * 1000))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception(f"Error in api_stage_aggregates: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/columns')
+def api_columns():
+    """API endpoint listing every recorded column with the experiments that have it and its overall range"""
+    try:
+        return jsonify(list_columns(app.config['REPORTS_FOLDER'], request.args.get('pattern')))
+    except Exception as e:
+        logger.exception(f"Error in api_columns: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/columns/search')
+def api_columns_search():
+    """API endpoint finding experiments by column and value range.
+
+    column= (repeatable) patterns must all be present; where= (repeatable)
+    conditions like max(R-1/2 T* °C)>600 must all hold. Patterns use * and ?
+    as wildcards.
+    """
+    try:
+        start = time.perf_counter()
+        limit = request.args.get('limit')
+        experiments = find_experiments(
+            app.config['REPORTS_FOLDER'],
+            request.args.getlist('column'),
+            request.args.getlist('where'),
+            int(limit) if limit else None
+        )
+        return jsonify({
+            'experiments': experiments,
+            'count': len(experiments),
+            'elapsed_ms': (time.perf_counter() - start) * 1000
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception(f"Error in api_columns_search: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def job_response(job, message):
+    """Respond to a submitted job, or wait for it when the request has ?wait=1"""
+    if request.args.get('wait', '').lower() in ('1', 'true', 'yes'):
+        job = job_manager.wait(job.id)
+        if job.state == 'failed':
+            return jsonify({"success": False, "message": f"Error: {job.error}", "job": job.to_dict()}), 500
+        return jsonify(dict(job.result, success=True, message=message, job=job.to_dict()))
+    
+    return jsonify({
+        "success": True,
+        "message": message,
+        "job_id": job.id,
+        "status_url": url_for('api_job_status', job_id=job.id),
+        "events_url": url_for('api_job_events', job_id=job.id)
+    }), 202
+
 @app.route('/api/process/<experiment_name>')
 def api_process_experiment(experiment_name):
-    """API endpoint to process a single experiment"""
+    """API endpoint to process a single experiment as a background job"""
     try:
         # URL decode the experiment name
         decoded_name = urllib.parse.unquote(experiment_name)
         
-        # Initialize processor
-        processor = ExperimentalDataProcessor(
-            input_folder=app.config['UPLOAD_FOLDER'],
-            output_folder=app.config['REPORTS_FOLDER']
-        )
-        
         # Find file(s) for this experiment in uploads folder
         files = glob.glob(os.path.join(app.config['UPLOAD_FOLDER'], f"{decoded_name}*.txt"))
         
@@ -422,27 +1007,12 @@ def api_process_experiment(experiment_name):
                 "message": f"No files found for experiment '{decoded_name}' in uploads folder"
             })
         
-        # Process each file
-        processed_files = []
-        for file_path in files:
-            filename = os.path.basename(file_path)
-            try:
-                processor.process_file(filename)
-                processed_files.append(filename)
-            except Exception as e:
-                app.logger.error(f"Error processing {filename}: {str(e)}")
-        
-        if not processed_files:
-            return jsonify({
-                "success": False,
-                "message": f"Failed to process any files for experiment '{decoded_name}'"
-            })
-        
-        return jsonify({
-            "success": True,
-            "message": f"Processed {len(processed_files)} files for experiment '{decoded_name}'",
-            "processed_files": processed_files
-        })
+        filenames = [os.path.basename(file_path) for file_path in files]
+        job = job_manager.submit(
+            'process', f"Process {decoded_name}", process_files_task,
+            app.config['UPLOAD_FOLDER'], app.config['REPORTS_FOLDER'], filenames
+        )
+        return job_response(job, f"Processing {len(filenames)} files for experiment '{decoded_name}'")
         
     except Exception as e:
         app.logger.error(f"Error in api_process_experiment: {str(e)}")
@@ -454,14 +1024,8 @@ def api_process_experiment(experiment_name):
 
 @app.route('/api/process-all')
 def api_process_all_experiments():
-    """API endpoint to process all experiments"""
+    """API endpoint to process all new or changed experiments as a background job"""
     try:
-        # Initialize processor
-        processor = ExperimentalDataProcessor(
-            input_folder=app.config['UPLOAD_FOLDER'],
-            output_folder=app.config['REPORTS_FOLDER']
-        )
-        
         # Get all text files in uploads folder
         files = glob.glob(os.path.join(app.config['UPLOAD_FOLDER'], "*.txt"))
         
@@ -471,28 +1035,14 @@ def api_process_all_experiments():
                 "message": "No files found in uploads folder"
             })
         
-        # Process each file
-        processed_files = []
-        errors = []
-        
-        for file_path in files:
-            filename = os.path.basename(file_path)
-            try:
-                processor.process_file(filename)
-                processed_files.append(filename)
-            except Exception as e:
-                app.logger.error(f"Error processing {filename}: {str(e)}")
-                errors.append({
-                    "file": filename,
-                    "error": str(e)
-                })
-        
-        return jsonify({
-            "success": True,
-            "message": f"Processed {len(processed_files)} files with {len(errors)} errors",
-            "processed_files": processed_files,
-            "errors": errors
-        })
+        # Files the processing manifest lists as up to date are skipped unless ?force=1
+        force = request.args.get('force', '').lower() in ('1', 'true', 'yes')
+        filenames = [os.path.basename(file_path) for file_path in files]
+        job = job_manager.submit(
+            'process-all', "Process all uploaded files", process_files_task,
+            app.config['UPLOAD_FOLDER'], app.config['REPORTS_FOLDER'], filenames, not force
+        )
+        return job_response(job, f"Processing {len(filenames)} files" + (" (forced)" if force else " (changed files only)"))
         
     except Exception as e:
         app.logger.error(f"Error in api_process_all_experiments: {str(e)}")
@@ -504,7 +1054,7 @@ def api_process_all_experiments():
 
 @app.route('/api/visualize/<experiment_name>', methods=['GET'])
 def api_visualize_experiment(experiment_name):
-    """API endpoint to visualize an experiment and create plotly JSON files."""
+    """API endpoint to recreate the plotly JSON files of an experiment as a background job."""
     try:
         experiment_name = urllib.parse.unquote(experiment_name)
         logger.info(f"Visualizing experiment: {experiment_name}")
@@ -513,93 +1063,72 @@ def api_visualize_experiment(experiment_name):
         if not os.path.exists(experiment_dir):
             return jsonify({'success': False, 'message': 'Experiment not found'}), 404
         
-        # Get stage folders
-        stage_folders = []
-        for folder in os.listdir(experiment_dir):
-            if folder.startswith('stage_') and os.path.isdir(os.path.join(experiment_dir, folder)):
-                stage_folders.append(folder)
-        
-        if not stage_folders:
+        if not list_stage_numbers(experiment_dir):
             return jsonify({'success': False, 'message': 'No stage data found for this experiment'}), 404
         
-        # Parse stage numbers and sort
-        stage_numbers = []
-        for folder in stage_folders:
-            try:
-                stage_num = int(folder.replace('stage_', ''))
-                stage_numbers.append(stage_num)
-            except ValueError:
-                continue
-        
-        stage_numbers.sort()
-        
-        # Import the create_stage_plotly_json and create_plotly_json functions directly
-        # to avoid circular import issues
-        processor = ExperimentalDataProcessor(
-            input_folder=app.config['UPLOAD_FOLDER'],
-            output_folder=app.config['REPORTS_FOLDER']
+        job = job_manager.submit(
+            'visualize', f"Regenerate plots for {experiment_name}", regenerate_visualizations_task,
+            app.config['UPLOAD_FOLDER'], app.config['REPORTS_FOLDER'], experiment_name
         )
-        
-        # Create JSON files for each stage
-        for stage_num in stage_numbers:
-            stage_dir = os.path.join(experiment_dir, f"stage_{stage_num}")
-            stage_data_file = os.path.join(stage_dir, f"stage_{stage_num}_data.json")
-            
-            if os.path.exists(stage_data_file):
-                try:
-                    # Load the stage data
-                    with open(stage_data_file, 'r') as f:
-                        stage_data = json.load(f)
-                    
-                    # Convert JSON to DataFrame
-                    stage_df = pd.DataFrame(stage_data)
-                    
-                    # Generate the multiple plot files for this stage
-                    logger.info(f"Generating plots for stage {stage_num}")
-                    processor.create_stage_plotly_json(
-                        stage_df, 
-                        int(stage_num), 
-                        experiment_name, 
-                        stage_dir
-                    )
-                except Exception as e:
-                    logger.error(f"Error generating plots for stage {stage_num}: {str(e)}")
-            else:
-                logger.warning(f"Stage data file not found for stage {stage_num}")
-        
-        # Create overall plotly JSON files
-        logger.info("Generating overall plots for all stages")
-        
-        # Load all stage data
-        stages_data = {}
-        for stage_num in stage_numbers:
-            stage_data_file = os.path.join(experiment_dir, f"stage_{stage_num}", f"stage_{stage_num}_data.json")
-            if os.path.exists(stage_data_file):
-                try:
-                    with open(stage_data_file, 'r') as f:
-                        stage_data = json.load(f)
-                    stages_data[stage_num] = pd.DataFrame(stage_data)
-                except Exception as e:
-                    logger.error(f"Error loading data for stage {stage_num}: {str(e)}")
-        
-        if stages_data:
-            # Generate overall plots
-            processor.create_plotly_json(
-                stages_data,
-                experiment_name,
-                datetime.now().strftime("%Y%m%d_%H%M%S"),
-                experiment_dir
-            )
-        
-        return jsonify({
-            'success': True, 
-            'message': f'Visualizations created for {len(stage_numbers)} stages'
-        })
+        return job_response(job, f"Regenerating visualizations for '{experiment_name}'")
     
     except Exception as e:
         logger.exception(f"Error visualizing experiment: {str(e)}")
         return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
 
+@app.route('/api/jobs')
+def api_jobs():
+    """API endpoint listing background jobs that are queued, running or recently finished"""
+    return jsonify([job.to_dict() for job in job_manager.list()])
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """API endpoint for the state, progress, result and error of a background job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job '{job_id}' not found or expired"}), 404
+    return jsonify(job.to_dict())
+
+# Seconds between keep-alive comments on idle event streams
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+
+@app.route('/api/jobs/<job_id>/events')
+def api_job_events(job_id):
+    """Server-Sent Events stream of a job's progress events, ending with a 'done' event.
+
+    Reconnecting clients resume after the Last-Event-ID they received.
+    """
+    if job_manager.get(job_id) is None:
+        return jsonify({"error": f"Job '{job_id}' not found or expired"}), 404
+    
+    try:
+        start = int(request.headers.get('Last-Event-ID', -1)) + 1
+    except ValueError:
+        start = 0
+    
+    def generate(index):
+        # Tell EventSource how long to wait before reconnecting
+        yield "retry: 2000\n\n"
+        while True:
+            try:
+                events, finished = job_manager.wait_for_events(job_id, index, timeout=JOB_EVENTS_KEEPALIVE_SECONDS)
+            except KeyError:
+                return
+            for event in events:
+                yield f"id: {index}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+                index += 1
+            if finished:
+                job = job_manager.get(job_id)
+                yield f"event: done\ndata: {json.dumps(job.to_dict() if job else {})}\n\n"
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+    
+    response = app.response_class(stream_with_context(generate(start)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/upload', methods=['GET', 'POST'])
 def upload_file():
     """Upload a file to the uploads folder"""
@@ -624,6 +1153,102 @@ def upload_file():
     
     return render_template('upload.html')
 
+def chunk_pieces(stream, piece_size=1024 * 1024):
+    """Yield the request body in pieces so large chunks aren't buffered whole"""
+    while True:
+        piece = stream.read(piece_size)
+        if not piece:
+            return
+        yield piece
+
+@app.route('/api/uploads', methods=['POST'])
+def api_create_upload():
+    """Start a chunked upload.
+
+    JSON body: filename (.txt or .txt.gz), optional size (bytes that will be
+    sent), compressed (defaults to the .gz suffix) and process (default true).
+    """
+    params = request.get_json(silent=True)
+    if not isinstance(params, dict):
+        params = {}
+    try:
+        filename = params.get('filename', '')
+        if not isinstance(filename, str):
+            raise UploadError("filename must be a string")
+        size = params.get('size')
+        if size is not None:
+            if isinstance(size, bool) or not isinstance(size, (int, str)):
+                raise UploadError("size must be a number of bytes")
+            try:
+                size = int(size)
+            except ValueError:
+                raise UploadError("size must be a number of bytes")
+        session = upload_manager.create(
+            secure_filename(filename), size=size, compressed=params.get('compressed'),
+            process=params.get('process', True)
+        )
+    except (UploadError, ValueError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    return jsonify(dict(
+        session.status(),
+        success=True,
+        chunk_size=config.UPLOAD_CHUNK_SIZE,
+        upload_url=url_for('api_upload', upload_id=session.id)
+    )), 201
+
+@app.route('/api/uploads/<upload_id>', methods=['GET', 'PUT', 'DELETE'])
+def api_upload(upload_id):
+    """Upload status (GET), append a chunk at ?offset= (PUT), or abort (DELETE)"""
+    session = upload_manager.get(upload_id)
+    if session is None:
+        return jsonify({"success": False, "message": f"Upload '{upload_id}' not found or expired"}), 404
+    
+    if request.method == 'GET':
+        return jsonify(session.status())
+    
+    if request.method == 'DELETE':
+        upload_manager.abort(session)
+        return jsonify({"success": True, "message": "Upload aborted"})
+    
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({"success": False, "message": "offset is required"}), 400
+    try:
+        for piece in chunk_pieces(request.stream):
+            offset = session.append(offset, piece)
+    except OffsetMismatch as e:
+        # The client resumes from the offset the server actually has
+        return jsonify(dict(session.status(), success=False, message=str(e))), 409
+    except UploadError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify(dict(session.status(), success=True))
+
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def api_complete_upload(upload_id):
+    """Finish a chunked upload, store the file and start processing the already parsed data"""
+    session = upload_manager.get(upload_id)
+    if session is None:
+        return jsonify({"success": False, "message": f"Upload '{upload_id}' not found or expired"}), 404
+    
+    try:
+        filename, parsed_path = upload_manager.complete(session)
+    except UploadError as e:
+        return jsonify(dict(session.status(), success=False, message=str(e))), 400
+    
+    result = dict(session.status(), success=True, message=f"Uploaded {filename}")
+    if session.meta['process']:
+        job = job_manager.submit(
+            'upload', f"Process uploaded {filename}", process_upload_task,
+            app.config['UPLOAD_FOLDER'], app.config['REPORTS_FOLDER'], filename, parsed_path
+        )
+        result.update(
+            job_id=job.id,
+            status_url=url_for('api_job_status', job_id=job.id),
+            events_url=url_for('api_job_events', job_id=job.id)
+        )
+    return jsonify(result)
+
 @app.route('/documentation')
 def documentation():
     """Documentation page with information about the application"""
@@ -636,25 +1261,27 @@ def api_fix_experiment_json(experiment_name):
         experiment_name = urllib.parse.unquote(experiment_name)
         logger.info(f"Fixing JSON files for experiment: {experiment_name}")
         
-        # Initialize processor
-        processor = ExperimentalDataProcessor(
-            input_folder=app.config['UPLOAD_FOLDER'],
-            output_folder=app.config['REPORTS_FOLDER']
-        )
-        
-        # Fix JSON files
-        success = processor.fix_plotly_json_files(experiment_name)
-        
-        if success:
-            return jsonify({
-                "success": True,
-                "message": f"Successfully fixed JSON files for experiment '{experiment_name}'"
-            })
-        else:
+        exp_dir = get_experiment_dir(experiment_name)
+        if experiment_name not in report_cache.list_dir(app.config['REPORTS_FOLDER']) or not os.path.isdir(exp_dir):
             return jsonify({
                 "success": False,
                 "message": f"Failed to fix JSON files for experiment '{experiment_name}'"
             }), 404
+        
+        # Fix JSON files (streaming, so no need for the processor and pandas here)
+        result = sanitize_experiment(exp_dir, use_manifest=request.args.get('force') not in ('1', 'true', 'yes'))
+        report_cache.invalidate(exp_dir)
+        
+        return jsonify({
+            "success": not result['errors'],
+            "message": f"Successfully fixed JSON files for experiment '{experiment_name}'" if not result['errors']
+                       else f"Fixed JSON files for experiment '{experiment_name}' with {len(result['errors'])} errors",
+            "files": result['files'],
+            "fixed": result['fixed'],
+            "skipped": result['skipped'],
+            "replacements": result['replacements'],
+            "errors": result['errors']
+        })
     
     except Exception as e:
         logger.error(f"Error fixing JSON files for experiment {experiment_name}: {str(e)}")
@@ -666,4 +1293,7 @@ def api_fix_experiment_json(experiment_name):
 
 # Run the application
 if __name__ == '__main__':
+    # The reloader runs this script in a watching parent and a serving child; only the child starts services
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_services()
     app.run(debug=True, host='0.0.0.0', port=8080) 
\ No newline at end of file
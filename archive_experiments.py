@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+NH3 Cracking Experiment Archiving
+---------------------------------
+This script moves the stage data of processed experiments into compressed column stores
+(stage_N_data.colz) and deletes the CSV and JSON copies, or writes them back with --restore.
+Plots, summaries and the catalog are left as they are.
+"""
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta
+
+# Ensure Processors directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+
+try:
+    from Processors.catalog import get_catalog
+    from Processors.column_store import archive_experiment, restore_experiment
+except ImportError:
+    # Fallback for backwards compatibility
+    from catalog import get_catalog
+    from column_store import archive_experiment, restore_experiment
+
+def parse_arguments():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Archive the stage data of processed experiments in column stores')
+    parser.add_argument('experiments', nargs='*', help='Experiments to archive or restore')
+    parser.add_argument('--all', action='store_true', help='All experiments in the reports folder')
+    parser.add_argument('--older-than', type=float, metavar='DAYS',
+                        help='Experiments processed more than DAYS days ago (from the catalog)')
+    parser.add_argument('--restore', action='store_true',
+                        help='Write the stage CSV and JSON files back from the column stores')
+    parser.add_argument('--keep-sources', action='store_true',
+                        help='Keep the CSV and JSON files after archiving')
+    parser.add_argument('--block-rows', type=int, default=None,
+                        help=f'Rows per compressed block (default: {config.COLUMN_STORE_BLOCK_ROWS})')
+    parser.add_argument('--reports-folder', default=config.REPORTS_FOLDER, help='Folder with processed results')
+    return parser.parse_args()
+
+def select_experiments(args):
+    """Names of the experiments given on the command line or matching --all / --older-than"""
+    names = list(args.experiments)
+    if args.all:
+        names += sorted(entry.name for entry in os.scandir(args.reports_folder)
+                        if entry.is_dir() and not entry.name.startswith('.'))
+    if args.older_than is not None:
+        catalog = get_catalog(args.reports_folder)
+        catalog.sync(args.reports_folder)
+        cutoff = (datetime.now() - timedelta(days=args.older_than)).isoformat()
+        names += [row['name'] for row in catalog.list_experiments(processed_before=cutoff)]
+    return list(dict.fromkeys(names))
+
+def format_size(size):
+    return f"{size / 2**20:.1f} MB"
+
+def main():
+    """Main entry point"""
+    args = parse_arguments()
+
+    if not os.path.isdir(args.reports_folder):
+        print(f"[!] Reports folder not found: {args.reports_folder}")
+        return 1
+    if not (args.experiments or args.all or args.older_than is not None):
+        print("[!] Name experiments or use --all / --older-than")
+        return 1
+
+    experiments = select_experiments(args)
+    missing = [name for name in experiments if not os.path.isdir(os.path.join(args.reports_folder, name))]
+    if missing:
+        print(f"[!] Experiments not found: {', '.join(missing)}")
+        return 1
+    if not experiments:
+        print("[+] No experiments to process")
+        return 0
+
+    failed = 0
+    if args.restore:
+        print(f"[+] Restoring {len(experiments)} experiments in {args.reports_folder}")
+        for name in experiments:
+            try:
+                stages = restore_experiment(args.reports_folder, name)
+            except Exception as e:
+                failed += 1
+                print(f"[✗] {name}: {e}")
+                continue
+            print(f"[✓] {name}: {stages} stages restored" if stages else f"[+] {name}: not archived")
+        return 1 if failed else 0
+
+    print(f"[+] Archiving {len(experiments)} experiments in {args.reports_folder}")
+    total_before = total_after = 0
+    for name in experiments:
+        try:
+            result = archive_experiment(args.reports_folder, name, keep_sources=args.keep_sources,
+                                        block_rows=args.block_rows)
+        except Exception as e:
+            failed += 1
+            print(f"[✗] {name}: {e}")
+            continue
+        if not result['stages']:
+            print(f"[+] {name}: already archived ({format_size(result['bytes_after'])})")
+            continue
+        total_before += result['bytes_before']
+        total_after += result['bytes_after']
+        ratio = result['bytes_before'] / result['bytes_after'] if result['bytes_after'] else 0
+        print(f"[✓] {name}: {result['stages']} stages, {format_size(result['bytes_before'])} -> "
+              f"{format_size(result['bytes_after'])} ({ratio:.1f}x)")
+
+    if total_after:
+        saved = 'kept the sources' if args.keep_sources else f"freed {format_size(total_before - total_after)}"
+        print(f"[+] {format_size(total_before)} of stage data in {format_size(total_after)}, {saved}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
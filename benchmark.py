@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+"""
+NH3 Cracking Processing Benchmark
+---------------------------------
+This script generates synthetic logger files of increasing size and runs the
+ExperimentalDataProcessor pipeline on each one. It records the wall and CPU
+time of every step, peak memory, bytes written and throughput, and saves the
+results as JSON. Given a saved baseline it compares the two runs and exits
+with status 1 on a regression.
+
+Every case runs in a fresh interpreter, so imports and memory from one case
+don't affect the next, and peak RSS is measured for that case only.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+# Ensure Processors directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+
+RESULTS_FORMAT = 1
+
+# Differences below this many seconds are treated as noise when comparing runs
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def parse_rows(value):
+    """Parse a comma-separated list of row counts; accepts 1e5 style values"""
+    try:
+        return [int(float(item)) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid row counts: {value}")
+
+
+def parse_arguments():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='NH3 Cracking processing benchmark')
+    parser.add_argument('--rows', type=parse_rows, default=[10000, 100000],
+                        help='Comma-separated input sizes in rows (default: 1e4,1e5; up to 1e7)')
+    parser.add_argument('--multipoint', type=int, default=8, help='Number of R-1/2 T* multipoint channels')
+    parser.add_argument('--extra-channels', type=int, default=0, help='Additional unplotted channels')
+    parser.add_argument('--stages', type=int, default=4, help='Number of stages')
+    parser.add_argument('--stage-layout', choices=['equal', 'random'], default='equal', help='Stage lengths')
+    parser.add_argument('--gaps', choices=['none', 'periodic', 'random'], default='periodic',
+                        help='Gap pattern in the logger data')
+    parser.add_argument('--gap-minutes', type=float, default=10, help='Gap length in minutes')
+    parser.add_argument('--gap-every', type=float, default=240, help='Minutes between gaps')
+    parser.add_argument('--sample-seconds', type=float, default=30, help='Logger sample interval')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the generator')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per size; the fastest run is kept')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='Also record the Python/NumPy heap peak with tracemalloc (slows processing)')
+    parser.add_argument('--output', default='bench_results.json', help='Where to write the results')
+    parser.add_argument('--baseline', help='Results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed slowdown or memory growth versus the baseline (default: 0.2 = 20%%)')
+    parser.add_argument('--workdir', help='Folder for generated inputs and outputs (default: a temp folder)')
+    parser.add_argument('--keep', action='store_true', help='Keep generated inputs and outputs')
+    return parser.parse_args()
+
+
+def _peak_rss_bytes():
+    """Peak resident set size of this process, or None where unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _folder_size(path):
+    total = 0
+    count = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+            count += 1
+    return total, count
+
+
+def run_case(workdir, rows, generator_options, trace_memory):
+    """Generate one input and process it. Runs in a fresh worker process."""
+    from Processors import ExperimentalDataProcessor
+    from Processors.synthetic import generate_logger_file
+
+    upload_folder = os.path.join(workdir, 'uploads')
+    reports_folder = os.path.join(workdir, 'reports')
+    os.makedirs(upload_folder, exist_ok=True)
+    filename = f"bench_{rows}.txt"
+    input_path = os.path.join(upload_folder, filename)
+
+    start = time.perf_counter()
+    generated = generate_logger_file(input_path, rows, **generator_options)
+    generate_seconds = time.perf_counter() - start
+
+    processor = ExperimentalDataProcessor(input_folder=upload_folder, output_folder=reports_folder)
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    ok = processor.process_file(filename)
+    total_seconds = time.perf_counter() - start
+    cpu_seconds = time.process_time() - cpu_start
+
+    tracemalloc_peak = None
+    if trace_memory:
+        tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    bytes_on_disk, files_written = _folder_size(os.path.join(reports_folder, os.path.splitext(filename)[0]))
+    return {
+        'rows': rows,
+        'ok': bool(ok),
+        'input_bytes': os.path.getsize(input_path),
+        'columns': generated['columns'],
+        'gaps': generated['gaps'],
+        'generate_seconds': generate_seconds,
+        'total_seconds': total_seconds,
+        'cpu_seconds': cpu_seconds,
+        'rows_per_second': rows / total_seconds if total_seconds else None,
+        'steps': processor.step_timer.steps,
+        'peak_rss_bytes': _peak_rss_bytes(),
+        'tracemalloc_peak_bytes': tracemalloc_peak,
+        'bytes_written': processor.bytes_written,
+        'output_bytes': bytes_on_disk,
+        'files_written': files_written
+    }
+
+
+def run_isolated(workdir, rows, generator_options, trace_memory):
+    """Run one case in a new interpreter so timings and peak memory are per case"""
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_case, workdir, rows, generator_options, trace_memory).result()
+
+
+def environment_info():
+    import numpy
+    import pandas
+    import scipy
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'scipy': scipy.__version__
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Compare results with a baseline. Returns a list of regression messages."""
+    regressions = []
+    baseline_cases = {case['rows']: case for case in baseline.get('cases', [])}
+    if baseline.get('generator') != results['generator']:
+        print("[!] Generator settings differ from the baseline; comparison may not be meaningful")
+
+    for case in results['cases']:
+        previous = baseline_cases.get(case['rows'])
+        if previous is None:
+            print(f"[!] No baseline for {case['rows']} rows")
+            continue
+
+        print(f"\n[+] {case['rows']} rows versus baseline:")
+        timings = [('total', case['total_seconds'], previous['total_seconds'])]
+        for step, entry in case['steps'].items():
+            if step in previous.get('steps', {}):
+                timings.append((step, entry['wall_seconds'], previous['steps'][step]['wall_seconds']))
+
+        for name, current, before in timings:
+            change = (current - before) / before if before else 0.0
+            print(f"    {name:<16} {before:9.3f} s -> {current:9.3f} s  ({change:+.1%})")
+            if change > tolerance and current - before > MIN_REGRESSION_SECONDS:
+                regressions.append(f"{case['rows']} rows: {name} {change:+.1%}")
+
+        for key in ('peak_rss_bytes', 'tracemalloc_peak_bytes'):
+            current, before = case.get(key), previous.get(key)
+            if not current or not before:
+                continue
+            change = (current - before) / before
+            print(f"    {key:<16} {before / 2**20:9.1f} MB -> {current / 2**20:7.1f} MB  ({change:+.1%})")
+            if change > tolerance:
+                regressions.append(f"{case['rows']} rows: {key} {change:+.1%}")
+    return regressions
+
+
+def main():
+    """Main entry point"""
+    args = parse_arguments()
+
+    generator_options = {
+        'multipoint_channels': args.multipoint,
+        'extra_channels': args.extra_channels,
+        'stage_count': args.stages,
+        'stage_layout': args.stage_layout,
+        'gap_pattern': args.gaps,
+        'gap_minutes': args.gap_minutes,
+        'gap_every_minutes': args.gap_every,
+        'sample_seconds': args.sample_seconds,
+        'seed': args.seed
+    }
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='nh3-bench-')
+    results = {
+        'format': RESULTS_FORMAT,
+        'created_at': datetime.now().isoformat(),
+        'processor_version': config.PROCESSOR_VERSION,
+        'environment': environment_info(),
+        'generator': generator_options,
+        'cases': []
+    }
+
+    try:
+        for rows in args.rows:
+            print(f"[+] Benchmarking {rows} rows...")
+            best = None
+            for run in range(args.repeat):
+                case_dir = os.path.join(workdir, f"{rows}_{run}")
+                case = run_isolated(case_dir, rows, generator_options, args.tracemalloc)
+                if not case['ok']:
+                    print(f"[✗] Processing {rows} rows failed")
+                    return 1
+                if best is None or case['total_seconds'] < best['total_seconds']:
+                    best = case
+                if not args.keep:
+                    shutil.rmtree(case_dir, ignore_errors=True)
+
+            results['cases'].append(best)
+            steps = ', '.join(f"{name} {entry['wall_seconds']:.2f}s" for name, entry in best['steps'].items())
+            peak = f"{best['peak_rss_bytes'] / 2**20:.0f} MB" if best['peak_rss_bytes'] else 'n/a'
+            print(f"[✓] {rows} rows in {best['total_seconds']:.2f} s "
+                  f"({best['rows_per_second']:.0f} rows/s, peak RSS {peak}, "
+                  f"{best['bytes_written'] / 2**20:.1f} MB written)")
+            print(f"    {steps}")
+    finally:
+        if args.keep:
+            print(f"[+] Generated files kept in {workdir}")
+        elif not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"[+] Results written to {args.output}")
+
+    if args.baseline:
+        try:
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[!] Could not read baseline {args.baseline}: {e}")
+            return 1
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n[✗] {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for message in regressions:
+                print(f"    {message}")
+            return 1
+        print(f"\n[✓] No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,14 +4,15 @@ NH3 Cracking Processor and Visualizer Configuration
 This file contains configuration settings for the NH3 Cracking application.
 """
 
-import os
-
 # Application settings
 APP_NAME = "NH3 Cracking Processor and Visualizer"
 DEBUG_MODE = True
 HOST = "0.0.0.0"
 PORT = 8080
 VERSION = "1.0.0"
+# Version of the processing pipeline output. Bump it when a change alters the
+# generated reports so incremental batch runs reprocess every experiment.
+PROCESSOR_VERSION = "1.0.0"
 
 # Directory settings
 UPLOAD_FOLDER = "uploads"
@@ -19,9 +20,81 @@ REPORTS_FOLDER = "reports"
 MAX_CONTENT_LENGTH = 300 * 1024 * 1024  # 300 MB max upload size
 ALLOWED_EXTENSIONS = {"txt"}
 
-# Ensure necessary directories exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(REPORTS_FOLDER, exist_ok=True)
+# Report cache settings
+REPORT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Memory budget for cached summaries, listings and plot files
+
+# Report watcher: polls the reports folder for changes made outside the web app
+# (process_all.py, fix_json_nan.py, copies). While it runs, cached reads skip per-request stat calls.
+REPORT_WATCHER_ENABLED = False
+REPORT_WATCHER_INTERVAL = 5.0  # Seconds between polling passes
+
+# Experiment catalog (SQLite, stored inside the reports folder)
+CATALOG_FILENAME = "catalog.sqlite3"
+
+# Serve /metrics to non-local clients as well
+METRICS_ALLOW_REMOTE = False
+
+# Number of experiments per page on the index page and in paginated /api/experiments responses
+EXPERIMENTS_PAGE_SIZE = 50
+
+# Background jobs: processing routes run on a pool of warm worker processes
+JOB_WORKERS = 2
+JOB_RESULT_TTL_SECONDS = 3600  # How long finished jobs stay visible at /api/jobs/<id>
+JOB_PREWARM_WORKERS = True  # Start the workers when the app starts instead of on the first job
+
+# Worker processes per plot regeneration (stages and overall plot groups are written in parallel)
+PLOT_REGENERATION_WORKERS = 4
+
+# Cross-experiment overlays (/api/overlay)
+OVERLAY_MAX_POINTS = 2000  # Upper limit of the shared time grid
+OVERLAY_MAX_EXPERIMENTS = 50
+OVERLAY_CACHE_ENTRIES = 64  # Built overlays kept in memory
+
+# Multipoint heatmap: time columns of the Plotly heatmap (rows are averaged into at most this many bins)
+MULTIPOINT_HEATMAP_MAX_COLUMNS = 2000
+
+# Streaming exports (/api/experiment/<name>/export): rows read, encoded and sent per chunk
+EXPORT_CHUNK_ROWS = 50000
+
+# Column store of archived experiments (archive_experiments.py): rows per compressed block and zlib level
+COLUMN_STORE_BLOCK_ROWS = 8192
+COLUMN_STORE_COMPRESSION_LEVEL = 6
+
+# Per-stage aggregates: the last_mean statistic averages this many minutes at the end of each stage
+STAGE_AGGREGATE_LAST_MINUTES = 30
+
+# Manifest of processed inputs (stored inside the reports folder) used to skip unchanged files in batch runs
+PROCESSING_MANIFEST_FILENAME = "processing_manifest.json"
+
+# Per-experiment record of JSON files already checked for NaN/Infinity literals (fix_json_nan.py)
+JSON_CLEAN_MANIFEST_FILENAME = ".json_clean_manifest.json"
+
+# Chunked uploads (/api/uploads): optionally gzip-compressed, parsed while chunks arrive
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # Chunk size suggested to clients
+UPLOAD_PARSE_BLOCK_BYTES = 4 * 1024 * 1024  # Decompressed bytes parsed per block
+UPLOAD_MAX_DECOMPRESSED_BYTES = 4 * 1024 * 1024 * 1024  # Limit for decompressed data per upload
+UPLOAD_SESSION_TTL_SECONDS = 24 * 3600  # Unfinished uploads idle for longer are deleted
+
+# Request diagnostics: admins can profile a single request by adding ?_profile=1 or the
+# X-Profile: 1 header. When REQUEST_PROFILING_TOKEN is set, requests must also send it in
+# X-Profile-Token; otherwise only local clients may profile. Profiles are kept in REQUEST_PROFILE_FOLDER.
+REQUEST_PROFILING_ENABLED = False
+REQUEST_PROFILING_TOKEN = None
+REQUEST_PROFILE_FOLDER = "profiles"
+REQUEST_PROFILE_KEEP = 50  # Stored request profiles; older ones are deleted
+REQUEST_PROFILE_TOP = 25  # Functions listed in a request profile summary
+
+# Slow-request log: requests running longer than the threshold get a few stack samples
+# (taken every SLOW_REQUEST_SAMPLE_INTERVAL seconds) and are logged and listed at /api/slow-requests
+SLOW_REQUEST_THRESHOLD_SECONDS = 2.0  # 0 disables the monitor
+SLOW_REQUEST_SAMPLE_INTERVAL = 0.5
+SLOW_REQUEST_MAX_SAMPLES = 5
+SLOW_REQUEST_HISTORY = 100
+
+# Opt-in profiling of process_file (process_all.py --profile): a cProfile dump and
+# per-step timings/allocations are saved in this folder inside the experiment folder
+PROFILE_DIRNAME = "profile"
+PROFILE_TOP_FUNCTIONS = 20  # Functions listed in the experiment summary, by cumulative time
 
 # Visualization settings
 PLOTLY_THEME = "plotly_dark"
@@ -42,10 +115,28 @@ PLOT_COLORS = [
     "#ff4adf",  # Magenta
 ]
 
-# Data categories and their configurations
+# Derived columns computed from the measured ones during processing (Processors/derived.py).
+# Columns are written in braces; names refer to DERIVED_CONSTANTS. A derived column may use
+# the ones defined before it, and is skipped for experiments missing one of its inputs.
+DERIVED_CONSTANTS = {
+    "H2_PER_NH3": 1.5,  # mol H2 per mol NH3 cracked (2 NH3 -> N2 + 3 H2)
+    "CATALYST_MASS_G": 1.0,  # Catalyst loading used for the space velocity
+}
+DERIVED_COLUMNS = {
+    # Conversion from inlet and outlet NH3 fractions, corrected for the volume expansion of cracking
+    "NH3 conversion [%]": "100 * ({NH3 in %} - {NH3 out [%]}) / ({NH3 in %} * (1 + {NH3 out [%]} / 100))",
+    # H2 formed per H2 that full conversion of the fed NH3 would give
+    "H2 yield [%]": "100 * {H2 out [%]} * (1 + {NH3 in %} * {NH3 conversion [%]} / 10000) / (H2_PER_NH3 * {NH3 in %})",
+    "R1/2 ΔP [bar]": "{Pressure reading R1/2 IN [bar]} - {Pressure reading R1/2 OUT [bar]}",
+    "Space velocity [Nml/(g h)]": "{Tot flow calc [Nml/min]} * 60 / CATALYST_MASS_G",
+}
+
+# Data categories and their configurations. Values written to the Plotly and stage JSON files are
+# rounded to the category's "resolution" (or "significant_digits"); CSV files keep full precision.
 DATA_CATEGORIES = {
     "temperature": {
         "title": "Temperature Measurements",
+        "resolution": 0.1,
         "y_axis_title": "Temperature (°C) / Power (%)",
         "columns": [
             "R1/2 T set [\u00b0C]", 
@@ -57,18 +148,21 @@ DATA_CATEGORIES = {
     },
     "multipoint": {
         "title": "Multipoint Temperature Measurements",
+        "resolution": 0.1,
         "y_axis_title": "Temperature (°C)",
         "column_pattern": "R-1/2 T",
         "filename_suffix": "multipoint_temp_plotly_data.json"
     },
     "saturator": {
         "title": "Saturator Temperature",
+        "resolution": 0.1,
         "y_axis_title": "Temperature (°C)",
         "columns": ["Saturator T read [\u00b0C]"],
         "filename_suffix": "saturator_temp_plotly_data.json"
     },
     "pressure": {
         "title": "Pressure Measurements",
+        "resolution": 0.001,
         "y_axis_title": "Pressure (bar)",
         "columns": [
             "Pressure SETPOINT [bar]", 
@@ -82,6 +176,7 @@ DATA_CATEGORIES = {
     },
     "flow": {
         "title": "Flow Measurements",
+        "resolution": 0.01,
         "y_axis_title": "Flow (Nml/min) / Concentration (%)",
         "columns": [
             "NH3 Actual Set-Point [Nml/min]", 
@@ -95,6 +190,7 @@ DATA_CATEGORIES = {
     },
     "outlet": {
         "title": "Outlet Stream Composition",
+        "resolution": 0.001,
         "y_axis_title": "Composition (%)",
         "columns": [
             "NH3 out [%]", 
@@ -105,6 +201,10 @@ DATA_CATEGORIES = {
     }
 }
 
+# Output precision of columns in no category (e.g. derived columns) and of the time axis
+OUTPUT_SIGNIFICANT_DIGITS = 6
+TIME_RESOLUTION_MINUTES = 0.001
+
 # Stage plot configuration for individual stages
 STAGE_PLOT_GROUPS = {
     "temperature": {
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+NH3 Cracking Experiment Finder
+------------------------------
+This script finds experiments by the columns their loggers recorded and the value ranges of those
+columns, using the catalog's column index. For example, every run with H2O out [%] and a multipoint
+thermocouple above 600 °C:
+
+    python find_experiments.py --column "H2O out [%]" --where "max(R-1/2 T* °C)>600"
+
+Column patterns use * and ? as wildcards.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+# Ensure Processors directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+
+try:
+    from Processors.column_index import find_experiments, list_columns
+    from Processors.catalog import get_catalog
+except ImportError:
+    # Fallback for backwards compatibility
+    from column_index import find_experiments, list_columns
+    from catalog import get_catalog
+
+def parse_arguments():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Find experiments by column and value range')
+    parser.add_argument('--column', action='append', default=[], help='Column (pattern) that must be present (repeatable)')
+    parser.add_argument('--where', action='append', default=[],
+                        help="Condition such as 'max(R-1/2 T* °C)>600' or 'min(NH3 out [%%])<5' (repeatable)")
+    parser.add_argument('--list-columns', nargs='?', const='*', metavar='PATTERN',
+                        help='List indexed columns (optionally matching a pattern) instead of searching')
+    parser.add_argument('--limit', type=int, help='Maximum number of experiments')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    parser.add_argument('--reports-folder', default=config.REPORTS_FOLDER, help='Folder with processed results')
+    return parser.parse_args()
+
+def format_range(info):
+    """Format a column's min/max for display"""
+    if info['min'] is None or info['max'] is None:
+        return 'no numeric range'
+    return f"{info['min']:.4g} .. {info['max']:.4g}"
+
+def main():
+    """Main entry point"""
+    args = parse_arguments()
+
+    if not os.path.isdir(args.reports_folder):
+        print(f"[!] Reports folder not found: {args.reports_folder}")
+        return 1
+
+    # Pick up experiments processed or changed since the catalog was last synced
+    get_catalog(args.reports_folder).sync(args.reports_folder)
+
+    if args.list_columns:
+        columns = list_columns(args.reports_folder, args.list_columns)
+        if args.json:
+            print(json.dumps(columns, indent=2))
+            return 0
+        for column in columns:
+            print(f"{column['column_name']}: {column['experiments']} experiments, {format_range(column)}")
+        return 0
+
+    start = time.perf_counter()
+    try:
+        experiments = find_experiments(args.reports_folder, args.column, args.where, args.limit)
+    except ValueError as e:
+        print(f"[!] {e}")
+        return 1
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps({'experiments': experiments, 'elapsed_ms': elapsed_ms}, indent=2))
+        return 0
+
+    for experiment in experiments:
+        stages = experiment['stages']
+        if stages is None:
+            print(f"[+] {experiment['experiment']}")
+        else:
+            print(f"[+] {experiment['experiment']} (stages: {', '.join(map(str, stages)) or 'none'})")
+        for column, info in experiment['columns'].items():
+            print(f"    {column}: {format_range(info)}")
+    print(f"\n[+] {len(experiments)} experiments in {elapsed_ms:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
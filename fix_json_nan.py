@@ -3,79 +3,78 @@
 Fix NaN values in JSON files
 ---------------------------
 This script fixes JSON files containing 'NaN' values, which cause parsing errors in JavaScript.
-It replaces 'NaN' with 'null', which is a valid JSON value.
+It replaces bare NaN, Infinity and -Infinity literals with 'null', which is a valid JSON value,
+leaving text inside strings alone. Files are streamed and rewritten atomically, files recorded
+as clean in an experiment's manifest are skipped, and experiments are processed in parallel.
 """
 
 import os
 import sys
-import json
+import time
 import argparse
 
 # Ensure Processors directory is in the path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Import the processor class
+# Import the sanitizer
 try:
-    from Processors import ExperimentalDataProcessor
+    from Processors.json_sanitizer import sanitize_reports
 except ImportError:
     # Fallback for backwards compatibility
-    from Main_Web_ProcessorNH3Crack import ExperimentalDataProcessor
+    from json_sanitizer import sanitize_reports
 
 def main():
     parser = argparse.ArgumentParser(description='Fix JSON files with NaN values')
     parser.add_argument('experiment', nargs='?', help='Name of the experiment to fix (if omitted, all experiments will be processed)')
     parser.add_argument('--reports-dir', default='Reports', help='Path to the Reports directory')
-    parser.add_argument('--uploads-dir', default='uploads', help='Path to the uploads directory')
+    parser.add_argument('--uploads-dir', default='uploads', help='Unused, kept for compatibility')
+    parser.add_argument('--workers', type=int, help='Experiments fixed in parallel (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Check all files, including ones recorded as clean')
+    parser.add_argument('--validate', action='store_true', help='Parse each rewritten file before replacing the original')
     args = parser.parse_args()
 
-    # Initialize processor
-    processor = ExperimentalDataProcessor(input_folder=args.uploads_dir, output_folder=args.reports_dir)
-    
     if args.experiment:
-        # Fix a single experiment
+        if not os.path.isdir(os.path.join(args.reports_dir, args.experiment)):
+            print(f"Failed to fix JSON files for {args.experiment}: experiment not found")
+            return 1
+        experiments = [args.experiment]
         print(f"=== Fixing JSON files for experiment: {args.experiment} ===")
-        success = processor.fix_plotly_json_files(args.experiment)
-        if success:
-            print(f"Successfully fixed JSON files for {args.experiment}")
-        else:
-            print(f"Failed to fix JSON files for {args.experiment}")
     else:
-        # Fix all experiments
-        print("=== Fixing JSON files for all experiments ===")
-        success_count = 0
-        error_count = 0
-        
-        # Find all experiment directories
-        experiments = []
         try:
-            for item in os.listdir(args.reports_dir):
-                exp_dir = os.path.join(args.reports_dir, item)
-                if os.path.isdir(exp_dir):
-                    experiments.append(item)
-                    
-            print(f"Found {len(experiments)} experiments")
-            
-            # Process each experiment
-            for experiment in experiments:
-                print(f"\nProcessing {experiment}...")
-                try:
-                    success = processor.fix_plotly_json_files(experiment)
-                    if success:
-                        success_count += 1
-                    else:
-                        error_count += 1
-                except Exception as e:
-                    print(f"Error processing {experiment}: {e}")
-                    error_count += 1
-                    
-            print(f"\n=== Summary ===")
-            print(f"Successfully processed {success_count} experiments")
-            print(f"Failed to process {error_count} experiments")
-        except Exception as e:
+            experiments = sorted(
+                item for item in os.listdir(args.reports_dir)
+                if os.path.isdir(os.path.join(args.reports_dir, item)) and not item.startswith('.')
+            )
+        except OSError as e:
             print(f"Error listing experiments: {e}")
             return 1
-    
-    return 0
+        print("=== Fixing JSON files for all experiments ===")
+        print(f"Found {len(experiments)} experiments")
+
+    start = time.perf_counter()
+    totals = {'files': 0, 'skipped': 0, 'fixed': 0, 'replacements': 0}
+    error_count = 0
+    for experiment, result in sanitize_reports(
+        args.reports_dir, experiments, workers=args.workers,
+        use_manifest=not args.force, validate=args.validate
+    ):
+        for key in totals:
+            totals[key] += result[key]
+        status = f"fixed {result['fixed']} of {result['files']} files ({result['skipped']} already clean)"
+        if result['errors']:
+            error_count += 1
+            print(f"[✗] {experiment}: {status}")
+            for error in result['errors']:
+                print(f"    - {error}")
+        else:
+            print(f"[✓] {experiment}: {status}")
+
+    print(f"\n=== Summary ===")
+    print(f"Checked {totals['files']} JSON files in {len(experiments)} experiments "
+          f"({totals['skipped']} skipped as already clean) in {time.perf_counter() - start:.1f} s")
+    print(f"Fixed {totals['fixed']} files, replaced {totals['replacements']} values")
+    print(f"Failed to process {error_count} experiments")
+    return 1 if error_count else 0
 
 if __name__ == "__main__":
-    sys.exit(main()) 
\ No newline at end of file
+    sys.exit(main())
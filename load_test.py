@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+"""
+NH3 Cracking Load Test
+----------------------
+This script starts the web app on a local port, using a reports folder of
+generated experiments, and replays browsing traffic against it from a number
+of concurrent virtual users. The traffic covers the index, the experiment
+list, experiment pages, switching plot types and switching stages. It reports
+throughput, latency percentiles and the error rate for each route, and writes
+the report to a JSON file. Given an earlier report it compares the two runs and
+exits with status 1 on a regression.
+
+Everything runs locally: the inputs come from the synthetic logger generator,
+and the server runs in its own process so the client threads don't compete
+with it for the GIL.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import signal
+import argparse
+import platform
+import tempfile
+import threading
+import http.client
+import urllib.parse
+import multiprocessing
+from datetime import datetime
+
+# Ensure Processors directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+RESULTS_FORMAT = 1
+
+# Plot types offered by the experiment page
+PLOT_TYPES = ['temperature', 'multipoint', 'saturator', 'pressure', 'flow', 'outlet']
+
+# Differences below this many milliseconds are treated as noise when comparing runs
+MIN_REGRESSION_MS = 2.0
+
+
+def parse_arguments():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Load test for the NH3 Cracking web app')
+    parser.add_argument('--reports-folder',
+                        help='Existing reports folder to serve (default: generate experiments in a temp folder)')
+    parser.add_argument('--experiments', type=int, default=3, help='Number of experiments to generate')
+    parser.add_argument('--rows', type=int, default=20000, help='Rows per generated logger file')
+    parser.add_argument('--concurrency', type=int, default=8, help='Number of concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='Measured test duration in seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='Seconds of traffic before measuring starts')
+    parser.add_argument('--think-ms', type=float, default=0, help='Pause between requests of a user')
+    parser.add_argument('--conditional', action='store_true',
+                        help='Revalidate repeated plot requests with If-None-Match, like a browser cache')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for generation and traffic')
+    parser.add_argument('--output', default='load_results.json', help='Where to write the report')
+    parser.add_argument('--baseline', help='Report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed p95 growth or throughput drop versus the baseline (default: 0.2 = 20%%)')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated reports folder')
+    return parser.parse_args()
+
+
+def generate_reports(workdir, experiments, rows, seed):
+    """Generate and process synthetic experiments. Returns the reports folder."""
+    from Processors import ExperimentalDataProcessor
+    from Processors.synthetic import generate_logger_file
+
+    upload_folder = os.path.join(workdir, 'uploads')
+    reports_folder = os.path.join(workdir, 'reports')
+    os.makedirs(upload_folder, exist_ok=True)
+    processor = ExperimentalDataProcessor(input_folder=upload_folder, output_folder=reports_folder)
+
+    for i in range(experiments):
+        filename = f"load_{i + 1}.txt"
+        generate_logger_file(
+            os.path.join(upload_folder, filename), rows,
+            stage_count=3 + i % 4, stage_layout='random', gap_pattern='random', seed=seed + i
+        )
+        print(f"[+] Processing generated experiment {i + 1}/{experiments}...")
+        if not processor.process_file(filename):
+            raise RuntimeError(f"Processing {filename} failed")
+    return reports_folder
+
+
+def discover_experiments(reports_folder):
+    """Return {experiment name: [stage numbers]} for the experiments in a reports folder"""
+    experiments = {}
+    for entry in sorted(os.scandir(reports_folder), key=lambda e: e.name):
+        if not entry.is_dir() or not os.path.exists(os.path.join(entry.path, 'experiment_summary.json')):
+            continue
+        stages = []
+        for folder in os.listdir(entry.path):
+            if folder.startswith('stage_') and folder[6:].isdigit():
+                stages.append(int(folder[6:]))
+        experiments[entry.name] = sorted(stages)
+    return experiments
+
+
+def serve(workdir, reports_folder, ready):
+    """Run the app with a threaded WSGI server. Runs in a separate process."""
+    import logging
+
+    # Keep app.log and the upload folder out of the working tree
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    config.REPORTS_FOLDER = reports_folder
+    config.UPLOAD_FOLDER = os.path.join(workdir, 'uploads')
+    config.JOB_PREWARM_WORKERS = False
+
+    import app as web_app
+    from werkzeug.serving import make_server
+
+    # One log line per request would dominate the measurement
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    # Exit normally on terminate() so the job manager's queues are cleaned up
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    server = make_server('127.0.0.1', 0, web_app.app, threaded=True)
+    ready.send(server.server_port)
+    ready.close()
+    server.serve_forever()
+
+
+class VirtualUser(threading.Thread):
+    """Browse experiments the way the web UI does, recording every request"""
+
+    def __init__(self, port, experiments, rng, think_seconds, conditional, stop_event):
+        super().__init__(daemon=True)
+        self.port = port
+        self.experiments = experiments
+        self.rng = rng
+        self.think_seconds = think_seconds
+        self.conditional = conditional
+        self.stop_event = stop_event
+        self.connection = None
+        self.etags = {}
+        # (route, status, seconds, bytes, finished_at); status 0 means a connection error
+        self.samples = []
+
+    def request(self, route, path):
+        if self.stop_event.is_set():
+            return
+        headers = {}
+        if self.conditional and path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            self.connection.request('GET', path, headers=headers)
+            response = self.connection.getresponse()
+            body = response.read()
+            status = response.status
+            if response.getheader('ETag'):
+                self.etags[path] = response.getheader('ETag')
+            if response.will_close:
+                self.connection.close()
+                self.connection = None
+        except (OSError, http.client.HTTPException):
+            status, body = 0, b''
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+        finished = time.perf_counter()
+        self.samples.append((route, status, finished - start, len(body), finished))
+        if self.think_seconds:
+            time.sleep(self.think_seconds)
+
+    def visit(self):
+        """One session: land on the index, open an experiment, look through its plots"""
+        self.request('/', '/')
+        self.request('/api/experiments', '/api/experiments')
+
+        name = self.rng.choice(sorted(self.experiments))
+        quoted = urllib.parse.quote(name)
+        stages = self.experiments[name]
+        self.request('/experiment/<experiment_name>', f'/experiment/{quoted}')
+        self.request('/static/<path:path>', '/static/style.css')
+
+        overall = '/api/experiment/<experiment_name>/overall'
+        self.request(overall, f'/api/experiment/{quoted}/overall?type=temperature')
+        for plot_type in self.rng.sample(PLOT_TYPES, self.rng.randint(1, 4)):
+            self.request(overall, f'/api/experiment/{quoted}/overall?type={plot_type}')
+
+        stage_route = '/api/experiment/<experiment_name>/stage/<stage_num>'
+        for stage in self.rng.sample(stages, min(len(stages), self.rng.randint(1, 3))):
+            for plot_type in ['temperature'] + self.rng.sample(PLOT_TYPES[1:], self.rng.randint(0, 2)):
+                self.request(stage_route, f'/api/experiment/{quoted}/stage/{stage}?type={plot_type}')
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.visit()
+        if self.connection is not None:
+            self.connection.close()
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarise(samples, duration):
+    """Per-route and overall throughput, latency percentiles (ms) and error rates"""
+    by_route = {}
+    for sample in samples:
+        by_route.setdefault(sample[0], []).append(sample)
+    by_route['all'] = samples
+
+    report = {}
+    for route, route_samples in by_route.items():
+        latencies = sorted(s[2] * 1000 for s in route_samples)
+        errors = sum(1 for s in route_samples if s[1] == 0 or s[1] >= 400)
+        report[route] = {
+            'requests': len(route_samples),
+            'throughput_rps': len(route_samples) / duration,
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'mean_ms': sum(latencies) / len(latencies) if latencies else None,
+            'max_ms': latencies[-1] if latencies else None,
+            'errors': errors,
+            'error_rate': errors / len(route_samples) if route_samples else 0.0,
+            'not_modified': sum(1 for s in route_samples if s[1] == 304),
+            'bytes': sum(s[3] for s in route_samples)
+        }
+    return report
+
+
+def print_report(routes):
+    print(f"\n    {'route':<52} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for route, stats in sorted(routes.items(), key=lambda item: (item[0] == 'all', item[0])):
+        print(f"    {route:<52} {stats['throughput_rps']:8.1f} {stats['p50_ms']:8.1f} "
+              f"{stats['p95_ms']:8.1f} {stats['p99_ms']:8.1f} {stats['error_rate']:7.1%}")
+
+
+def compare(results, baseline, tolerance):
+    """Compare a report with a baseline. Returns a list of regression messages."""
+    regressions = []
+    if baseline.get('settings') != results['settings']:
+        print("[!] Load settings differ from the baseline; comparison may not be meaningful")
+
+    print(f"\n[+] Versus baseline:")
+    for route, stats in sorted(results['routes'].items()):
+        previous = baseline.get('routes', {}).get(route)
+        if previous is None:
+            continue
+        p95_change = (stats['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] if previous['p95_ms'] else 0.0
+        rps_change = ((stats['throughput_rps'] - previous['throughput_rps']) / previous['throughput_rps']
+                      if previous['throughput_rps'] else 0.0)
+        print(f"    {route:<52} p95 {previous['p95_ms']:7.1f} -> {stats['p95_ms']:7.1f} ms ({p95_change:+.1%}), "
+              f"{previous['throughput_rps']:7.1f} -> {stats['throughput_rps']:7.1f} req/s ({rps_change:+.1%})")
+        if p95_change > tolerance and stats['p95_ms'] - previous['p95_ms'] > MIN_REGRESSION_MS:
+            regressions.append(f"{route}: p95 {p95_change:+.1%}")
+        if route == 'all' and rps_change < -tolerance:
+            regressions.append(f"throughput {rps_change:+.1%}")
+        if stats['error_rate'] > previous['error_rate']:
+            regressions.append(f"{route}: error rate {previous['error_rate']:.1%} -> {stats['error_rate']:.1%}")
+    return regressions
+
+
+def main():
+    """Main entry point"""
+    args = parse_arguments()
+    workdir = tempfile.mkdtemp(prefix='nh3-load-')
+    context = multiprocessing.get_context('spawn')
+    server = None
+
+    try:
+        if args.reports_folder:
+            reports_folder = os.path.abspath(args.reports_folder)
+        else:
+            reports_folder = generate_reports(workdir, args.experiments, args.rows, args.seed)
+        experiments = discover_experiments(reports_folder)
+        if not experiments:
+            print(f"[!] No processed experiments found in {reports_folder}")
+            return 1
+        print(f"[+] Serving {len(experiments)} experiments from {reports_folder}")
+
+        receiver, sender = context.Pipe(duplex=False)
+        server = context.Process(target=serve, args=(workdir, reports_folder, sender), daemon=True)
+        server.start()
+        if not receiver.poll(60):
+            print("[!] The app did not start within 60 s")
+            return 1
+        port = receiver.recv()
+        print(f"[+] App listening on 127.0.0.1:{port}, "
+              f"{args.concurrency} users for {args.warmup:.0f}+{args.duration:.0f} s")
+
+        stop_event = threading.Event()
+        users = [
+            VirtualUser(port, experiments, random.Random(args.seed * 1000 + i),
+                        args.think_ms / 1000.0, args.conditional, stop_event)
+            for i in range(args.concurrency)
+        ]
+        started = time.perf_counter()
+        for user in users:
+            user.start()
+        time.sleep(args.warmup + args.duration)
+        stop_event.set()
+        for user in users:
+            user.join()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+        if args.keep:
+            print(f"[+] Generated files kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # Only requests that finished inside the measured window count
+    window_start = started + args.warmup
+    window_end = window_start + args.duration
+    samples = [s for user in users for s in user.samples if window_start <= s[4] <= window_end]
+    if not samples:
+        print("[!] No requests completed in the measured window")
+        return 1
+
+    results = {
+        'format': RESULTS_FORMAT,
+        'created_at': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'settings': {
+            'experiments': len(experiments) if args.reports_folder else args.experiments,
+            'rows': None if args.reports_folder else args.rows,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'think_ms': args.think_ms,
+            'conditional': args.conditional,
+            'seed': args.seed
+        },
+        'routes': summarise(samples, args.duration)
+    }
+
+    print_report(results['routes'])
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n[+] Report written to {args.output}")
+
+    if results['routes']['all']['errors']:
+        print(f"[!] {results['routes']['all']['errors']} requests failed or returned an error status")
+
+    if args.baseline:
+        try:
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[!] Could not read baseline {args.baseline}: {e}")
+            return 1
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n[✗] {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for message in regressions:
+                print(f"    {message}")
+            return 1
+        print(f"\n[✓] No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,8 @@
 NH3 Cracking Batch Processor
 ----------------------------
 This script processes all text files in the uploads folder using the ExperimentalDataProcessor.
+Files whose experiment is up to date according to the processing manifest are skipped,
+so a rerun only redoes new, changed, failed or interrupted inputs.
 """
 import os
 import sys
@@ -15,9 +17,11 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 # Import the processor class
 try:
     from Processors import ExperimentalDataProcessor
+    from Processors.manifest import ProcessingManifest
 except ImportError:
     # Fallback for backwards compatibility
     from Main_Web_ProcessorNH3Crack import ExperimentalDataProcessor
+    from manifest import ProcessingManifest
 
 def parse_arguments():
     """Parse command-line arguments"""
@@ -25,6 +29,9 @@ def parse_arguments():
     parser.add_argument('--upload-folder', default='uploads', help='Folder containing raw data files')
     parser.add_argument('--reports-folder', default='Reports', help='Folder for processed results')
     parser.add_argument('--pattern', default='*.txt', help='File pattern to process (default: *.txt)')
+    parser.add_argument('--force', action='store_true', help='Reprocess all files, even unchanged ones')
+    parser.add_argument('--profile', action='store_true',
+                        help='Save a cProfile dump and per-step time/memory figures with each experiment')
     return parser.parse_args()
 
 def main():
@@ -39,9 +46,12 @@ def main():
     # Initialize processor
     processor = ExperimentalDataProcessor(
         input_folder=args.upload_folder,
-        output_folder=args.reports_folder
+        output_folder=args.reports_folder,
+        profile=args.profile
     )
     
+    manifest = ProcessingManifest(args.upload_folder, args.reports_folder, processor.get_processing_parameters())
+    
     # Get all text files in uploads folder
     file_pattern = os.path.join(args.upload_folder, args.pattern)
     files = glob.glob(file_pattern)
@@ -54,14 +64,27 @@ def main():
     
     # Process each file
     processed_files = []
+    skipped_files = []
     errors = []
     
     for i, file_path in enumerate(files, 1):
         filename = os.path.basename(file_path)
-        print(f"[{i}/{len(files)}] Processing {filename}...")
         
         try:
-            processor.process_file(filename)
+            if not args.force:
+                needed, reason = manifest.check(filename)
+                if not needed:
+                    print(f"[{i}/{len(files)}] Skipping {filename} (up to date)")
+                    skipped_files.append(filename)
+                    continue
+                print(f"[{i}/{len(files)}] Processing {filename} ({reason})...")
+            else:
+                print(f"[{i}/{len(files)}] Processing {filename}...")
+            
+            manifest.mark_started(filename)
+            if not processor.process_file(filename):
+                raise RuntimeError("Could not read file")
+            manifest.mark_complete(filename)
             processed_files.append(filename)
             print(f"[✓] Successfully processed {filename}")
         except Exception as e:
@@ -70,11 +93,16 @@ def main():
                 "file": filename,
                 "error": str(e)
             })
+            try:
+                manifest.mark_failed(filename, e)
+            except OSError:
+                pass
     
     # Print summary
     print("\n" + "="*50)
     print(f"[+] Processing complete!")
     print(f"[+] Successfully processed: {len(processed_files)} files")
+    print(f"[+] Skipped (up to date): {len(skipped_files)} files")
     print(f"[+] Errors: {len(errors)} files")
     
     if errors:
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+NH3 Cracking Stage Aggregate Queries
+------------------------------------
+This script answers questions across all experiments from the catalog's per-stage aggregate table,
+for example the mean outlet NH3 of every stage run at about 550 °C:
+
+    python query_aggregates.py --select "mean(NH3 out [%])" \\
+        --where "mean(R1/2 T set [°C])>=545" --where "mean(R1/2 T set [°C])<=555" --group-by experiment
+
+Experiments processed before aggregates were recorded can be filled in with --backfill.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+
+# Ensure Processors directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+
+try:
+    from Processors.stage_aggregates import query, backfill_experiment, STATS, GROUP_BY, GROUP_AGGREGATES
+    from Processors.catalog import get_catalog
+except ImportError:
+    # Fallback for backwards compatibility
+    from stage_aggregates import query, backfill_experiment, STATS, GROUP_BY, GROUP_AGGREGATES
+    from catalog import get_catalog
+
+def parse_arguments():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Query per-stage aggregates across all experiments')
+    parser.add_argument('--select', action='append', default=[],
+                        help=f"Term to return, stat(column) with stat one of {', '.join(STATS)} (repeatable)")
+    parser.add_argument('--where', action='append', default=[],
+                        help="Condition such as 'mean(R1/2 T set [°C])>=545', 'experiment~Exp 011' or 'stage=2' (repeatable)")
+    parser.add_argument('--group-by', choices=GROUP_BY, help='Combine the matching stages per experiment, per stage number or all together')
+    parser.add_argument('--agg', choices=list(GROUP_AGGREGATES), default='avg', help='Aggregate used with --group-by')
+    parser.add_argument('--limit', type=int, help='Maximum number of rows')
+    parser.add_argument('--format', choices=('table', 'csv', 'json'), default='table', help='Output format')
+    parser.add_argument('--reports-folder', default=config.REPORTS_FOLDER, help='Folder with processed results')
+    parser.add_argument('--backfill', action='store_true', help='Compute missing aggregates from the stage CSV files first')
+    parser.add_argument('--force', action='store_true', help='With --backfill, recompute all aggregates')
+    return parser.parse_args()
+
+def format_value(value):
+    """Format a cell for the table output"""
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return '' if value is None else str(value)
+
+def print_table(result):
+    """Print query results as an aligned table"""
+    rows = [[format_value(value) for value in row] for row in result['rows']]
+    widths = [max([len(name)] + [len(row[i]) for row in rows]) for i, name in enumerate(result['columns'])]
+    print("  ".join(name.ljust(width) for name, width in zip(result['columns'], widths)))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+
+def backfill(reports_folder, force):
+    """Fill in aggregates for experiments processed before they were recorded"""
+    get_catalog(reports_folder).sync(reports_folder)
+    names = sorted(
+        entry.name for entry in os.scandir(reports_folder)
+        if entry.is_dir() and not entry.name.startswith('.')
+    )
+    updated = 0
+    for name in names:
+        try:
+            stages = backfill_experiment(reports_folder, name, force=force)
+        except Exception as e:
+            print(f"[✗] {name}: {e}")
+            continue
+        if stages:
+            updated += 1
+            print(f"[+] {name}: computed aggregates for {stages} stages")
+    print(f"[+] Backfilled {updated} of {len(names)} experiments")
+
+def main():
+    """Main entry point"""
+    args = parse_arguments()
+
+    if not os.path.isdir(args.reports_folder):
+        print(f"[!] Reports folder not found: {args.reports_folder}")
+        return 1
+
+    if args.backfill:
+        backfill(args.reports_folder, args.force)
+        if not args.select:
+            return 0
+
+    start = time.perf_counter()
+    try:
+        result = query(args.reports_folder, args.select, args.where, args.group_by, args.agg, args.limit)
+    except ValueError as e:
+        print(f"[!] {e}")
+        return 1
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.format == 'json':
+        print(json.dumps(dict(result, elapsed_ms=elapsed_ms), indent=2))
+    elif args.format == 'csv':
+        writer = csv.writer(sys.stdout)
+        writer.writerow(result['columns'])
+        writer.writerows(result['rows'])
+    else:
+        print_table(result)
+        print(f"\n[+] {len(result['rows'])} rows in {elapsed_ms:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""
+NH3 Cracking Experiment Catalog
+-------------------------------
+This script rebuilds (or incrementally syncs) the SQLite experiment catalog from the reports folder.
+"""
+import os
+import sys
+import argparse
+
+# Ensure Processors directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+
+try:
+    from Processors.catalog import get_catalog
+except ImportError:
+    # Fallback for backwards compatibility
+    from catalog import get_catalog
+
+def parse_arguments():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Rebuild the NH3 Cracking experiment catalog')
+    parser.add_argument('--reports-folder', default=config.REPORTS_FOLDER, help='Folder with processed results')
+    parser.add_argument('--sync', action='store_true', help='Only re-read experiments whose summary changed')
+    return parser.parse_args()
+
+def main():
+    """Main entry point"""
+    args = parse_arguments()
+    
+    if not os.path.isdir(args.reports_folder):
+        print(f"[!] Reports folder not found: {args.reports_folder}")
+        return 1
+    
+    catalog = get_catalog(args.reports_folder)
+    if args.sync:
+        print(f"[+] Syncing catalog {catalog.db_path}")
+        counts = catalog.sync(args.reports_folder)
+    else:
+        print(f"[+] Rebuilding catalog {catalog.db_path}")
+        counts = catalog.rebuild(args.reports_folder)
+    
+    print(f"[+] Added: {counts['added']}, updated: {counts['updated']}, "
+          f"removed: {counts['removed']}, unchanged: {counts['unchanged']}")
+    print(f"[+] Catalog now lists {len(catalog.list_experiments())} experiments")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+NH3 Cracking Plot Regeneration
+------------------------------
+This script recreates the stage and overall Plotly JSON files of one, several or all
+experiments from their saved stage data, without reprocessing the original logger files.
+Each stage is loaded once and stages are handled in parallel worker processes.
+"""
+import os
+import sys
+import time
+import argparse
+
+# Ensure Processors directory is in the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+
+try:
+    from Processors.plot_regeneration import regenerate_reports, default_workers
+except ImportError:
+    # Fallback for backwards compatibility
+    from plot_regeneration import regenerate_reports, default_workers
+
+def parse_arguments():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Regenerate the Plotly JSON files of processed experiments')
+    parser.add_argument('experiments', nargs='*', help='Experiments to regenerate (default: all)')
+    parser.add_argument('--reports-folder', default=config.REPORTS_FOLDER, help='Folder with processed results')
+    parser.add_argument('--upload-folder', default=config.UPLOAD_FOLDER, help='Folder with uploaded files')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: PLOT_REGENERATION_WORKERS capped at the CPU count; '
+                             '1 runs everything in this process)')
+    return parser.parse_args()
+
+def main():
+    """Main entry point"""
+    args = parse_arguments()
+
+    if not os.path.isdir(args.reports_folder):
+        print(f"[!] Reports folder not found: {args.reports_folder}")
+        return 1
+
+    experiments = args.experiments or None
+    if experiments:
+        missing = [name for name in experiments if not os.path.isdir(os.path.join(args.reports_folder, name))]
+        if missing:
+            print(f"[!] Experiments not found: {', '.join(missing)}")
+            return 1
+
+    args.workers = args.workers or default_workers()
+    print(f"[+] Regenerating plots in {args.reports_folder} with {args.workers} workers")
+    start = time.perf_counter()
+    failed = 0
+    count = 0
+    for experiment, result in regenerate_reports(args.reports_folder, experiments,
+                                                 upload_folder=args.upload_folder, workers=args.workers):
+        count += 1
+        status = (f"{result['stages_loaded']}/{result['stage_count']} stages, "
+                  f"{result['overall_plots']} overall plots in {result['seconds']:.2f} s")
+        if result['errors']:
+            failed += 1
+            print(f"[✗] {experiment}: {status}")
+            for error in result['errors']:
+                print(f"    - {error}")
+        else:
+            print(f"[✓] {experiment}: {status}")
+
+    print(f"[+] Regenerated {count - failed} of {count} experiments in {time.perf_counter() - start:.1f} s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+NH3 Cracking Startup Report
+---------------------------
+This script imports a module (app by default) in a fresh interpreter with
+`python -X importtime` and prints where the import time goes: the total, the
+slowest imports and the time per top-level package. It also checks that the
+heavy numeric stack stays out of the web tier, and exits with status 1 when a
+limit is exceeded so it can guard against startup regressions.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Packages the web tier should only import when a code path needs them
+HEAVY_MODULES = ['pandas', 'numpy', 'scipy', 'plotly']
+
+# Runs in the child interpreter; background workers are not started for the measurement
+IMPORT_SCRIPT = """
+import sys, json
+sys.path.insert(0, {root!r})
+import config
+config.JOB_PREWARM_WORKERS = False
+import {module}
+print(json.dumps(sorted(sys.modules)))
+"""
+
+def parse_arguments():
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(description='Import-time breakdown for NH3 Cracking modules')
+    parser.add_argument('--module', default='app', help='Module to import (default: app)')
+    parser.add_argument('--top', type=int, default=15, help='Number of slowest imports to list')
+    parser.add_argument('--max-seconds', type=float, help='Fail if the import takes longer than this')
+    parser.add_argument('--forbid', default=','.join(HEAVY_MODULES),
+                        help='Comma-separated packages that must not be imported (empty to skip the check)')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    return parser.parse_args()
+
+def measure_imports(module):
+    """Import module in a child interpreter. Returns (import records, loaded module names)."""
+    # Run in a scratch folder so the app's startup files (log, uploads, reports) land there
+    with tempfile.TemporaryDirectory() as scratch:
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', IMPORT_SCRIPT.format(root=ROOT, module=module)],
+            cwd=scratch, capture_output=True, text=True
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    records = []
+    for line in result.stderr.splitlines():
+        fields = line[len('import time:'):].split('|')
+        if not line.startswith('import time:') or len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # Column header line
+            continue
+        records.append({
+            'name': fields[2].strip(),
+            'self_seconds': self_us / 1e6,
+            'cumulative_seconds': cumulative_us / 1e6
+        })
+
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return records, loaded
+
+def build_report(module, records, loaded, top, forbidden):
+    """Summarise import records into totals, slowest imports and per-package time"""
+    target = [r for r in records if r['name'] == module]
+    total = target[-1]['cumulative_seconds'] if target else sum(r['self_seconds'] for r in records)
+
+    packages = {}
+    for record in records:
+        package = record['name'].split('.')[0]
+        packages[package] = packages.get(package, 0.0) + record['self_seconds']
+
+    return {
+        'module': module,
+        'total_seconds': total,
+        'modules_imported': len(records),
+        'slowest': sorted(records, key=lambda r: r['self_seconds'], reverse=True)[:top],
+        'packages': sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top],
+        'forbidden_loaded': [name for name in forbidden if name in loaded]
+    }
+
+def main():
+    """Main entry point"""
+    args = parse_arguments()
+    forbidden = [name.strip() for name in args.forbid.split(',') if name.strip()]
+
+    try:
+        records, loaded = measure_imports(args.module)
+    except RuntimeError as e:
+        print(f"[!] {e}")
+        return 1
+    report = build_report(args.module, records, loaded, args.top, forbidden)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"[+] import {args.module}: {report['total_seconds'] * 1000:.1f} ms "
+              f"({report['modules_imported']} modules)")
+        print(f"\n[+] Slowest imports (self time):")
+        for record in report['slowest']:
+            print(f"    {record['self_seconds'] * 1000:8.1f} ms  {record['name']}")
+        print(f"\n[+] Time per top-level package:")
+        for package, seconds in report['packages']:
+            print(f"    {seconds * 1000:8.1f} ms  {package}")
+
+    failed = False
+    if report['forbidden_loaded']:
+        print(f"[✗] Heavy modules imported at startup: {', '.join(report['forbidden_loaded'])}")
+        failed = True
+    if args.max_seconds is not None and report['total_seconds'] > args.max_seconds:
+        print(f"[✗] Import took {report['total_seconds']:.3f} s, limit is {args.max_seconds:.3f} s")
+        failed = True
+    if not failed and not args.json:
+        print(f"\n[✓] Startup within limits")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
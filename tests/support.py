@@ -0,0 +1,81 @@
+"""
+Shared helpers for the NH3 Cracking Processor tests
+"""
+import os
+import sys
+import json
+import atexit
+import shutil
+import tempfile
+from unittest import mock
+
+# Ensure the repository root is in the path, so Processors and config import as in the app
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_logger_file(folder, name='synthetic.txt', rows=1500):
+    """Write a small synthetic logger file with two stages and a gap; returns its path"""
+    from Processors.synthetic import generate_logger_file
+
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name)
+    generate_logger_file(path, rows, stage_count=2, gap_every_minutes=300, seed=3)
+    return path
+
+
+
+def write_summary(reports_folder, name, processed_at, stage_rows, columns=()):
+    """Write a minimal processed experiment: stage folders and an experiment_summary.json.
+
+    stage_rows lists the row count of each stage; stage N spans minutes (N - 1) * 100 to N * 100 - 1.
+    """
+    exp_dir = os.path.join(reports_folder, name)
+    for stage_num in range(1, len(stage_rows) + 1):
+        os.makedirs(os.path.join(exp_dir, f"stage_{stage_num}"), exist_ok=True)
+    summary = {
+        'metadata': {'base_filename': name, 'processed_at': processed_at, 'total_stages': len(stage_rows)},
+        'stages_info': {
+            str(stage_num): {
+                'row_count': rows,
+                'time_range': {'start': (stage_num - 1) * 100.0, 'end': stage_num * 100.0 - 1, 'duration': 99.0}
+            }
+            for stage_num, rows in enumerate(stage_rows, 1)
+        },
+        'column_mapping': {col: {'dtype': 'float64'} for col in columns}
+    }
+    with open(os.path.join(exp_dir, 'experiment_summary.json'), 'w') as f:
+        json.dump(summary, f)
+    return exp_dir
+
+
+_app_module = None
+
+
+def load_app():
+    """Import the web app once per test run, with its folders and log file in a temporary directory.
+
+    The app reads the folders from config when imported, so config stays
+    patched for the rest of the run. Returns the app module.
+    """
+    global _app_module
+    if _app_module is None:
+        import config
+
+        folder = tempfile.mkdtemp(prefix='nh3-app-')
+        atexit.register(shutil.rmtree, folder, ignore_errors=True)
+        for name, value in (('UPLOAD_FOLDER', os.path.join(folder, 'uploads')),
+                            ('REPORTS_FOLDER', os.path.join(folder, 'Reports')),
+                            ('REQUEST_PROFILE_FOLDER', os.path.join(folder, 'profiles')),
+                            ('JOB_PREWARM_WORKERS', False),
+                            ('REPORT_WATCHER_ENABLED', False)):
+            mock.patch.object(config, name, value).start()
+        # app.log and the static folder are created in the working directory
+        cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            import app
+        finally:
+            os.chdir(cwd)
+        _app_module = app
+    return _app_module
@@ -0,0 +1,89 @@
+"""
+Tests for the SQLite experiment catalog
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from support import write_summary
+
+from Processors.catalog import ExperimentCatalog, SORT_COLUMNS, sort_value
+
+EXPERIMENTS = [
+    # name, processed_at, stage rows, columns
+    ('alpha', '2024-01-05T10:00:00', [100, 200], ['NH3 out [%]']),
+    ('beta_1', '2024-02-01T09:00:00', [50], ['NH3 out [%]', 'H2 out [%]']),
+    ('beta%2', '2024-02-01T09:00:00', [300, 300, 300], ['H2 out [%]']),
+    ('gamma', '2024-03-10T12:00:00', [150, 150], []),
+    ('delta', None, [300], ['NH3 out [%]']),
+]
+
+
+class CatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.reports = os.path.join(self.tmp.name, 'reports')
+        for name, processed_at, stage_rows, columns in EXPERIMENTS:
+            write_summary(self.reports, name, processed_at, stage_rows, columns)
+        self.catalog = ExperimentCatalog(os.path.join(self.reports, 'catalog.sqlite3'))
+        self.catalog.sync(self.reports)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def names(self, **kwargs):
+        return [row['name'] for row in self.catalog.list_experiments(**kwargs)]
+
+    def test_sync_rereads_only_changed_experiments(self):
+        self.assertEqual(self.catalog.sync(self.reports), {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 5})
+
+        write_summary(self.reports, 'alpha', '2024-04-01T00:00:00', [100, 200, 400])
+        os.utime(os.path.join(self.reports, 'alpha', 'experiment_summary.json'), ns=(1, 1))
+        shutil.rmtree(os.path.join(self.reports, 'gamma'))
+        write_summary(self.reports, 'epsilon', '2024-05-01T00:00:00', [10])
+
+        self.assertEqual(self.catalog.sync(self.reports), {'added': 1, 'updated': 1, 'removed': 1, 'unchanged': 3})
+        alpha = self.catalog.list_experiments(name_contains='alpha')[0]
+        self.assertEqual((alpha['total_stages'], alpha['total_rows'], alpha['stage_numbers']), (3, 700, [1, 2, 3]))
+        self.assertEqual([row['stage_num'] for row in self.catalog.get_stages('alpha')], [1, 2, 3])
+
+    def test_filters(self):
+        self.assertEqual(self.names(name_contains='beta'), ['beta%2', 'beta_1'])
+        # LIKE wildcards in the search text match literally
+        self.assertEqual(self.names(name_contains='_'), ['beta_1'])
+        self.assertEqual(self.names(name_contains='%'), ['beta%2'])
+        self.assertEqual(self.names(processed_after='2024-02-01T09:00:00'), ['beta%2', 'beta_1', 'gamma'])
+        self.assertEqual(self.names(processed_before='2024-02-01T08:59:59'), ['alpha'])
+        self.assertEqual(self.names(min_stages=2), ['alpha', 'beta%2', 'gamma'])
+        self.assertEqual(self.names(min_stages=2, max_stages=2), ['alpha', 'gamma'])
+        self.assertEqual(self.names(has_columns=['NH3 out [%]']), ['alpha', 'beta_1', 'delta'])
+        self.assertEqual(self.names(has_columns=['NH3 out [%]', 'H2 out [%]']), ['beta_1'])
+        self.assertEqual(self.catalog.count_experiments(has_columns=['H2 out [%]'], min_stages=2), 1)
+
+    def test_sort_breaks_ties_by_name(self):
+        # Ties are ordered by name in the same direction
+        self.assertEqual(self.names(sort='rows', descending=True), ['beta%2', 'gamma', 'delta', 'alpha', 'beta_1'])
+        self.assertEqual(self.names(sort='rows'), ['beta_1', 'alpha', 'delta', 'gamma', 'beta%2'])
+        self.assertEqual(self.names(sort='processed_at'), ['delta', 'alpha', 'beta%2', 'beta_1', 'gamma'])
+        self.assertEqual(self.names(sort='stages', descending=True), ['beta%2', 'gamma', 'alpha', 'delta', 'beta_1'])
+
+    def test_keyset_pages_cover_the_sorted_list(self):
+        for sort in SORT_COLUMNS:
+            for descending in (False, True):
+                with self.subTest(sort=sort, descending=descending):
+                    expected = self.names(sort=sort, descending=descending)
+                    pages, after = [], None
+                    while True:
+                        rows = self.catalog.list_experiments(sort=sort, descending=descending, limit=2, after=after)
+                        if not rows:
+                            break
+                        pages.append([row['name'] for row in rows])
+                        after = (sort_value(rows[-1], sort), rows[-1]['name'])
+                    self.assertEqual([name for page in pages for name in page], expected)
+                    self.assertEqual([len(page) for page in pages], [2, 2, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
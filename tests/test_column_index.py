@@ -0,0 +1,88 @@
+"""
+Tests for finding experiments by column and range
+"""
+import tempfile
+import unittest
+
+import support  # noqa: F401  (puts the repository root in the path)
+
+from Processors.catalog import get_catalog
+from Processors.column_index import column_glob, find_experiments, list_columns, parse_range_condition
+
+
+def column(low, high):
+    return {'dtype': 'float64', 'non_null_count': 10, 'min': low, 'max': high, 'mean': (low + high) / 2}
+
+
+def stage(columns):
+    return {'row_count': 10, 'aggregates': {
+        name: {'mean': (low + high) / 2, 'min': low, 'max': high, 'std': 1.0, 'count': 10, 'last_mean': high}
+        for name, (low, high) in columns.items()
+    }}
+
+
+class ColumnIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.reports = self.tmp.name
+        catalog = get_catalog(self.reports)
+        catalog.upsert_experiment('hot', {
+            'column_mapping': {'R-1/2 T1 °C': column(400, 650), 'R-1/2 T2 °C': column(380, 590),
+                               'H2O out [%]': column(0, 2)},
+            'stages_info': {'1': stage({'R-1/2 T1 °C': (400, 560)}), '2': stage({'R-1/2 T1 °C': (560, 650)})}
+        })
+        catalog.upsert_experiment('cool', {
+            'column_mapping': {'R-1/2 T1 °C': column(300, 500), 'R-1/2 T10 °C': column(300, 610)}
+        })
+        catalog.upsert_experiment('literal', {
+            'column_mapping': {'H2O out [abc]': column(0, 1), 'H2O out %': column(0, 1)}
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def names(self, present=(), where=()):
+        return [row['experiment'] for row in find_experiments(self.reports, present, where)]
+
+    def test_glob_escapes_brackets_only(self):
+        self.assertEqual(column_glob(' H2O out [%] '), 'H2O out [[]%]')
+        self.assertEqual(column_glob('R-1/2 T? °C'), 'R-1/2 T? °C')
+
+    def test_brackets_match_literally(self):
+        self.assertEqual(self.names(['H2O out [%]']), ['hot'])
+        # As a GLOB class, [abc] would match none of these columns
+        self.assertEqual(self.names(['H2O out [abc]']), ['literal'])
+        self.assertEqual(self.names(['H2O out [a]']), [])
+        self.assertEqual([row['column_name'] for row in list_columns(self.reports, 'H2O*')],
+                         ['H2O out %', 'H2O out [%]', 'H2O out [abc]'])
+
+    def test_wildcards(self):
+        self.assertEqual(self.names(['R-1/2 T? °C']), ['cool', 'hot'])
+        self.assertEqual(self.names(['R-1/2 T?? °C']), ['cool'])
+        self.assertEqual(self.names(['R-1/2 T* °C', 'H2O out*']), ['hot'])
+
+    def test_range_conditions(self):
+        self.assertEqual(self.names(where=['max(R-1/2 T* °C)>600']), ['cool', 'hot'])
+        self.assertEqual(self.names(where=['max(R-1/2 T? °C)>600']), ['hot'])
+        self.assertEqual(self.names(where=['min(R-1/2 T1 °C)>=400', 'mean(H2O out [%])<=1']), ['hot'])
+        self.assertEqual(self.names(where=['max(R-1/2 T* °C)>700']), [])
+
+    def test_matching_columns_and_stages(self):
+        hot, cool = sorted(find_experiments(self.reports, where=['max(R-1/2 T* °C)>600']),
+                           key=lambda row: row['experiment'], reverse=True)
+        self.assertEqual(hot['columns'], {'R-1/2 T1 °C': {'min': 400, 'max': 650}, 'R-1/2 T2 °C': {'min': 380, 'max': 590}})
+        self.assertEqual(hot['stages'], [2])
+        # Without stage aggregates the stages are unknown
+        self.assertIsNone(cool['stages'])
+
+    def test_invalid_conditions_are_rejected(self):
+        for text in ('std(R-1/2 T1 °C)>1', 'last_mean(x)>1', 'experiment=hot', 'max(x)~1', 'max(x)>hot'):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                parse_range_condition(text)
+        with self.assertRaises(ValueError):
+            find_experiments(self.reports)
+
+
+if __name__ == '__main__':
+    unittest.main()
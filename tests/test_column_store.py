@@ -0,0 +1,122 @@
+"""
+Tests for the column store of archived experiments
+"""
+import os
+import glob
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from support import make_logger_file
+
+from Processors.column_store import (ColumnStore, archive_experiment, read_stage_frame, restore_experiment,
+                                     stage_store_path, write_store)
+
+
+def sample_frame(rows=5000):
+    rng = np.random.default_rng(1)
+    temperature = 550 + np.cumsum(rng.normal(0, 0.05, rows))
+    temperature[[3, 100, 4999]] = np.nan
+    temperature[[10, 11]] = [np.inf, -0.0]
+    return pd.DataFrame({
+        'Date/Time': [f"06/01/25 08:{i // 60 % 60:02d}:{i % 60:02d}" for i in range(rows)],
+        'Time_Minutes': np.arange(rows) * 0.5 + rng.uniform(0, 1e-6, rows),
+        'R1/2 T read [°C]': temperature,
+        'Stage': np.repeat([1, 2], [rows // 2, rows - rows // 2]).astype(np.int64),
+        'Comment': ['' if i % 7 else 'valve check' for i in range(rows)]
+    })
+
+
+def assert_bit_exact(test, actual, expected):
+    test.assertEqual(list(actual.columns), list(expected.columns))
+    for name in expected.columns:
+        test.assertEqual(actual[name].dtype, expected[name].dtype, name)
+        if expected[name].dtype.kind == 'f':
+            # Compare bits, so NaN, infinities and -0.0 count too
+            np.testing.assert_array_equal(actual[name].to_numpy().view(np.uint64),
+                                          expected[name].to_numpy().view(np.uint64), err_msg=name)
+        else:
+            test.assertEqual(actual[name].tolist(), expected[name].tolist(), name)
+
+
+class ColumnStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'stage_1_data.colz')
+        self.df = sample_frame()
+        write_store(self.path, self.df, block_rows=512)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_is_bit_exact(self):
+        with ColumnStore(self.path) as store:
+            self.assertEqual(store.rows, len(self.df))
+            self.assertEqual(store.columns, list(self.df.columns))
+            assert_bit_exact(self, store.read(), self.df)
+
+    def test_window_reads_only_overlapping_blocks(self):
+        with ColumnStore(self.path) as store:
+            self.assertEqual(store.block_range(1000.0, 1300.0), [3, 4, 5])
+            window = store.read(['Time_Minutes', 'R1/2 T read [°C]'], 1000.0, 1300.0)
+            self.assertEqual(store.read(t0=5000.0).shape, (0, len(self.df.columns)))
+
+        times = self.df['Time_Minutes']
+        expected = self.df.loc[(times >= 1000.0) & (times <= 1300.0), ['Time_Minutes', 'R1/2 T read [°C]']]
+        assert_bit_exact(self, window, expected.reset_index(drop=True))
+
+    def test_empty_frame(self):
+        write_store(self.path, self.df.iloc[:0])
+        with ColumnStore(self.path) as store:
+            self.assertEqual(store.rows, 0)
+            self.assertEqual(len(store.read()), 0)
+
+
+class ArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        from Processors import ExperimentalDataProcessor
+
+        self.tmp = tempfile.TemporaryDirectory()
+        upload_folder = os.path.join(self.tmp.name, 'uploads')
+        self.reports_folder = os.path.join(self.tmp.name, 'Reports')
+        make_logger_file(upload_folder)
+        ExperimentalDataProcessor(upload_folder, self.reports_folder).process_file('synthetic.txt')
+        self.exp_dir = os.path.join(self.reports_folder, 'synthetic')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def data_files(self):
+        patterns = ('stage_*/stage_*_data.csv', 'stage_*/stage_*_data.json', '*_complete.csv', '*_all_stages.json')
+        files = {}
+        for pattern in patterns:
+            for path in glob.glob(os.path.join(self.exp_dir, pattern)):
+                with open(path, 'rb') as f:
+                    files[os.path.relpath(path, self.exp_dir)] = f.read()
+        return files
+
+    def test_archive_and_restore_are_byte_exact(self):
+        originals = self.data_files()
+        stage_dir = os.path.join(self.exp_dir, 'stage_1')
+        expected = pd.read_csv(os.path.join(stage_dir, 'stage_1_data.csv'), float_precision='round_trip')
+
+        result = archive_experiment(self.reports_folder, 'synthetic')
+        self.assertEqual(result['stages'], 2)
+        self.assertLess(result['bytes_after'], result['bytes_before'])
+        self.assertEqual(self.data_files(), {})
+        self.assertTrue(os.path.exists(stage_store_path(stage_dir, 1)))
+        assert_bit_exact(self, read_stage_frame(stage_dir, 1), expected)
+
+        self.assertEqual(restore_experiment(self.reports_folder, 'synthetic'), 2)
+        restored = self.data_files()
+        self.assertEqual(sorted(restored), sorted(originals))
+        for name, data in originals.items():
+            self.assertEqual(restored[name], data, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Tests for derived-column expressions: the whitelist and the computed values
+"""
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import support  # noqa: F401  (puts the repository root in the path)
+
+from Processors.derived import (add_derived_columns, add_missing_derived_columns, compile_derived_columns,
+                                get_derived_columns, source_columns)
+
+NH3_IN, NH3_OUT, H2_OUT = 'NH3 in %', 'NH3 out [%]', 'H2 out [%]'
+CONVERSION, H2_YIELD, SPACE_VELOCITY = 'NH3 conversion [%]', 'H2 yield [%]', 'Space velocity [Nml/(g h)]'
+
+
+class DerivedColumnTest(unittest.TestCase):
+
+    def compile(self, expression):
+        (column,) = compile_derived_columns({'X': expression}, {'K': 2})
+        return column
+
+    def test_rejected_expressions(self):
+        rejected = {
+            '{A}.__class__': 'Attribute is not allowed',
+            "__import__('os')": 'can be called',
+            'open({A})': 'can be called',
+            'np.sqrt({A})': 'can be called',
+            '(lambda: {A})()': 'can be called',
+            '[{A}][0]': 'Subscript is not allowed',
+            "{A} + 'a'": 'only numeric constants',
+            '{A} + __builtins__': "unknown name '__builtins__'",
+            '{A} if {B} else 0': 'IfExp is not allowed',
+            'clip({A}, a_min=0, a_max=1)': 'keyword arguments',
+            '{A} * UNKNOWN': "unknown name 'UNKNOWN'",
+            '{A} + ': 'invalid expression',
+            'sqrt(K)': 'uses no columns',
+        }
+        for expression, message in rejected.items():
+            with self.subTest(expression=expression):
+                with self.assertRaisesRegex(ValueError, message):
+                    self.compile(expression)
+
+    def test_evaluate(self):
+        column = self.compile('where({A} > 0, sqrt({A}) * K, -1) / {B}')
+        self.assertEqual(column.columns, ['A', 'B'])
+        self.assertEqual(column.constants, {'K': 2.0})
+        values = column.evaluate({'A': [4, 9, -1, 1], 'B': [1, 2, 1, 0]})
+        # Division by zero gives NaN, not inf
+        np.testing.assert_array_equal(values, [4, 3, -1, np.nan])
+        np.testing.assert_array_equal(self.compile('{A} * 0 + K').evaluate({'A': [5, 6]}), [2, 2])
+
+    def test_configured_formulas(self):
+        df = pd.DataFrame({NH3_IN: [10.0, 0.0], NH3_OUT: [2.0, 0.0], H2_OUT: [13.0, 0.0],
+                           'Tot flow calc [Nml/min]': [100.0, 50.0]})
+        added = add_derived_columns(df)
+        # The pressure drop inputs are missing, so it is skipped
+        self.assertEqual(added, [CONVERSION, H2_YIELD, SPACE_VELOCITY])
+        conversion = 100 * (10 - 2) / (10 * (1 + 2 / 100))
+        self.assertAlmostEqual(df[CONVERSION][0], conversion)
+        self.assertAlmostEqual(df[H2_YIELD][0], 100 * 13 * (1 + 10 * conversion / 10000) / (1.5 * 10))
+        self.assertEqual(df[SPACE_VELOCITY].tolist(), [6000, 3000])
+        self.assertTrue(df[[CONVERSION, H2_YIELD]].iloc[1].isna().all())
+
+    def test_missing_columns_only(self):
+        df = pd.DataFrame({NH3_IN: [10.0], NH3_OUT: [2.0], H2_OUT: [13.0], CONVERSION: [50.0]})
+        self.assertEqual(add_missing_derived_columns(df), [H2_YIELD])
+        self.assertEqual(df[CONVERSION].tolist(), [50])
+        self.assertAlmostEqual(df[H2_YIELD][0], 100 * 13 * (1 + 10 * 50 / 10000) / (1.5 * 10))
+
+    def test_source_columns(self):
+        self.assertEqual(source_columns([H2_YIELD, 'R-1/2 T1 °C', NH3_IN], get_derived_columns()),
+                         [H2_OUT, NH3_IN, NH3_OUT, 'R-1/2 T1 °C'])
+
+
+if __name__ == '__main__':
+    unittest.main()
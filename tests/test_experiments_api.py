@@ -0,0 +1,71 @@
+"""
+Tests for filtering, sorting and pagination of /api/experiments
+"""
+import os
+import shutil
+import unittest
+
+import support
+
+
+class ExperimentsApiTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        app_module = support.load_app()
+        cls.app = app_module.app
+        cls.client = cls.app.test_client()
+        cls.reports = cls.app.config['REPORTS_FOLDER']
+        cls.names = ['run_a', 'run_b', 'run_c', 'run_d', 'run_e']
+        for i, name in enumerate(cls.names):
+            support.write_summary(cls.reports, name, f"2024-01-0{i + 1}T00:00:00", [100] * (i % 3 + 1),
+                                  ['NH3 out [%]'] if i % 2 else [])
+        cls.catalog = app_module.get_catalog(cls.reports)
+        cls.catalog.sync(cls.reports)
+
+    @classmethod
+    def tearDownClass(cls):
+        for name in cls.names:
+            shutil.rmtree(os.path.join(cls.reports, name), ignore_errors=True)
+        cls.catalog.sync(cls.reports)
+
+    def get(self, **args):
+        return self.client.get('/api/experiments', query_string=args)
+
+    def test_filters_and_sort(self):
+        page = self.get(min_stages=2, column='NH3 out [%]', sort='-stages', fields='name,stages').get_json()
+        self.assertEqual(page['items'], [{'name': 'run_b', 'stages': 2}])
+        self.assertEqual(page['total'], 1)
+
+        page = self.get(sort='-stages', fields='name').get_json()
+        self.assertEqual([item['name'] for item in page['items']], ['run_c', 'run_e', 'run_b', 'run_d', 'run_a'])
+
+    def test_cursor_pages_cover_the_sorted_list(self):
+        for sort in ('name', '-name', 'stages', '-stages', 'processed_at', '-rows'):
+            with self.subTest(sort=sort):
+                expected = [item['name'] for item in self.get(sort=sort, fields='name', limit=50).get_json()['items']]
+                names, args = [], {'sort': sort, 'fields': 'name', 'limit': 2}
+                while True:
+                    page = self.get(**args).get_json()
+                    names += [item['name'] for item in page['items']]
+                    if page['next_cursor'] is None:
+                        break
+                    # The cursor carries the sort; other arguments stay the same
+                    args = {'cursor': page['next_cursor'], 'fields': 'name', 'limit': 2}
+                self.assertEqual(names, expected)
+                self.assertEqual(sorted(names), self.names)
+
+    def test_invalid_numbers_are_rejected(self):
+        for name, value in (('min_stages', 'abc'), ('max_stages', '1.5'), ('limit', 'ten'), ('offset', 'x'),
+                            ('limit', '0'), ('offset', '-1')):
+            with self.subTest(**{name: value}):
+                response = self.get(**{name: value})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(name, response.get_json()['error'])
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.get(cursor='not-a-cursor').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Tests for the streaming data export
+"""
+import io
+import os
+import gzip
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from support import write_summary
+
+from Processors.catalog import get_catalog
+from Processors.column_store import archive_experiment
+from Processors.export import ExportRequest
+
+COLUMNS = ['Time_Minutes', 'A [bar]', 'B [°C]']
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.reports = self.tmp.name
+        # Stage N covers minutes (N - 1) * 100 to N * 100 - 1, in steps of 10
+        exp_dir = write_summary(self.reports, 'exp', '2024-01-01T00:00:00', [10, 10, 10])
+        self.stages = {}
+        for stage_num in (1, 2, 3):
+            times = np.arange(10) * 10.0 + (stage_num - 1) * 100
+            frame = pd.DataFrame({'Time_Minutes': times, 'A [bar]': times / 7, 'B [°C]': 500 + stage_num + times})
+            frame.to_csv(os.path.join(exp_dir, f"stage_{stage_num}", f"stage_{stage_num}_data.csv"), index=False)
+            self.stages[stage_num] = frame
+        get_catalog(self.reports).sync(self.reports)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def export(self, chunk_rows=4, **kwargs):
+        request = ExportRequest(self.reports, 'exp', **kwargs)
+        frames = list(request.frames(chunk_rows))
+        return request, pd.concat(frames, ignore_index=True) if frames else None
+
+    def expected(self, stages=(1, 2, 3), columns=('A [bar]', 'B [°C]'), t0=-np.inf, t1=np.inf):
+        parts = [self.stages[stage_num].assign(Stage_ID=stage_num) for stage_num in stages]
+        frame = pd.concat(parts, ignore_index=True)
+        frame = frame[(frame['Time_Minutes'] >= t0) & (frame['Time_Minutes'] <= t1)]
+        return frame[['Stage_ID', 'Time_Minutes'] + list(columns)].reset_index(drop=True)
+
+    def test_all_columns_and_stages(self):
+        request, frame = self.export()
+        self.assertEqual(request.columns, ['Stage_ID'] + COLUMNS)
+        pd.testing.assert_frame_equal(frame, self.expected())
+
+    def test_column_selection(self):
+        request, frame = self.export(columns=['B [°C]', 'Time_Minutes', 'Stage_ID'])
+        self.assertEqual(request.columns, ['Stage_ID', 'Time_Minutes', 'B [°C]'])
+        pd.testing.assert_frame_equal(frame, self.expected(columns=['B [°C]']))
+        with self.assertRaisesRegex(ValueError, 'Unknown columns: C'):
+            ExportRequest(self.reports, 'exp', columns=['A [bar]', 'C'])
+
+    def test_stage_selection(self):
+        request, frame = self.export(stages=[3, 1])
+        self.assertEqual([stage_num for stage_num, _, _ in request.files], [1, 3])
+        pd.testing.assert_frame_equal(frame, self.expected(stages=(1, 3)))
+
+    def test_time_window_across_stages(self):
+        # Bounds are inclusive and fall inside chunks of both stages
+        request, frame = self.export(t0=50, t1=120)
+        self.assertEqual([stage_num for stage_num, _, _ in request.files], [1, 2])
+        pd.testing.assert_frame_equal(frame, self.expected(stages=(1, 2), t0=50, t1=120))
+        self.assertEqual(frame['Time_Minutes'].tolist(), [50, 60, 70, 80, 90, 100, 110, 120])
+
+        request, frame = self.export(stages=[1, 3], t0=115, t1=135)
+        self.assertEqual(request.files, [])
+        self.assertIsNone(frame)
+
+    def test_csv_output(self):
+        request = ExportRequest(self.reports, 'exp', columns=['A [bar]'], t0=200)
+        plain = b''.join(request.iter_csv())
+        self.assertEqual(gzip.decompress(b''.join(request.iter_csv(compress=True))), plain)
+        frame = pd.read_csv(io.BytesIO(plain), float_precision='round_trip')
+        pd.testing.assert_frame_equal(frame, self.expected(stages=(3,), columns=['A [bar]']))
+
+        empty = ExportRequest(self.reports, 'exp', t0=1000)
+        self.assertEqual(b''.join(empty.iter_csv()), b'Stage_ID,Time_Minutes,A [bar],B [\xc2\xb0C]\n')
+
+    def test_archived_stages_export_the_same_rows(self):
+        _, before = self.export(t0=50, t1=250, columns=['A [bar]'])
+        archive_experiment(self.reports, 'exp', block_rows=3)
+        request, after = self.export(t0=50, t1=250, columns=['A [bar]'])
+        self.assertTrue(all(path.endswith('.colz') for _, path, _ in request.files))
+        pd.testing.assert_frame_equal(after, before)
+
+    def test_invalid_requests(self):
+        for kwargs, error in ((dict(t0=10, t1=5), ValueError), (dict(fmt='xlsx'), ValueError)):
+            with self.subTest(**kwargs), self.assertRaises(error):
+                ExportRequest(self.reports, 'exp', **kwargs)
+        with self.assertRaises(FileNotFoundError):
+            ExportRequest(self.reports, 'missing')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Tests for the Server-Sent Events stream of job progress
+"""
+import os
+import json
+import shutil
+import unittest
+
+import support
+
+
+def parse_events(body):
+    """Split an SSE body into dicts with the event name, id and decoded data"""
+    events = []
+    for block in body.decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if line and not line.startswith(':'))
+        if 'data' in fields:
+            events.append({'event': fields.get('event'), 'id': fields.get('id'), 'data': json.loads(fields['data'])})
+    return events
+
+
+class JobEventsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = support.load_app().app
+        cls.client = cls.app.test_client()
+        support.make_logger_file(cls.app.config['UPLOAD_FOLDER'], name='sse_run.txt', rows=600)
+        response = cls.client.get('/api/process/sse_run')
+        cls.events_url = response.get_json()['events_url']
+        # Reading the stream blocks until the job has finished
+        cls.events = parse_events(cls.client.get(cls.events_url).data)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(os.path.join(cls.app.config['UPLOAD_FOLDER'], 'sse_run.txt'))
+        shutil.rmtree(os.path.join(cls.app.config['REPORTS_FOLDER'], 'sse_run'), ignore_errors=True)
+
+    def test_stream_ends_with_done_after_the_final_state(self):
+        names = [event['event'] for event in self.events]
+        self.assertEqual(names[-1], 'done')
+        self.assertEqual(names.count('done'), 1)
+        self.assertEqual(self.events[-1]['data']['state'], 'succeeded')
+
+        progress = self.events[:-1]
+        self.assertTrue(all(name == 'progress' for name in names[:-1]))
+        self.assertEqual([event['id'] for event in progress], [str(i) for i in range(len(progress))])
+        states = [event['data']['state'] for event in progress]
+        self.assertIn('running', states)
+        self.assertEqual(states[-1], 'succeeded')
+        self.assertEqual(states.count('succeeded'), 1)
+        fractions = [event['data']['progress'] for event in progress]
+        self.assertEqual(fractions, sorted(fractions))
+        self.assertEqual(fractions[-1], 1.0)
+
+    def test_reconnect_resumes_after_last_event_id(self):
+        resumed = parse_events(self.client.get(self.events_url, headers={'Last-Event-ID': '2'}).data)
+        self.assertEqual(resumed, self.events[3:])
+
+
+if __name__ == '__main__':
+    unittest.main()
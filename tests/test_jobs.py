@@ -0,0 +1,51 @@
+"""
+Tests for the background job manager
+"""
+import time
+import threading
+import unittest
+
+import support  # noqa: F401  (puts the repository root in the path)
+
+from Processors.jobs import Job, JobManager
+
+
+class ProgressPumpTest(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = JobManager(max_workers=1)
+        threading.Thread(target=self.manager._pump_progress, daemon=True).start()
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def add_job(self, state):
+        job = Job('test', state)
+        job.state = state
+        self.manager._jobs[job.id] = job
+        return job
+
+    def test_progress_after_the_final_event_is_dropped(self):
+        finished = self.add_job('succeeded')
+        finished.progress = 1.0
+        finished.message = 'Completed'
+        finished.finished_at = time.time()
+        finished.events = [{'state': 'succeeded', 'progress': 1.0, 'message': 'Completed'}]
+        running = self.add_job('queued')
+
+        self.manager._queue.put((finished.id, {'state': 'running', 'progress': 0.5, 'message': 'Late'}))
+        self.manager._queue.put((running.id, {'state': 'running', 'progress': 0.5, 'message': 'Working'}))
+        # Events are pumped in order, so the second job's event arrives after the late one was handled
+        deadline = time.time() + 10
+        events = []
+        while not events and time.time() < deadline:
+            events, _ = self.manager.wait_for_events(running.id, timeout=1)
+
+        self.assertEqual([event['message'] for event in events], ['Working'])
+        self.assertEqual(running.state, 'running')
+        self.assertEqual(finished.events, [{'state': 'succeeded', 'progress': 1.0, 'message': 'Completed'}])
+        self.assertEqual((finished.state, finished.progress, finished.message), ('succeeded', 1.0, 'Completed'))
+
+
+if __name__ == '__main__':
+    unittest.main()
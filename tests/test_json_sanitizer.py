@@ -0,0 +1,80 @@
+"""
+Tests for the streaming NaN/Infinity sanitizer
+"""
+import os
+import json
+import math
+import tempfile
+import unittest
+
+import support  # noqa: F401  (puts the repository root in the path)
+
+from Processors.json_sanitizer import sanitize_block, sanitize_file
+
+
+def plot_document():
+    """A plot-like document with non-finite values and strings that look like literals"""
+    values = [0.5, float('nan'), -1.25, float('inf'), float('-inf'), 3.0, float('nan')] * 40
+    return {
+        'metadata': {'title': 'NaN count - Infinity check', 'note': 'say "NaN" and \\"Infinity\\"'},
+        'data': [
+            {'name': 'Tonnano', 'x': list(range(len(values))), 'y': values},
+            {'name': 'NaN', 'y': [float('nan')], 'text': ['-Infinity', 'NaN']}
+        ]
+    }
+
+
+def replace_non_finite(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, list):
+        return [replace_non_finite(item) for item in value]
+    if isinstance(value, dict):
+        return {key: replace_non_finite(item) for key, item in value.items()}
+    return value
+
+
+class SanitizerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'plot.json')
+        document = plot_document()
+        self.original = json.dumps(document, indent=2).encode('utf-8')
+        # The output must be exactly what json writes with the non-finite values as None
+        self.expected = json.dumps(replace_non_finite(document), indent=2).encode('utf-8')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_file_is_byte_exact_for_any_block_size(self):
+        # Small block sizes cut strings and literals at block boundaries
+        for block_size in (1, 2, 3, 5, 7, 64, 1000, 1 << 20):
+            with self.subTest(block_size=block_size):
+                with open(self.path, 'wb') as f:
+                    f.write(self.original)
+                replaced = sanitize_file(self.path, validate=True, block_size=block_size)
+                with open(self.path, 'rb') as f:
+                    self.assertEqual(f.read(), self.expected)
+                self.assertEqual(replaced, self.original.count(b'NaN') + self.original.count(b'Infinity')
+                                 - self.expected.count(b'NaN') - self.expected.count(b'Infinity'))
+
+    def test_block_leaves_strings_alone(self):
+        data = b'{"NaN": "Infinity", "v": [NaN, -Infinity, Infinity], "s": "-NaN"}'
+        output, held, replaced = sanitize_block(data, final=True)
+        self.assertEqual(output, b'{"NaN": "Infinity", "v": [null, null, null], "s": "-NaN"}')
+        self.assertEqual((held, replaced), (b'', 3))
+
+    def test_clean_file_is_not_rewritten(self):
+        with open(self.path, 'wb') as f:
+            f.write(self.expected)
+        os.utime(self.path, ns=(1_000_000_000, 1_000_000_000))
+
+        self.assertEqual(sanitize_file(self.path), 0)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), self.expected)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1_000_000_000)
+
+
+if __name__ == '__main__':
+    unittest.main()
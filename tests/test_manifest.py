@@ -0,0 +1,126 @@
+"""
+Tests for the processing manifest and incremental batch runs
+"""
+import os
+import tempfile
+import unittest
+import multiprocessing
+from unittest import mock
+
+from support import make_logger_file
+
+import config
+from Processors.jobs import process_files_task
+from Processors.manifest import ProcessingManifest
+
+PARAMETERS = {'target_interval_minutes': 1, 'max_gap_minutes': 10}
+
+
+def record_entries(reports_folder, worker, count):
+    """Add count entries from a separate process"""
+    manifest = ProcessingManifest('uploads', reports_folder, PARAMETERS)
+    for i in range(count):
+        manifest._update(f"w{worker}_{i}.txt", status='complete')
+
+
+class ManifestCheckTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.uploads = os.path.join(self.tmp.name, 'uploads')
+        self.reports = os.path.join(self.tmp.name, 'reports')
+        os.makedirs(self.uploads)
+        self.path = self.write_input(b'Time\tValue\n0\t1.0\n')
+        self.manifest = ProcessingManifest(self.uploads, self.reports, PARAMETERS, processor_version='1')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_input(self, data, mtime=1_700_000_000):
+        path = os.path.join(self.uploads, 'run.txt')
+        with open(path, 'wb') as f:
+            f.write(data)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def complete(self):
+        self.manifest.mark_started('run.txt')
+        self.manifest.mark_complete('run.txt')
+        os.makedirs(os.path.join(self.reports, 'run'), exist_ok=True)
+        with open(os.path.join(self.reports, 'run', 'experiment_summary.json'), 'w') as f:
+            f.write('{}')
+
+    def test_lifecycle(self):
+        self.assertEqual(self.manifest.check('run.txt'), (True, 'new'))
+        self.manifest.mark_started('run.txt')
+        self.assertEqual(self.manifest.check('run.txt'), (True, 'started'))
+        self.manifest.mark_failed('run.txt', ValueError('bad row'))
+        self.assertEqual(self.manifest.check('run.txt'), (True, 'failed'))
+        self.assertEqual(self.manifest.get('run.txt')['error'], 'bad row')
+
+        self.manifest.mark_started('run.txt')
+        self.manifest.mark_complete('run.txt')
+        self.assertEqual(self.manifest.check('run.txt'), (True, 'output missing'))
+        self.complete()
+        self.assertEqual(self.manifest.check('run.txt'), (False, 'up to date'))
+
+    def test_settings_changes(self):
+        self.complete()
+        changed = ProcessingManifest(self.uploads, self.reports, dict(PARAMETERS, max_gap_minutes=20), '1')
+        self.assertEqual(changed.check('run.txt'), (True, 'parameters changed'))
+        newer = ProcessingManifest(self.uploads, self.reports, PARAMETERS, '2')
+        self.assertEqual(newer.check('run.txt'), (True, 'processor version changed'))
+
+    def test_input_changes(self):
+        self.complete()
+        # Touched without a content change: up to date, and the new mtime is remembered
+        self.write_input(b'Time\tValue\n0\t1.0\n', mtime=1_700_000_100)
+        self.assertEqual(self.manifest.check('run.txt'), (False, 'up to date'))
+        self.assertEqual(self.manifest.get('run.txt')['mtime_ns'], 1_700_000_100 * 10**9)
+
+        # Same size, different content
+        self.write_input(b'Time\tValue\n0\t2.0\n', mtime=1_700_000_200)
+        self.assertEqual(self.manifest.check('run.txt'), (True, 'input changed'))
+        self.write_input(b'Time\tValue\n0\t1.00\n', mtime=1_700_000_100)
+        self.assertEqual(self.manifest.check('run.txt'), (True, 'input changed'))
+
+    def test_concurrent_processes_keep_every_entry(self):
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=record_entries, args=(self.reports, worker, 25)) for worker in range(4)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(60)
+            self.assertEqual(process.exitcode, 0)
+
+        self.assertEqual(len(self.manifest.entries), 100)
+
+
+class IncrementalRunTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.uploads = os.path.join(self.tmp.name, 'uploads')
+        self.reports = os.path.join(self.tmp.name, 'reports')
+        make_logger_file(self.uploads, name='run.txt', rows=600)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_task(self, incremental):
+        result = process_files_task(None, self.uploads, self.reports, ['run.txt'], incremental=incremental)
+        self.assertEqual(result['errors'], [])
+        return result['processed_files'], result['skipped_files']
+
+    def test_skip_force_and_parameter_change(self):
+        self.assertEqual(self.run_task(incremental=True), (['run.txt'], []))
+        self.assertEqual(self.run_task(incremental=True), ([], ['run.txt']))
+        # Without incremental every file is processed again
+        self.assertEqual(self.run_task(incremental=False), (['run.txt'], []))
+        with mock.patch.object(config, 'MAX_GAP_MINUTES', config.MAX_GAP_MINUTES + 1):
+            self.assertEqual(self.run_task(incremental=True), (['run.txt'], []))
+            self.assertEqual(self.run_task(incremental=True), ([], ['run.txt']))
+
+
+if __name__ == '__main__':
+    unittest.main()
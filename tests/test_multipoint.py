@@ -0,0 +1,82 @@
+"""
+Tests for the multipoint bed profile: nearest-row lookup and hotspot position
+"""
+import math
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import support  # noqa: F401  (puts the repository root in the path)
+
+from Processors.multipoint import MultipointProfile, multipoint_columns
+
+T1, T2, T10 = 'R-1/2 T1 °C', 'R-1/2 T2 °C', 'R-1/2 T10 °C'
+
+
+class MultipointProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        # Stage 2 comes first in the dict and has no T10 column
+        self.profile = MultipointProfile.from_stages({
+            2: pd.DataFrame({'Time_Minutes': [20.0, 30.0], T2: [450.0, 470.0], T1: [440.0, 480.0]}),
+            1: pd.DataFrame({'Time_Minutes': [0.0, 10.0], T10: [500.0, np.nan], T1: [400.0, np.nan],
+                             T2: [410.0, np.nan], 'H2O out [%]': [1.0, 1.0]})
+        })
+
+    def test_columns_by_position(self):
+        self.assertEqual(multipoint_columns(['Time_Minutes', T10, T2, 'R-1/2 T3 bar', T1]), [T1, T2, T10])
+
+    def test_from_stages(self):
+        self.assertEqual(self.profile.labels, [T1, T2, T10])
+        np.testing.assert_array_equal(self.profile.time, [0, 10, 20, 30])
+        np.testing.assert_array_equal(self.profile.stage, [1, 1, 2, 2])
+        np.testing.assert_array_equal(self.profile.values[0], [400, 410, 500])
+        self.assertTrue(np.isnan(self.profile.values[2:, 2]).all())
+        self.assertIsNone(MultipointProfile.from_stages({1: pd.DataFrame({'Time_Minutes': [0.0], 'X': [1.0]})}))
+
+    def test_profile_at_nearest_row(self):
+        rows = self.profile.profile_at([-5, 4, 5, 26, 100])
+        self.assertEqual([row['requested_time'] for row in rows], [-5, 4, 5, 26, 100])
+        # Outside the time range the first or last row is used; a tie picks the earlier row
+        self.assertEqual([row['time'] for row in rows], [0, 0, 0, 30, 30])
+        self.assertEqual([row['stage'] for row in rows], [1, 1, 1, 2, 2])
+        self.assertEqual(rows[0]['values'], [400, 410, 500])
+        self.assertEqual(rows[0]['hotspot'], T10)
+        self.assertEqual(rows[3]['values'], [480, 470, None])
+        self.assertEqual(rows[3]['hotspot'], T1)
+
+    def test_profile_at_row_without_values(self):
+        (row,) = self.profile.profile_at(11)
+        self.assertEqual(row['time'], 10)
+        self.assertEqual(row['values'], [None, None, None])
+        self.assertIsNone(row['hotspot'])
+
+    def test_profile_at_single_and_empty(self):
+        stage = self.profile.stage_profile(2)
+        single = MultipointProfile(stage.time[:1], stage.stage[:1], stage.labels, stage.values[:1])
+        self.assertEqual([row['time'] for row in single.profile_at([0, 20, 50])], [20, 20, 20])
+        self.assertEqual(self.profile.stage_profile(3).profile_at([0, 1]), [])
+
+    def test_hotspot(self):
+        index, temperature = self.profile.hotspot()
+        self.assertEqual(index.tolist(), [2, -1, 1, 0])
+        self.assertEqual(temperature[[0, 2, 3]].tolist(), [500, 450, 480])
+        self.assertTrue(math.isnan(temperature[1]))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'profile.npz')
+            self.profile.save(path)
+            loaded = MultipointProfile.load(path)
+        self.assertEqual(loaded.labels, self.profile.labels)
+        np.testing.assert_array_equal(loaded.time, self.profile.time)
+        np.testing.assert_array_equal(loaded.stage, self.profile.stage)
+        np.testing.assert_array_equal(loaded.values, self.profile.values)
+        self.assertEqual(loaded.profile_at([26]), self.profile.profile_at([26]))
+
+
+if __name__ == '__main__':
+    unittest.main()
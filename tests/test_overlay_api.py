@@ -0,0 +1,66 @@
+"""
+Tests for argument validation of the overlay endpoint
+"""
+import os
+import unittest
+
+import support
+
+import config
+
+
+class OverlayArgumentsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = support.load_app().app
+        cls.client = cls.app.test_client()
+
+    def post(self, **fields):
+        body = dict({'experiments': ['missing'], 'columns': ['R1/2 T read [°C]']}, **fields)
+        return self.client.post('/api/overlay', json=body)
+
+    def test_valid_stages_reach_the_lookup(self):
+        # An unknown experiment gives 404 once the arguments are accepted
+        for stages in (2, [1, 2], ['3'], None):
+            with self.subTest(stages=stages):
+                self.assertEqual(self.post(stages=stages).status_code, 404)
+
+    def test_invalid_stages_are_rejected(self):
+        for stages in ('12', [1, 'a'], [True], [1.5], {'1': 2}, True):
+            with self.subTest(stages=stages):
+                response = self.post(stages=stages)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('stage', response.get_json()['error'])
+
+    def test_invalid_points_are_rejected(self):
+        for points in ([100], 'many', True):
+            with self.subTest(points=points):
+                self.assertEqual(self.post(points=points).status_code, 400)
+
+    def test_points_out_of_range_are_rejected(self):
+        for points in (0, 1, -5, '0', config.OVERLAY_MAX_POINTS + 1):
+            with self.subTest(points=points):
+                response = self.post(points=points)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('points', response.get_json()['error'])
+        self.assertEqual(self.post(points=2).status_code, 404)
+
+    def test_experiment_names_cannot_leave_the_reports_folder(self):
+        # Stage data next to the reports folder, reachable as ../outside
+        outside = os.path.join(os.path.dirname(self.app.config['REPORTS_FOLDER']), 'outside')
+        os.makedirs(os.path.join(outside, 'stage_1'), exist_ok=True)
+        with open(os.path.join(outside, 'stage_1', 'stage_1_data.csv'), 'w') as f:
+            f.write('Time_Minutes,NH3 out [%]\n0,1.0\n1,2.0\n')
+
+        for name in ('../outside', '..', '.', ''):
+            with self.subTest(name=name):
+                self.assertEqual(self.post(experiments=[name], columns=['NH3 out [%]']).status_code, 404)
+
+    def test_get_rejects_non_numeric_stage(self):
+        response = self.client.get('/api/overlay', query_string={'experiment': 'missing', 'column': 'x', 'stage': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
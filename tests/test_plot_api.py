@@ -0,0 +1,78 @@
+"""
+Tests for serving stored plot JSON with ETags and conditional requests
+"""
+import os
+import shutil
+import unittest
+from unittest import mock
+
+import support
+
+
+class PlotFileTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        app_module = support.load_app()
+        cls.report_cache = app_module.report_cache
+        cls.client = app_module.app.test_client()
+        cls.exp_dir = os.path.join(app_module.app.config['REPORTS_FOLDER'], 'plots')
+        cls.path = os.path.join(cls.exp_dir, 'stage_1', 'stage_1_temp_plotly.json')
+        cls.url = '/api/experiment/plots/stage/1?type=temperature'
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.exp_dir, ignore_errors=True)
+
+    def setUp(self):
+        self.report_cache.invalidate(self.exp_dir)
+
+    def write(self, data, mtime):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'wb') as f:
+            f.write(data)
+        os.utime(self.path, (mtime, mtime))
+
+    def get(self, headers=None):
+        # send_file leaves the file open on a 304; read and close every response
+        response = self.client.get(self.url, headers=headers or {})
+        response.get_data()
+        response.close()
+        return response
+
+    def check_conditional_get(self):
+        # Stored bytes are sent unchanged, formatting included
+        data = b'{"data": [ {"x": [1, 2.50], "y": [NaN]} ],\n "layout": {}}'
+        self.write(data, 1_700_000_000)
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, data)
+        self.assertEqual(response.mimetype, 'application/json')
+        etag = response.headers['ETag']
+
+        response = self.get({'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        # A rewritten file gets a new ETag, and the old one no longer matches
+        self.write(data.replace(b'2.50', b'3.75'), 1_700_000_060)
+        response = self.get({'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'3.75', response.data)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        return etag
+
+    def test_cached_file(self):
+        self.check_conditional_get()
+        self.assertGreater(self.report_cache.stats()['hits'], 0)
+
+    def test_file_too_big_for_the_cache_uses_the_same_etag(self):
+        cached_etag = self.check_conditional_get()
+        self.report_cache.invalidate(self.exp_dir)
+        with mock.patch.object(self.report_cache, 'max_entry_bytes', 16):
+            streamed_etag = self.check_conditional_get()
+        self.assertEqual(streamed_etag, cached_etag)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Tests for output rounding and for regenerating plots from saved stage data
+"""
+import os
+import glob
+import json
+import tempfile
+import unittest
+from decimal import Decimal
+
+import numpy as np
+
+from support import make_logger_file
+
+from Processors.precision import quantize, round_to_significant
+
+
+def plot_files(exp_dir):
+    """{relative path: parsed contents without the processing time} of the plot files of an experiment"""
+    files = {}
+    for path in glob.glob(os.path.join(exp_dir, '**', '*plotly*.json'), recursive=True):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        data.get('metadata', {}).pop('processed_at', None)
+        files[os.path.relpath(path, exp_dir)] = data
+    return files
+
+
+def profile_arrays(exp_dir):
+    (path,) = glob.glob(os.path.join(exp_dir, '*_multipoint_profile.npz'))
+    with np.load(path) as data:
+        return {name: data[name].copy() for name in data.files}
+
+
+class QuantizeTest(unittest.TestCase):
+
+    def test_resolution_gives_short_decimals_and_is_idempotent(self):
+        values = np.random.default_rng(0).uniform(-50, 900, 10000)
+        rounded = quantize(values, 'R1/2 T read [°C]')
+        self.assertTrue(np.array_equal(quantize(rounded, 'R1/2 T read [°C]'), rounded))
+        self.assertTrue(np.all(np.abs(rounded - values) <= 0.05 + 1e-9))
+        for value in rounded[:500].tolist():
+            self.assertLessEqual(-Decimal(repr(value)).as_tuple().exponent, 1)
+
+    def test_significant_digits(self):
+        values = np.array([123456.789, 0.000123456789, -98.7654321, 0.0, np.nan])
+        rounded = round_to_significant(values, 4)
+        np.testing.assert_array_equal(rounded, [123500.0, 0.0001235, -98.77, 0.0, np.nan])
+
+    def test_no_negative_zero(self):
+        rounded = quantize([-0.0004, -0.00001], 'Pressure PIC [bar]')
+        self.assertEqual([repr(value) for value in rounded.tolist()], ['0.0', '0.0'])
+
+
+class RegenerationTest(unittest.TestCase):
+    """Regenerated plots must equal the ones written when the experiment was processed"""
+
+    @classmethod
+    def setUpClass(cls):
+        from Processors import ExperimentalDataProcessor
+
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.upload_folder = os.path.join(cls.tmp.name, 'uploads')
+        cls.reports_folder = os.path.join(cls.tmp.name, 'Reports')
+        make_logger_file(cls.upload_folder)
+        ExperimentalDataProcessor(cls.upload_folder, cls.reports_folder).process_file('synthetic.txt')
+        cls.exp_dir = os.path.join(cls.reports_folder, 'synthetic')
+        cls.plots = plot_files(cls.exp_dir)
+        cls.profile = profile_arrays(cls.exp_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def regenerate(self):
+        from Processors.plot_regeneration import regenerate_experiment
+
+        result = regenerate_experiment(self.reports_folder, 'synthetic', upload_folder=self.upload_folder, workers=1)
+        self.assertEqual(result['errors'], [])
+
+    def assert_unchanged(self):
+        regenerated = plot_files(self.exp_dir)
+        self.assertEqual(sorted(regenerated), sorted(self.plots))
+        for name, data in self.plots.items():
+            self.assertEqual(regenerated[name], data, name)
+        profile = profile_arrays(self.exp_dir)
+        for name, values in self.profile.items():
+            np.testing.assert_array_equal(profile[name], values, err_msg=name)
+
+    def test_regenerate_from_stage_data(self):
+        self.assertIn('synthetic_multipoint_heatmap_plotly_data.json', self.plots)
+        self.regenerate()
+        self.assert_unchanged()
+
+        # With only the rounded stage JSON left, the saved profile is kept and the heatmaps drawn from it
+        for path in glob.glob(os.path.join(self.exp_dir, 'stage_*', 'stage_*_data.csv')):
+            os.remove(path)
+        self.regenerate()
+        self.assert_unchanged()
+
+
+if __name__ == '__main__':
+    unittest.main()
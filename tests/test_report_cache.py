@@ -0,0 +1,100 @@
+"""
+Tests for the report cache
+"""
+import os
+import json
+import tempfile
+import unittest
+
+import support  # noqa: F401  (puts the repository root in the path)
+
+from Processors.report_cache import ReportCache
+
+
+class ReportCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ReportCache(max_bytes=1000, max_entry_bytes=400)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data, mtime=1_700_000_000):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_rewritten_file_is_reloaded(self):
+        path = self.write('a.json', b'{"v": 1}')
+        self.assertEqual(self.cache.get_json(path), {'v': 1})
+        self.assertEqual(self.cache.get_json(path), {'v': 1})
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        # Same size, new mtime
+        self.write('a.json', b'{"v": 2}', mtime=1_700_000_001)
+        self.assertEqual(self.cache.get_json(path), {'v': 2})
+        # Same mtime, new size
+        self.write('a.json', b'{"v": 30}', mtime=1_700_000_001)
+        self.assertEqual(self.cache.get_json(path), {'v': 30})
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 3))
+
+    def test_trusted_lookups_skip_validation_until_invalidated(self):
+        path = self.write('a.json', b'{"v": 1}')
+        self.cache.get_json(path)
+        self.write('a.json', b'{"v": 2}', mtime=1_700_000_001)
+
+        self.assertEqual(self.cache.get_json(path, trust=True), {'v': 1})
+        self.assertEqual(self.cache.invalidate(self.tmp.name), 1)
+        self.assertEqual(self.cache.get_json(path, trust=True), {'v': 2})
+
+    def test_least_recently_used_entries_are_evicted(self):
+        paths = [self.write(f"{i}.txt", bytes(400)) for i in range(3)]
+        self.cache.get_file(paths[0])
+        self.cache.get_file(paths[1])
+        self.cache.get_file(paths[0])
+        self.cache.get_file(paths[2])
+
+        stats = self.cache.stats()
+        self.assertEqual((stats['entries'], stats['bytes'], stats['evictions']), (2, 800, 1))
+        self.cache.get_file(paths[0])
+        self.assertEqual(self.cache.stats()['hits'], 2)
+        self.cache.get_file(paths[1])
+        self.assertEqual(self.cache.stats()['misses'], 4)
+
+    def test_file_over_the_entry_limit_is_not_cached(self):
+        small = self.write('small.txt', bytes(300))
+        big = self.write('big.txt', bytes(500))
+        self.cache.get_file(small)
+
+        for _ in range(3):
+            self.assertIsNone(self.cache.get_file(big))
+        stats = self.cache.stats()
+        self.assertEqual((stats['entries'], stats['bytes'], stats['hits'], stats['misses']), (1, 300, 0, 4))
+        # The small file is still the most recently used entry
+        self.assertIsNotNone(self.cache.get_file(small))
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_file_that_grows_past_the_limit_is_dropped(self):
+        path = self.write('grow.txt', bytes(300))
+        self.assertEqual(self.cache.get_file(path).data, bytes(300))
+        self.write('grow.txt', bytes(500), mtime=1_700_000_001)
+
+        self.assertIsNone(self.cache.get_file(path))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_list_dir_sees_new_entries(self):
+        folder = os.path.join(self.tmp.name, 'exp')
+        os.makedirs(folder)
+        os.utime(folder, (1_700_000_000, 1_700_000_000))
+        self.assertEqual(self.cache.list_dir(folder), [])
+        with open(os.path.join(folder, 'summary.json'), 'w') as f:
+            json.dump({}, f)
+
+        self.assertEqual(self.cache.list_dir(folder), ['summary.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
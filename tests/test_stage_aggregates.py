@@ -0,0 +1,110 @@
+"""
+Tests for per-stage aggregates and the aggregate query language
+"""
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+import support  # noqa: F401  (puts the repository root in the path)
+
+from Processors.catalog import get_catalog
+from Processors.stage_aggregates import compute_stage_aggregates, parse_condition, parse_term, query
+
+T_SET = 'R1/2 T set [°C]'
+NH3 = 'NH3 out [%]'
+
+
+def stage_info(t_set, nh3):
+    return {'row_count': 10, 'aggregates': {
+        T_SET: {'mean': t_set, 'min': t_set, 'max': t_set, 'std': 0.0, 'count': 10, 'last_mean': t_set},
+        NH3: {'mean': nh3, 'min': nh3 - 1, 'max': nh3 + 1, 'std': 0.5, 'count': 10, 'last_mean': nh3}
+    }}
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_terms(self):
+        self.assertEqual(parse_term(' mean(NH3 out [%]) '), ('mean', NH3))
+        self.assertEqual(parse_term('last_mean(Flow (corrected) [Nml/min])'), ('last_mean', 'Flow (corrected) [Nml/min]'))
+        for text in ('median(NH3 out [%])', 'MEAN(x)', 'mean()', 'mean x', 'mean(x', 'x'):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                parse_term(text)
+
+    def test_conditions(self):
+        self.assertEqual(parse_condition(f"mean({T_SET})>=545"), (('mean', T_SET), '>=', 545.0))
+        self.assertEqual(parse_condition('max(Flow (>=) [x]) < 3.5'), (('max', 'Flow (>=) [x]'), '<', 3.5))
+        self.assertEqual(parse_condition('experiment~Exp 011'), ('experiment', '~', 'Exp 011'))
+        self.assertEqual(parse_condition('Stage != 2'), ('stage', '!=', 2.0))
+
+    def test_invalid_conditions_are_rejected(self):
+        for text in ('experiment>3', 'stage~2', 'mean(x)~3', 'mean(x)>abc', 'mean(x)', 'mean(x)=',
+                     'name=foo', 'stage=1; DROP TABLE stages', 'median(x)>1', 'mean(x) LIKE 1'):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                parse_condition(text)
+
+
+class QueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.reports = self.tmp.name
+        catalog = get_catalog(self.reports)
+        catalog.upsert_experiment('Exp 010', {'stages_info': {'1': stage_info(500, 20.0), '2': stage_info(550, 5.0)}})
+        catalog.upsert_experiment('Exp 011', {'stages_info': {'1': stage_info(550, 7.0), '2': stage_info(600, 1.0)}})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_conditions_select_stages(self):
+        result = query(self.reports, [f"mean({NH3})", f"max({NH3})"], [f"mean({T_SET})>=545", 'experiment~011'])
+        self.assertEqual(result['columns'], ['experiment', 'stage', f"mean({NH3})", f"max({NH3})"])
+        self.assertEqual(result['rows'], [['Exp 011', 1, 7.0, 8.0], ['Exp 011', 2, 1.0, 2.0]])
+
+    def test_grouping(self):
+        result = query(self.reports, [f"mean({NH3})"], [f"mean({T_SET})>=550"], group_by='experiment')
+        self.assertEqual(result['rows'], [['Exp 010', 1, 5.0], ['Exp 011', 2, 4.0]])
+        result = query(self.reports, [f"mean({NH3})"], group_by='all', agg='max')
+        self.assertEqual(result, {'columns': ['stages', f"max(mean({NH3}))"], 'rows': [[4, 20.0]]})
+
+    def test_names_are_parameters_not_sql(self):
+        result = query(self.reports, ["mean(x') OR 1=1 --)"], ["experiment=' OR ''='"])
+        self.assertEqual(result['rows'], [])
+
+    def test_invalid_queries_are_rejected(self):
+        for args in (dict(select=[]), dict(select=[f"mean({NH3})"], group_by='column'),
+                     dict(select=[f"mean({NH3})"], group_by='stage', agg='median'),
+                     dict(select=[f"mean({NH3})"], where=['stage>x'])):
+            with self.subTest(**args), self.assertRaises(ValueError):
+                query(self.reports, **args)
+
+    def test_catalog_rejects_statistics_and_operators_outside_the_whitelist(self):
+        catalog = get_catalog(self.reports)
+        with self.assertRaises(ValueError):
+            catalog.query_stage_aggregates([('mean) FROM stages; --', NH3)])
+        with self.assertRaises(ValueError):
+            catalog.query_stage_aggregates([('mean', NH3)], [('stage', 'OR 1=1 OR', 1)])
+
+
+class ComputeTest(unittest.TestCase):
+
+    def test_statistics_and_last_window(self):
+        frame = pd.DataFrame({
+            'Time_Minutes': [0.0, 10.0, 20.0, 30.0, 40.0],
+            'Stage': [1] * 5,
+            NH3: [1.0, 2.0, 3.0, None, 5.0],
+            'Label': ['a'] * 5
+        })
+        aggregates = compute_stage_aggregates(frame, last_minutes=15)
+
+        self.assertEqual(set(aggregates), {NH3})
+        stats = aggregates[NH3]
+        self.assertEqual((stats['mean'], stats['min'], stats['max'], stats['count']), (2.75, 1.0, 5.0, 4))
+        self.assertAlmostEqual(stats['std'], pd.Series([1.0, 2.0, 3.0, 5.0]).std())
+        # Rows at 30 and 40 minutes; the missing value is skipped
+        self.assertEqual(stats['last_mean'], 5.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
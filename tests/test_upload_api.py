@@ -0,0 +1,39 @@
+"""
+Tests for argument validation of the chunked upload endpoints
+"""
+import unittest
+
+import support
+
+
+class CreateUploadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = support.load_app().app.test_client()
+
+    def create(self, **fields):
+        return self.client.post('/api/uploads', json=dict({'filename': 'run.txt', 'process': False}, **fields))
+
+    def test_valid_sizes_are_accepted(self):
+        for size in (None, 0, 1024, '2048'):
+            with self.subTest(size=size):
+                response = self.create(size=size)
+                self.assertEqual(response.status_code, 201)
+                self.client.delete(response.get_json()['upload_url'])
+
+    def test_invalid_sizes_are_rejected(self):
+        for size in ([1], {'bytes': 1}, True, 1.5, 'large', -1, '-5'):
+            with self.subTest(size=size):
+                response = self.create(size=size)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('size', response.get_json()['message'])
+
+    def test_invalid_bodies_are_rejected(self):
+        for body in ([], {'filename': ['run.txt']}, {'filename': 'run.exe'}):
+            with self.subTest(body=body):
+                self.assertEqual(self.client.post('/api/uploads', json=body).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+Tests for chunked uploads and the streaming table parser
+"""
+import os
+import gzip
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from support import make_logger_file
+
+import config
+from Processors.jobs import process_upload_task
+from Processors.upload_sessions import StreamingTableParser, UploadError, UploadManager
+
+
+def feed_in_chunks(target, data, size):
+    for start in range(0, len(data), size):
+        target(data[start:start + size])
+
+
+class StreamingTableParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = make_logger_file(self.tmp.name)
+        with open(self.path, 'rb') as f:
+            self.data = f.read()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_matches_read_csv_across_blocks_and_split_lines(self):
+        # An odd chunk size splits lines mid-way, and small blocks give several parsed blocks
+        parser = StreamingTableParser(block_bytes=16 * 1024)
+        feed_in_chunks(parser.feed, self.data, 997)
+        parser.close()
+
+        self.assertGreater(len(parser._blocks), 1)
+        pd.testing.assert_frame_equal(parser.result(), pd.read_csv(self.path, sep='\t'))
+
+    def test_without_trailing_newline(self):
+        parser = StreamingTableParser(block_bytes=8 * 1024)
+        feed_in_chunks(parser.feed, self.data.rstrip(b'\n'), 4096)
+        parser.close()
+
+        pd.testing.assert_frame_equal(parser.result(), pd.read_csv(self.path, sep='\t'))
+
+    def test_latin1_file_is_decoded_as_latin1_throughout(self):
+        # The header's unit signs are the only non-ASCII bytes, so the first block decides the encoding
+        data = self.data.replace('°'.encode('utf-8'), '°'.encode('latin1'))
+        parser = StreamingTableParser(block_bytes=16 * 1024)
+        feed_in_chunks(parser.feed, data, 997)
+        parser.close()
+
+        self.assertEqual(parser.encoding, 'latin1')
+        pd.testing.assert_frame_equal(parser.result(), pd.read_csv(self.path, sep='\t'))
+
+    def test_integer_column_turning_float_in_a_later_block_stops_parsing(self):
+        rows = b''.join(b'%d\t%d\n' % (i, i * 2) for i in range(2000))
+        parser = StreamingTableParser(block_bytes=4 * 1024)
+        feed_in_chunks(parser.feed, b'Count\tValue\n' + rows + b'2000\t0.5\n', 997)
+        parser.close()
+
+        self.assertGreater(len(parser._blocks), 1)
+        self.assertIsNotNone(parser.error)
+        with self.assertRaises(ValueError):
+            parser.result()
+
+    def test_non_utf8_byte_after_first_block_stops_parsing(self):
+        parser = StreamingTableParser(block_bytes=16 * 1024)
+        cut = self.data.index(b'\n', len(self.data) // 2) + 1
+        data = self.data[:cut] + self.data[cut:].replace(b'\t', b'\t\xb5', 1)
+        feed_in_chunks(parser.feed, data, 997)
+        parser.close()
+
+        self.assertEqual(parser.encoding, 'utf-8')
+        self.assertIsInstance(parser.error, UnicodeDecodeError)
+
+
+class UploadManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = UploadManager(os.path.join(self.tmp.name, 'uploads'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def upload(self, filename, body, compressed=None, chunk_size=3001):
+        session = self.manager.create(filename, size=len(body), compressed=compressed)
+        offset = 0
+        for start in range(0, len(body), chunk_size):
+            offset = session.append(offset, body[start:start + chunk_size])
+        return session
+
+    def test_stores_file_and_parses_like_read_csv(self):
+        path = make_logger_file(os.path.join(self.tmp.name, 'source'))
+        with open(path, 'rb') as f:
+            original = f.read()
+        expected = pd.read_csv(path, sep='\t')
+
+        for filename, body in (('plain.txt', original), ('packed.txt.gz', gzip.compress(original))):
+            with self.subTest(filename=filename), mock.patch.object(config, 'UPLOAD_PARSE_BLOCK_BYTES', 16 * 1024):
+                stored, parsed_path = self.manager.complete(self.upload(filename, body))
+                with open(os.path.join(self.manager.upload_folder, stored), 'rb') as f:
+                    self.assertEqual(f.read(), original)
+                pd.testing.assert_frame_equal(pd.read_pickle(parsed_path), expected)
+
+    def test_parse_failure_leaves_the_file_to_the_reader(self):
+        body = b'Count\tValue\n' + b''.join(b'%d\t%d\n' % (i, i) for i in range(2000)) + b'1\t0.5\n'
+        with mock.patch.object(config, 'UPLOAD_PARSE_BLOCK_BYTES', 4 * 1024):
+            stored, parsed_path = self.manager.complete(self.upload('mixed.txt', body))
+
+        self.assertIsNone(parsed_path)
+        with open(os.path.join(self.manager.upload_folder, stored), 'rb') as f:
+            self.assertEqual(f.read(), body)
+
+    def test_upload_task_processes_parsed_data_and_removes_it(self):
+        path = make_logger_file(os.path.join(self.tmp.name, 'source'))
+        with open(path, 'rb') as f:
+            stored, parsed_path = self.manager.complete(self.upload('run.txt', f.read()))
+        reports = os.path.join(self.tmp.name, 'reports')
+
+        result = process_upload_task(None, self.manager.upload_folder, reports, stored, parsed_path)
+
+        self.assertTrue(result['streamed'])
+        self.assertFalse(os.path.exists(parsed_path))
+        self.assertTrue(os.path.isdir(os.path.join(reports, 'run')))
+
+    def test_empty_upload_is_rejected(self):
+        for compressed, body in ((False, b''), (True, b''), (True, gzip.compress(b''))):
+            with self.subTest(compressed=compressed, body_bytes=len(body)):
+                session = self.upload('empty.txt', body, compressed=compressed)
+                with self.assertRaisesRegex(UploadError, 'empty'):
+                    self.manager.complete(session)
+
+
+if __name__ == '__main__':
+    unittest.main()